@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+from users.revocations import revoked_users
+
+User = get_user_model()
+
+
+class RoleAccessToken(AccessToken):
+    """ Access token carrying user role and staff flags, so requests
+        can be authorized without loading the user.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = datetime_to_epoch(token.current_time)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """ User built from RoleAccessToken claims, provides the same role
+        checks as User model.
+    """
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN_ROLE_NAME
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR_ROLE_NAME
+
+    @property
+    def is_user(self):
+        return self.role == User.USER_ROLE_NAME
+
+
+def author_instance(user):
+    """ User model instance of request user to be saved as author.
+        Token users give an instance with id and username only, built
+        without a query.
+    """
+    if isinstance(user, User):
+        return user
+    return User(id=user.id, username=user.username)
+
+
+class RoleTokenAuthentication(JWTAuthentication):
+    """ Trust token claims unless user was changed or removed after
+        the token was issued, load user from database otherwise.
+        Tokens issued before claims were added are checked too.
+    """
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if (user_id is None
+                or 'role' not in validated_token
+                or 'iat' not in validated_token
+                or revoked_users.is_revoked(user_id,
+                                            validated_token['iat'])):
+            return super().get_user(validated_token)
+        return RoleTokenUser(validated_token)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import IntegrityError
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .parsers import FastJSONParser, NDJSONParser
+
+
+class BulkUpsertMixin:
+    """ Adds bulk/ action saving a JSON array or NDJSON stream of objects.
+
+    Every item is validated with bulk_serializer_class, valid items are
+    passed to bulk_upsert() at once and saved in one transaction.
+    Response lists result of every item in request order: status
+    created, updated or error with errors of the item.
+    """
+    bulk_serializer_class = None
+
+    def bulk_upsert(self, items):
+        raise NotImplementedError('.bulk_upsert() must be overridden')
+
+    def get_bulk_serializers(self):
+        """Serializers for new (False) and updated (True) objects, one
+        instance validates all items, building fields per item is slow.
+        """
+        context = self.get_serializer_context()
+        return {partial: self.bulk_serializer_class(partial=partial,
+                                                    context=context)
+                for partial in (False, True)}
+
+    @action(["post"], detail=False,
+            parser_classes=(FastJSONParser, NDJSONParser))
+    def bulk(self, request):
+        """ Function to process API requests with bulk/ URI.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected a list of objects.')
+        if len(request.data) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Up to {settings.BULK_MAX_ITEMS} objects are accepted '
+                'per request.')
+
+        serializers = self.get_bulk_serializers()
+        results = [None] * len(request.data)
+        valid = []
+        for position, item in enumerate(request.data):
+            serializer = serializers[isinstance(item, dict) and 'id' in item]
+            try:
+                valid.append((position, serializer.run_validation(item)))
+            except ValidationError as error:
+                results[position] = {'status': 'error',
+                                     'errors': error.detail}
+        try:
+            saved = self.bulk_upsert([data for _, data in valid])
+        except IntegrityError:
+            return Response(
+                {'detail': 'Objects were changed by another request, '
+                           'please retry.'},
+                status=status.HTTP_409_CONFLICT)
+        for (position, _), result in zip(valid, saved):
+            results[position] = result
+        return Response(results)
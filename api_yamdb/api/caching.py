@@ -0,0 +1,158 @@
+import hashlib
+import time
+from typing import Iterable, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import is_sticky, read_replica, route_reads
+
+VERSION_KEY_PREFIX = 'api:version:'
+BUMPED_KEY_PREFIX = 'api:bumped:'
+RESPONSE_KEY_PREFIX = 'api:response:'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_version_cache():
+    return caches[settings.API_VERSION_CACHE_ALIAS]
+
+
+def initial_version() -> int:
+    """ Missing counters start from the clock in microseconds, so
+    a counter lost by the cache never returns to a version some cached
+    response was built with.
+    """
+    return time.time_ns() // 1000
+
+
+def get_versions(names: Iterable[str]) -> List[int]:
+    """Current values of version counters."""
+    keys = [VERSION_KEY_PREFIX + name for name in names]
+    cache = get_version_cache()
+    stored = cache.get_many(keys)
+    for key in keys:
+        if key not in stored:
+            cache.add(key, initial_version(), None)
+            stored[key] = cache.get(key)
+    return [stored[key] for key in keys]
+
+
+def bump_versions(*names: str):
+    """Invalidate every cached response that depends on given counters
+    once the current transaction is committed, responses built before
+    that still see the old data.
+    """
+    transaction.on_commit(lambda: increment_versions(names))
+
+
+def increment_versions(names: Iterable[str]):
+    names = list(names)
+    cache = get_version_cache()
+    for name in names:
+        key = VERSION_KEY_PREFIX + name
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), None)
+    if settings.DATABASE_REPLICAS:
+        # replicas may lag behind the new versions for a while
+        cache.set_many({BUMPED_KEY_PREFIX + name: True for name in names},
+                       settings.REPLICA_STICKY_SECONDS)
+
+
+def recently_bumped(names: Iterable[str]) -> bool:
+    """Some of the counters were bumped within REPLICA_STICKY_SECONDS."""
+    return bool(get_version_cache().get_many(
+        [BUMPED_KEY_PREFIX + name for name in names]))
+
+
+def _opaque_tag(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison of ETag with If-None-Match header value."""
+    return _opaque_tag(etag) in (
+        _opaque_tag(tag) for tag in if_none_match.split(','))
+
+
+class ResponseCacheMixin:
+    """ Base for viewset mixins caching read responses.
+
+    Cache key is built from request URI and version counters the response
+    depends on. Counters are bumped by model signals (see api.signals),
+    so stale entries are never read again and expire by timeout.
+    The same key is used as a weak ETag, clients revalidating with
+    If-None-Match get 304 without any database query.
+
+    Detail counters may contain placeholders filled from view kwargs,
+    e.g. 'title:{pk}'. Responses of counters bumped less than
+    REPLICA_STICKY_SECONDS ago are built from primary, a lagging
+    replica would store old data under the new versions.
+    """
+    def format_version_names(self, version_names):
+        return [name.format(**self.kwargs) for name in version_names]
+
+    def get_cache_key(self, request, version_names):
+        versions = get_versions(self.format_version_names(version_names))
+        fingerprint = '|'.join(
+            [request.build_absolute_uri()]
+            + [f'{name}={version}'
+               for name, version in zip(version_names, versions)])
+        return RESPONSE_KEY_PREFIX + hashlib.md5(
+            fingerprint.encode()).hexdigest()
+
+    def set_cache_headers(self, response, etag):
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            f'public, max-age={settings.API_CACHE_MAX_AGE}, must-revalidate')
+        return response
+
+    def cached_response(self, request, version_names, handler,
+                        *args, **kwargs):
+        key = self.get_cache_key(request, version_names)
+        etag = f'W/"{key[len(RESPONSE_KEY_PREFIX):]}"'
+        cache = get_cache()
+        # responses of other clients may be built from a lagging replica,
+        # a recent writer rebuilds them from primary
+        if not is_sticky():
+            if etag_matches(etag, request.headers.get('If-None-Match', '')):
+                return self.set_cache_headers(
+                    Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+            data = cache.get(key)
+            if data is not None:
+                return self.set_cache_headers(Response(data), etag)
+
+        if read_replica.get() is not None and recently_bumped(
+                self.format_version_names(version_names)):
+            with route_reads(None, is_sticky()):
+                response = handler(request, *args, **kwargs)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return self.set_cache_headers(response, etag)
+
+
+class CachedListMixin(ResponseCacheMixin):
+    cache_list_versions = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.cache_list_versions,
+                                    super().list, *args, **kwargs)
+
+
+class CachedRetrieveMixin(ResponseCacheMixin):
+    cache_detail_versions = ()
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self.cache_detail_versions,
+                                    super().retrieve, *args, **kwargs)
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from reviews.models import Title
+from reviews.rankings import trending_score
+
+# formats datetimes exactly as serializer fields with default settings
+format_datetime = serializers.DateTimeField().to_representation
+
+
+class CompactSerializer:
+    """ Read-only serializer of list responses.
+
+    Response dicts are built straight from .values() rows, without
+    DRF fields dispatching to_representation() per value. Output must
+    stay identical to serializer_class of the view, see
+    tests/test_compact.py.
+    """
+    lookups: Tuple[str, ...] = ()
+
+    def get_rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    def to_representation(self, rows: Iterable[dict]) -> List[dict]:
+        raise NotImplementedError('.to_representation() must be overridden')
+
+
+class TitleCompactSerializer(CompactSerializer):
+    """Output of TitleGetSerializer, genres are read with one query."""
+    lookups = ('id', 'rating', 'rating_count', 'category__name',
+               'category__slug', 'name', 'description', 'year',
+               'last_review_at')
+
+    def get_genres(self, title_ids):
+        genres = defaultdict(list)
+        for title_id, name, slug in (Title.genre.through.objects
+                                     .filter(title_id__in=title_ids)
+                                     .order_by('genre_id')
+                                     .values_list('title_id', 'genre__name',
+                                                  'genre__slug')):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return genres
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        genres = self.get_genres([row['id'] for row in rows])
+        return [{
+            'id': row['id'],
+            'rating': None if row['rating'] is None else int(row['rating']),
+            'review_count': row['rating_count'],
+            'genre': genres.get(row['id'], []),
+            'category': None if row['category__slug'] is None else {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            },
+            'name': row['name'],
+            'description': row['description'],
+            'year': row['year'],
+            'last_review_at': format_datetime(row['last_review_at']),
+        } for row in rows]
+
+
+class TopTitleCompactSerializer(TitleCompactSerializer):
+    """Output of TitleGetSerializer with weighted rating of the title."""
+    lookups = TitleCompactSerializer.lookups + ('ranking__weighted_rating',)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        return [dict(title, weighted_rating=row['ranking__weighted_rating'])
+                for title, row in zip(super().to_representation(rows), rows)]
+
+
+class TrendingTitleCompactSerializer(TitleCompactSerializer):
+    """Output of TitleGetSerializer with current trending score."""
+    lookups = TitleCompactSerializer.lookups + ('ranking__trending',)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        now = timezone.now()
+        return [dict(title,
+                     trending_score=trending_score(row['ranking__trending'],
+                                                   now))
+                for title, row in zip(super().to_representation(rows), rows)]
+
+
+class ReviewCompactSerializer(CompactSerializer):
+    """Output of ReviewSerializer."""
+    lookups = ('id', 'text', 'author__username', 'score', 'pub_date',
+               'comment_count', 'last_comment_at')
+
+    def to_representation(self, rows):
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': format_datetime(row['pub_date']),
+            'comment_count': row['comment_count'],
+            'last_comment_at': format_datetime(row['last_comment_at']),
+        } for row in rows]
+
+
+class CommentCompactSerializer(CompactSerializer):
+    """Output of CommentSerializer."""
+    lookups = ('id', 'text', 'author__username', 'pub_date')
+
+    def to_representation(self, rows):
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': format_datetime(row['pub_date']),
+        } for row in rows]
+
+
+class CompactListMixin:
+    """ Serves list action with compact_serializer_class.
+
+    Rows are paginated as dicts, so keyset pagination reads cursor
+    positions from them; keyset ordering fields must be in lookups.
+    """
+    compact_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        return self.compact_list(request, self.compact_serializer_class())
+
+    def compact_list(self, request, serializer: CompactSerializer):
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page))
+        return Response(serializer.to_representation(rows))
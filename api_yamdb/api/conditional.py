@@ -0,0 +1,85 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from reviews.stamps import get_stamp
+
+from .caching import etag_matches
+
+
+class ConditionalGetMixin:
+    """ Adds ETag and Last-Modified validators to list and retrieve.
+
+    Validators are read with one indexed query: collection stamp by key
+    for lists (conditional_list_key, formatted with view kwargs) and
+    updated_at of the object for details. If-None-Match and
+    If-Modified-Since are answered with 304 before serialization.
+
+    With conditional_etag = False only Last-Modified is handled, ETag
+    is left to the inner layer (e.g. response cache).
+    """
+    conditional_list_key = None
+    conditional_etag = True
+
+    def get_list_validators(self):
+        return get_stamp(self.conditional_list_key.format(**self.kwargs))
+
+    def get_detail_validators(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        modified = (self.get_queryset()
+                    .prefetch_related(None)
+                    .filter(**{self.lookup_field:
+                               self.kwargs[lookup_url_kwarg]})
+                    .values_list('updated_at', flat=True)
+                    .first())
+        return modified, modified
+
+    def make_etag(self, request, version):
+        fingerprint = f'{request.build_absolute_uri()}|{version}'
+        return f'W/"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+
+    def is_not_modified(self, request, etag, modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return (self.conditional_etag
+                    and etag_matches(etag, if_none_match))
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since', ''))
+        return (modified is not None
+                and if_modified_since is not None
+                and timegm(modified.utctimetuple()) <= if_modified_since)
+
+    def set_validators(self, response, etag, modified):
+        if modified is not None:
+            response['Last-Modified'] = http_date(
+                timegm(modified.utctimetuple()))
+        if self.conditional_etag and not response.has_header('ETag'):
+            response['ETag'] = etag
+        return response
+
+    def conditional_response(self, request, validators, handler,
+                             *args, **kwargs):
+        version, modified = validators
+        if version is None:
+            return handler(request, *args, **kwargs)
+        etag = self.make_etag(request, version)
+        if self.is_not_modified(request, etag, modified):
+            return self.set_validators(
+                Response(status=status.HTTP_304_NOT_MODIFIED),
+                etag, modified)
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        return self.set_validators(response, etag, modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.get_list_validators(),
+            super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.get_detail_validators(),
+            super().retrieve, *args, **kwargs)
@@ -1,13 +1,18 @@
 import django_filters
 from django_filters import rest_framework as filters
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
     category = filters.CharFilter(
         field_name='category__slug', lookup_expr='exact')
     genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta():
         model = Title
         fields = ['name', 'year']
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,75 @@
+import io
+import time
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.views import TitleViewSet
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .benchmark_serializers import compact_output, create_titles
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = ('Compare JSON rendering and parsing of titles list pages '
+            'with stdlib json and FastJSONRenderer/FastJSONParser, '
+            'test rows are rolled back')
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--page-size',
+                            type=int,
+                            action='append',
+                            help='Titles per page, may be repeated')
+        parser.add_argument('--repeat',
+                            type=int,
+                            default=50,
+                            help='Runs per page size, best one is reported')
+
+    def compare(self, name, page_size, stdlib, fast, repeat):
+        stdlib_time = best_time(stdlib, repeat)
+        fast_time = best_time(fast, repeat)
+        self.stdout.write(
+            f'{page_size} titles {name}: stdlib '
+            f'{stdlib_time * 1000:.3f} ms, fast {fast_time * 1000:.3f} ms, '
+            f'{stdlib_time / fast_time:.1f}x')
+
+    def handle(self, *args, **options):
+        page_sizes = options['page_size'] or [5, 50, 500]
+        repeat = options['repeat']
+        if orjson is None:
+            self.stdout.write('orjson is not installed, fast classes '
+                              'use stdlib json')
+        with transaction.atomic():
+            pks = create_titles(max(page_sizes))
+            for page_size in page_sizes:
+                data = {'count': len(pks), 'next': None, 'previous': None,
+                        'results': compact_output(TitleViewSet.queryset
+                                                  .filter(pk__in=pks)
+                                                  [:page_size])}
+                content = JSONRenderer().render(data)
+                if FastJSONRenderer().render(data) != content:
+                    self.stdout.write(f'{page_size} titles: rendered '
+                                      'content differs')
+                self.compare('render', page_size,
+                             lambda: JSONRenderer().render(data),
+                             lambda: FastJSONRenderer().render(data),
+                             repeat)
+                self.compare('parse', page_size,
+                             lambda: JSONParser().parse(
+                                 io.BytesIO(content)),
+                             lambda: FastJSONParser().parse(
+                                 io.BytesIO(content)),
+                             repeat)
+            transaction.set_rollback(True)
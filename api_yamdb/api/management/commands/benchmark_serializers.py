@@ -0,0 +1,82 @@
+import time
+
+from api.compact import TitleCompactSerializer
+from api.serializers import TitleGetSerializer
+from api.views import TitleViewSet
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from reviews.bulk import create_rows
+from reviews.models import Category, Genre, Title
+
+GENRES_PER_TITLE = 3
+
+
+def serializer_output(queryset):
+    return TitleGetSerializer(queryset, many=True).data
+
+
+def compact_output(queryset):
+    serializer = TitleCompactSerializer()
+    return serializer.to_representation(serializer.get_rows(queryset))
+
+
+def create_titles(count):
+    """Titles with category and genres for benchmarks, roll them back."""
+    category = Category.objects.create(name='Benchmark',
+                                       slug='benchmark-category')
+    genres = [Genre(name=f'Benchmark {number}', slug=f'benchmark-{number}')
+              for number in range(GENRES_PER_TITLE)]
+    create_rows(Genre, genres)
+    titles = [Title(name=f'Benchmark title {number}', year=2000,
+                    description='Benchmark', category=category,
+                    rating=number % 10 + 0.5)
+              for number in range(count)]
+    create_rows(Title, titles)
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+        for title in titles for genre in genres)
+    return [title.pk for title in titles]
+
+
+class Command(BaseCommand):
+    help = ('Compare titles list serialization with TitleGetSerializer '
+            'and compact serializer, test rows are rolled back')
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--page-size',
+                            type=int,
+                            action='append',
+                            help='Titles per page, may be repeated')
+        parser.add_argument('--repeat',
+                            type=int,
+                            default=20,
+                            help='Runs per page size, best one is reported')
+
+    def measure(self, output, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = JSONRenderer().render(output(queryset.all()))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, content
+
+    def handle(self, *args, **options):
+        page_sizes = options['page_size'] or [10, 100, 1000]
+        with transaction.atomic():
+            pks = create_titles(max(page_sizes))
+            for page_size in page_sizes:
+                queryset = TitleViewSet.queryset.filter(
+                    pk__in=pks[:page_size])
+                serializer_time, expected = self.measure(
+                    serializer_output, queryset, options['repeat'])
+                compact_time, content = self.measure(
+                    compact_output, queryset, options['repeat'])
+                self.stdout.write(
+                    f'{page_size} titles: serializer '
+                    f'{serializer_time * 1000:.1f} ms, compact '
+                    f'{compact_time * 1000:.1f} ms, '
+                    f'{serializer_time / compact_time:.1f}x, output '
+                    f'{"identical" if content == expected else "differs"}')
+            transaction.set_rollback(True)
@@ -0,0 +1,155 @@
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import RoleTokenAuthentication
+from .replicas import route_reads
+
+STICKY_KEY_PREFIX = 'api:sticky:'
+
+
+class QueryRecorder:
+    """ Execute wrapper collecting SQL statements with their duration.
+        Statements are recorded with placeholders, so queries repeated
+        with different parameters (N+1) share one shape.
+    """
+    def __init__(self) -> None:
+        self.queries: List[Tuple[str, float]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def duplicates(self) -> Dict[str, int]:
+        """Query shapes executed more than once with their counts."""
+        shapes = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in shapes.items() if count > 1}
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Record queries on every configured database connection."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+class QueryCountMiddleware:
+    """ Report database work of every request in Server-Timing header,
+        enabled by QUERY_TIMING_HEADERS setting.
+    """
+    def __init__(self, get_response):
+        if not settings.QUERY_TIMING_HEADERS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        duplicated = sum(recorder.duplicates.values())
+        description = f'{recorder.count} queries, {duplicated} duplicated'
+        if response.streaming:
+            # body is produced after the header is sent
+            description += ', streamed body not counted'
+        timings = [
+            f'db;dur={recorder.duration * 1000:.1f};desc="{description}"',
+            f'app;dur={total * 1000:.1f}',
+        ]
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+
+def routed_stream(content: Iterable, replica: Optional[str],
+                  sticky: bool) -> Iterator:
+    with route_reads(replica, sticky):
+        yield from content
+
+
+class ReplicaRoutingMiddleware:
+    """ Reads of safe method requests go to a random replica from
+        DATABASE_REPLICAS, see api.replicas.
+
+        A user whose unsafe request succeeded reads from primary for
+        REPLICA_STICKY_SECONDS, so it sees its own writes despite
+        replication lag. Sticky flags are kept by user id in the cache
+        shared by workers.
+    """
+    authentication = RoleTokenAuthentication()
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def get_sticky_cache(self):
+        return caches[settings.REPLICA_STICKY_CACHE_ALIAS]
+
+    def get_token_user_id(self, request):
+        """ User id claim of a valid access token, read before the view
+            authenticates the request. Only signature and expiration of
+            the token are checked, no queries are made.
+        """
+        header = self.authentication.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = self.authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            token = self.authentication.get_validated_token(raw_token)
+        except AuthenticationFailed:
+            return None
+        return token.get(jwt_settings.USER_ID_CLAIM)
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            # anonymous clients write only users, which are read from
+            # primary; the window starts when written rows are committed
+            user = getattr(request, 'user', None)
+            if (response.status_code < 400 and user is not None
+                    and user.is_authenticated):
+                self.get_sticky_cache().set(
+                    f'{STICKY_KEY_PREFIX}{user.pk}', True,
+                    settings.REPLICA_STICKY_SECONDS)
+            return response
+        user_id = self.get_token_user_id(request)
+        sticky = user_id is not None and self.get_sticky_cache().get(
+            f'{STICKY_KEY_PREFIX}{user_id}', False)
+        replica = None if sticky else random.choice(
+            settings.DATABASE_REPLICAS)
+        with route_reads(replica, sticky):
+            response = self.get_response(request)
+        if response.streaming:
+            # streaming body is read after the middleware returns
+            response.streaming_content = routed_stream(
+                response.streaming_content, replica, sticky)
+        return response
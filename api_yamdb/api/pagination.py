@@ -0,0 +1,142 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+
+
+def reverse_field(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class KeysetPagination(CursorPagination):
+    """ Cursor pagination without COUNT(*) and OFFSET scans.
+    Ordering is taken from view keyset_ordering attribute.
+
+    Cursor position holds values of all ordering fields, so rows with
+    equal values of the first field (pub_date) are neither skipped
+    nor repeated in both directions.
+    """
+    ordering = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.cursor = Cursor(offset=0, reverse=False, position=None)
+
+        ordering = self.ordering
+        if self.cursor.reverse:
+            ordering = [reverse_field(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.cursor.position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                ordering, self.decode_position(self.cursor.position)))
+
+        self.page = list(queryset[:self.page_size + 1])
+        has_more = len(self.page) > self.page_size
+        del self.page[self.page_size:]
+        has_position = self.cursor.position is not None
+        if self.cursor.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_position, has_more
+        else:
+            self.has_next, self.has_previous = has_more, has_position
+        return self.page
+
+    def get_keyset_filter(self, ordering, values):
+        """ Rows after the position: (a, b) > (x, y) expanded to
+        a > x OR (a = x AND b > y), led by a >= x for the index.
+        """
+        conditions = []
+        for number, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {other.lstrip('-'): value for other, value
+                     in zip(ordering[:number], values)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}':
+                                            values[number]}))
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return (Q(**{f'{first.lstrip("-")}__{lookup}': values[0]})
+                & reduce(or_, conditions))
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = instance
+                for attr in name.split('__'):
+                    value = getattr(value, attr)
+            values.append(value)
+        return json.dumps(values, default=str)
+
+    def get_link(self, reverse, instance):
+        """ Link to rows after (before when reverse) the instance, to the
+        first (last) page when there is no instance on this page.
+        """
+        position = None
+        if instance is not None:
+            position = self._get_position_from_instance(instance,
+                                                        self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=reverse,
+                                         position=position))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(False, self.page[-1] if self.page else None)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(True, self.page[0] if self.page else None)
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """ Page number pagination by default, keyset pagination when
+    request contains cursor query parameter (it may be empty
+    to request the first page).
+    """
+    keyset_pagination_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset_paginator = None
+
+    def is_keyset_request(self, request):
+        return (self.keyset_pagination_class.cursor_query_param
+                in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_keyset_request(request):
+            self.keyset_paginator = self.keyset_pagination_class()
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
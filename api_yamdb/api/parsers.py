@@ -0,0 +1,71 @@
+import codecs
+import io
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import orjson
+
+
+@lru_cache(maxsize=None)
+def is_utf8(encoding):
+    return codecs.lookup(encoding).name == 'utf-8'
+
+
+def loads(content: bytes, encoding: str):
+    """ Decode JSON with orjson when it is installed and content is
+    UTF-8. Errors are raised by stdlib json, so messages do not depend
+    on the library.
+    """
+    if orjson is not None and is_utf8(encoding):
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content.decode(encoding))
+
+
+class FastJSONParser(JSONParser):
+    """ JSONParser decoding with orjson when it is installed.
+
+    Parsed data is the same as with stdlib json except for integers
+    over 64 bits, orjson reads them as floats. Invalid documents are
+    reported by JSONParser.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or not is_utf8(encoding):
+            return super().parse(stream, media_type, parser_context)
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(content), media_type,
+                                 parser_context)
+
+
+class NDJSONParser(BaseParser):
+    """ Newline delimited JSON, one value per line, parsed into a list.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        if stream is None:
+            return items
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(loads(line, encoding))
+            except ValueError as error:
+                raise ParseError(f'NDJSON parse error in line {number}: '
+                                 f'{error}')
+        return items
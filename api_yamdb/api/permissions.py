@@ -32,7 +32,8 @@ class IsUser(BasePermission):
 
 class IsAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.method in SAFE_METHODS or obj.author == request.user
+        return (request.method in SAFE_METHODS
+                or obj.author_id == request.user.id)
 
 
 class ReadOnly(BasePermission):
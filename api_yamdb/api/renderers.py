@@ -0,0 +1,46 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """ JSONRenderer encoding with orjson when it is installed.
+
+    Output is the same as with stdlib json: types orjson does not
+    handle the same way (datetimes, decimals, lazy strings) are passed
+    to encoder_class, U+2028 and U+2029 are escaped. Indented output,
+    non-default JSON settings, floats stdlib json writes with exponent
+    and values orjson rejects (e.g. integers over 64 bits) are
+    rendered by stdlib json.
+
+    The only difference left: NaN and infinity are rendered as null,
+    where JSONRenderer raises ValueError.
+    """
+    # floats orjson writes as 1e16, 1.5e-7 or 0.00001, stdlib json
+    # writes them as 1e+16, 1.5e-07 and 1e-05
+    exponent_float = re.compile(rb'[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)')
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+               if orjson is not None else 0)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact
+                or self.ensure_ascii or self.get_indent(
+                    accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default,
+                                   option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        if self.exponent_float.search(content):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
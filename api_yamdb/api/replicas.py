@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Replica alias for reads of the current request, None reads from
+# primary. Set by api.middleware.ReplicaRoutingMiddleware only, so
+# management commands (models_loader), migrations and signals
+# outside requests always use primary.
+read_replica = ContextVar('read_replica', default=None)
+# Request of a client which wrote recently, see is_sticky().
+sticky_read = ContextVar('sticky_read', default=False)
+
+
+@contextmanager
+def route_reads(replica: Optional[str], sticky: bool = False):
+    """Read from replica (primary when None) inside the block."""
+    replica_token = read_replica.set(replica)
+    sticky_token = sticky_read.set(sticky)
+    try:
+        yield
+    finally:
+        read_replica.reset(replica_token)
+        sticky_read.reset(sticky_token)
+
+
+def is_sticky() -> bool:
+    """Reads are pinned to primary because the client wrote recently,
+    cached responses may have been built from a lagging replica.
+    """
+    return sticky_read.get()
+
+
+class ReplicaRouter:
+    """ Sends reads of DATABASE_REPLICA_APPS models to the replica
+    chosen for the request, everything else to primary.
+
+    Reads return to primary after the first write of the request and
+    inside transactions, e.g. select_for_update().
+    """
+    def db_for_read(self, model, **hints):
+        replica = read_replica.get()
+        if (replica is None
+                or model._meta.app_label not in settings.DATABASE_REPLICA_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        read_replica.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
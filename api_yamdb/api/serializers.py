@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.tokens import default_token_generator
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, connection, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
+from reviews.models import (SCORE_COUNT_FIELDS, Category, Comment, Genre,
+                            ReturningForeignKey, Review, Title)
+from users.confirmation import check_code
 
 User = get_user_model()
 
@@ -22,12 +27,15 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class TitleGetSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only='True', required=False)
+    review_count = serializers.IntegerField(source='rating_count',
+                                            read_only=True)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
 
     class Meta:
         model = Title
-        fields = ('__all__')
+        exclude = ('rating_sum', 'rating_count', 'updated_at',
+                   'search_vector', *SCORE_COUNT_FIELDS)
 
 
 class TitleModifySerializer(serializers.ModelSerializer):
@@ -38,31 +46,102 @@ class TitleModifySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = ('__all__')
+        exclude = ('rating_sum', 'rating_count', 'rating', 'updated_at',
+                   'last_review_at', 'search_vector', *SCORE_COUNT_FIELDS)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleSuggestQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SUGGEST_MAX_LIMIT,
+        default=settings.SUGGEST_DEFAULT_LIMIT)
+
+
+class TitleSuggestSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    year = serializers.IntegerField()
+    rating = serializers.IntegerField()
+
+
+class TitleScoresSerializer(serializers.Serializer):
+    """Output of reviews.ratings.score_summary()."""
+    count = serializers.IntegerField()
+    mean = serializers.FloatField(allow_null=True)
+    median = serializers.FloatField(allow_null=True)
+    distribution = serializers.DictField(child=serializers.IntegerField())
+
+
+class SingleInsertMixin:
+    """ Creates object with one INSERT, related objects are checked by
+    database constraints instead of queries before it.
+
+    Parent foreign keys are saved as subqueries filtering the parent by
+    URL kwargs (see reviews.models.returning_key), a missing parent
+    gives NULL and is reported as 404. Violation of a unique
+    constraint of the model is reported as unique_error. Causes are
+    found by queries after a failed INSERT, so error codes of database
+    backends are not needed.
+    """
+    unique_error = None
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as error:
+            if self.missing_parent(validated_data):
+                raise NotFound from error
+            if self.unique_error and self.duplicate(validated_data):
+                raise ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: [self.unique_error]}
+                ) from error
+            raise
+
+    @staticmethod
+    def get_value(field, validated_data):
+        return validated_data.get(field.name,
+                                  validated_data.get(field.attname))
+
+    def missing_parent(self, validated_data):
+        for field in self.Meta.model._meta.concrete_fields:
+            value = self.get_value(field, validated_data)
+            if isinstance(field, ReturningForeignKey) and (
+                    value is None
+                    or not field.related_model.objects.filter(
+                        pk=value).exists()):
+                return True
+        return False
+
+    def duplicate(self, validated_data):
+        options = self.Meta.model._meta
+        unique_fields = list(options.unique_together) + [
+            constraint.fields
+            for constraint in options.total_unique_constraints]
+        for names in unique_fields:
+            fields = [options.get_field(name) for name in names]
+            lookups = {field.name: self.get_value(field, validated_data)
+                       for field in fields}
+            if None not in lookups.values() and (
+                    self.Meta.model.objects.filter(**lookups).exists()):
+                return True
+        return False
+
+
+class ReviewSerializer(SingleInsertMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
-
-    def validate(self, attrs):
-        title = get_object_or_404(
-            Title, id=self.context['view'].kwargs.get('title_id'))
-        author = self.context['request'].user
-        if self.context['request'].method == 'POST':
-            if Review.objects.filter(
-                    title_id=title, author_id=author).exists():
-                raise serializers.ValidationError(
-                    'You have already left a review for this title!')
-        return attrs
+    unique_error = 'You have already left a review for this title!'
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comment_count', 'last_comment_at')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SingleInsertMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -73,17 +152,33 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
     def validate(self, attrs):
-        get_object_or_404(
-            Review,
-            title_id=self.context['view'].kwargs.get('title_id'),
-            id=self.context['view'].kwargs.get('review_id')
-        )
+        if self.instance is not None:
+            get_object_or_404(
+                Review,
+                title_id=self.context['view'].kwargs.get('title_id'),
+                id=self.context['view'].kwargs.get('review_id')
+            )
         return attrs
 
 
 class UserSerializer(serializers.ModelSerializer):
     """ Serializer to process other users profile management API requests.
+    Case-insensitive uniqueness of username and email is enforced by
+    database indexes on PostgreSQL, violations are reported as
+    validation errors. Other databases are checked with iexact lookups.
     """
+    unique_errors = {
+        'username': 'A user with that username already exists.',
+        'email': 'user with this Email address already exists.',
+    }
+    # see users/migrations/0006_case_insensitive_unique.py
+    unique_constraints = {
+        'users_user_username_key': 'username',
+        'users_user_username_upper_uniq': 'username',
+        'users_user_email_key': 'email',
+        'users_user_email_upper_uniq': 'email',
+    }
+
     class Meta:
         model = User
         fields = (
@@ -94,51 +189,60 @@ class UserSerializer(serializers.ModelSerializer):
             'bio',
             'role'
         )
+        extra_kwargs = {
+            'username': {'validators': [UnicodeUsernameValidator()]},
+            'email': {'validators': []},
+        }
+
+    def validate_unique_iexact(self, field, value):
+        if connection.vendor == 'postgresql':
+            return
+        users = User.objects.filter(**{f'{field}__iexact': value})
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise ValidationError(self.unique_errors[field])
 
     def validate_username(self, value):
         if value.lower() == 'me':
             raise ValidationError(
                 'Username \'me\' is reserved, please choose another one'
             )
-        if User.objects.filter(
-            username__iexact=value
-        ).exists():
-            raise ValidationError(
-                'A user with that username already exists.'
-            )
+        self.validate_unique_iexact('username', value)
         return value
 
     def validate_email(self, value):
-        if User.objects.filter(
-            email__iexact=value
-        ).exists():
-            raise ValidationError(
-                'user with this Email address already exists.'
-            )
+        self.validate_unique_iexact('email', value)
         return value
 
+    def unique_violation_field(self, error):
+        constraint = getattr(
+            getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+        return self.unique_constraints.get(constraint)
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as error:
+            field = self.unique_violation_field(error)
+            if field is None:
+                raise
+            raise ValidationError(
+                {field: [self.unique_errors[field]]}) from error
+
 
 class UserRoleReadOnlySerializer(UserSerializer):
     """ Serializer to process own user profile management API requests.
     Role field change is restricted.
     """
-    class Meta:
-        model = User
-        fields = (
-            'username',
-            'email',
-            'first_name',
-            'last_name',
-            'bio',
-            'role'
-        )
+    class Meta(UserSerializer.Meta):
         read_only_fields = ['role']
 
 
 class AuthSignupSerializer(UserSerializer):
 
-    class Meta:
-        model = User
+    class Meta(UserSerializer.Meta):
         fields = ('username', 'email')
 
 
@@ -148,8 +252,32 @@ class AuthTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
 
     def validate(self, attrs):
-        token = attrs.get('confirmation_code')
-        user = get_object_or_404(User, username=attrs.get('username'))
-        if not default_token_generator.check_token(user, token):
+        user = get_object_or_404(
+            User.objects.select_related('confirmation_code'),
+            username=attrs.get('username'))
+        if not check_code(user, attrs.get('confirmation_code')):
             raise ValidationError('Invalid token')
+        attrs['user'] = user
         return attrs
+
+
+class SlugBulkSerializer(serializers.Serializer):
+    """ Genre or category item of bulk/ requests, matched by slug.
+    Slug uniqueness is not validated, existing objects are updated.
+    """
+    name = serializers.CharField(max_length=256)
+    slug = serializers.SlugField(max_length=50)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """ Title item of bulk/ requests, items with id update titles.
+    Slugs are resolved for all items at once by reviews.bulk.
+    """
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  required=False)
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
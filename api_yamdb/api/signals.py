@@ -0,0 +1,70 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.bulk import bulk_saved
+from reviews.models import Category, Genre, Review, Title, TitleRanking
+from reviews.stamps import stamps_touched
+
+from .caching import bump_versions
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance: Title, **kwargs):
+    bump_versions('titles', f'title:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Title):
+        bump_versions('titles', f'title:{instance.pk}')
+    elif pk_set:
+        bump_versions('titles', *(f'title:{pk}' for pk in pk_set))
+    else:
+        bump_versions('titles', 'catalog')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_title(sender, instance: Review, **kwargs):
+    bump_versions('titles', f'title:{instance.title_id}')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, instance: Genre, **kwargs):
+    bump_versions('genres', 'catalog')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance: Category, **kwargs):
+    bump_versions('categories', 'catalog')
+
+
+@receiver(bulk_saved, sender=Title)
+def invalidate_bulk_saved_titles(sender, **kwargs):
+    # one counter instead of a counter per title for large batches
+    bump_versions('titles', 'catalog')
+
+
+@receiver(bulk_saved, sender=Genre)
+def invalidate_bulk_saved_genres(sender, **kwargs):
+    bump_versions('genres', 'catalog')
+
+
+@receiver(bulk_saved, sender=Category)
+def invalidate_bulk_saved_categories(sender, **kwargs):
+    bump_versions('categories', 'catalog')
+
+
+@receiver(bulk_saved, sender=TitleRanking)
+def invalidate_rankings(sender, **kwargs):
+    bump_versions('rankings')
+
+
+@receiver(stamps_touched)
+def invalidate_everything(sender, **kwargs):
+    # loads, purges and rebuilds of management commands
+    bump_versions('titles', 'catalog', 'genres', 'categories', 'rankings')
@@ -0,0 +1,96 @@
+import hashlib
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """ Token bucket limit of view `throttle_scope`, rates are configured
+        in DEFAULT_THROTTLE_RATES as '<scope>.<key_name>': 'N/period'.
+
+    Bucket holds up to N tokens and is refilled with N tokens per period,
+    so short bursts are allowed while the average rate is limited.
+    Buckets are stored in THROTTLE_CACHE_ALIAS cache shared by workers.
+    Read and write of a bucket are not atomic, concurrent requests may
+    occasionally get one extra token.
+    """
+    key_name = None
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # rate depends on the view, it is read in allow_request
+        self.wait_seconds = None
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_ident_value(self, request) -> Optional[str]:
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_cache_key(self, request, view):
+        value = self.get_ident_value(request)
+        if not value:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.md5(value.encode()).hexdigest(),
+        }
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        self.scope = f'{scope}.{self.key_name}'
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill_rate = self.num_requests / self.duration
+        now = time.time()
+        tokens, updated_at = self.cache.get(
+            self.key, (self.num_requests, now))
+        tokens = min(self.num_requests,
+                     tokens + (now - updated_at) * refill_rate)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill_rate
+            return False
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    key_name = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class RequestDataThrottle(TokenBucketThrottle):
+    """Bucket per value of request data field, compared case-insensitive."""
+    def get_ident_value(self, request):
+        if not hasattr(request.data, 'get'):
+            return None
+        value = request.data.get(self.key_name)
+        if not isinstance(value, str):
+            return None
+        return value.strip().lower()
+
+
+class UsernameThrottle(RequestDataThrottle):
+    key_name = 'username'
+
+
+class EmailThrottle(RequestDataThrottle):
+    key_name = 'email'
@@ -1,6 +1,7 @@
 from api.views import (AuthViewSet, CategoryViewSet, CommentViewSet,
-                       GenreViewSet, ReviewViewSet, TitleViewSet, UserViewSet)
-from django.urls import include, path
+                       ExportView, GenreViewSet, ReviewViewSet, TitleViewSet,
+                       UserViewSet)
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 router_api_v1 = DefaultRouter()
@@ -17,5 +18,7 @@ router_api_v1.register(
     CommentViewSet, basename='comments')
 
 urlpatterns = [
+    re_path(r'^v1/export/(?P<resource>\w+)\.(?P<extension>csv|ndjson)$',
+            ExportView.as_view(), name='export'),
     path('v1/', include(router_api_v1.urls)),
 ]
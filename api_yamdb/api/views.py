@@ -2,27 +2,50 @@ from api.permissions import IsAdmin, IsAuthor, IsModerator, IsUser, ReadOnly
 from api.serializers import (AuthSignupSerializer, AuthTokenSerializer,
                              CategorySerializer, CommentSerializer,
                              GenreSerializer, ReviewSerializer,
+                             SlugBulkSerializer, TitleBulkSerializer,
                              TitleGetSerializer, TitleModifySerializer,
+                             TitleScoresSerializer,
+                             TitleSuggestQuerySerializer,
+                             TitleSuggestSerializer,
                              UserRoleReadOnlySerializer, UserSerializer)
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
+from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.bulk import upsert_by_slug, upsert_titles
+from reviews.export import EXPORT_FORMATS, EXPORT_RESOURCES, export_chunks
+from reviews.models import (SCORE_COUNT_FIELDS, Category, Comment, Genre,
+                            Review, Title, returning_key)
+from reviews.ratings import score_summary
+from reviews.stamps import get_stamp
+from reviews.suggest import title_suggest_index
+from users.confirmation import has_valid_code, issue_code
+from users.outbox import queue_email
 
+from .authentication import RoleAccessToken, author_instance
+from .bulk import BulkUpsertMixin
+from .caching import CachedListMixin, CachedRetrieveMixin
+from .compact import (CommentCompactSerializer, CompactListMixin,
+                      ReviewCompactSerializer, TitleCompactSerializer,
+                      TopTitleCompactSerializer,
+                      TrendingTitleCompactSerializer)
+from .conditional import ConditionalGetMixin
 from .filters import TitleFilter
+from .pagination import OptionalKeysetPagination
+from .throttling import EmailThrottle, IPThrottle, UsernameThrottle
 
 User = get_user_model()
 
@@ -45,7 +68,7 @@ class UserViewSet(ModelViewSet):
     def me(self, request):
         """ Function to process API requests with users/me/ URI.
         """
-        self.kwargs['username'] = request.user
+        self.kwargs['username'] = request.user.username
         if request.method == "GET":
             return self.retrieve(request)
         return self.partial_update(request)
@@ -55,23 +78,37 @@ class AuthViewSet(GenericViewSet):
     queryset = User.objects.all()
     serializer_class = AuthSignupSerializer
     permission_classes = [AllowAny]
+    # throttles reject requests before any database query is made
+    authentication_classes = ()
+    throttle_classes = (IPThrottle, UsernameThrottle, EmailThrottle)
+    throttle_scope = None
 
     def send_confirmation_code(self, user):
-        """Function to generate token and send it to user via registered email.
+        """Function to generate code and queue email with it to user,
+        emails are sent by drain_outbox command.
         """
-        confirmation_code = default_token_generator.make_token(user)
-        email_text = (
-            f'To confirm user {user} registration '
-            f'please use {confirmation_code} code.'
-        )
-        user.email_user(
-            settings.REGISTRATION_EMAIL_SUBJECT,
-            email_text,
-            settings.REGISTRATION_EMAIL_FROM,
-            fail_silently=False,
-        )
-
-    @action(["post"], detail=False)
+        with transaction.atomic():
+            # sent code which was used up, expired or blocked by failed
+            # attempts is replaced and emailed again
+            sent_code_valid = has_valid_code(user)
+            confirmation_code = issue_code(user)
+            email_text = (
+                f'To confirm user {user} registration '
+                f'please use {confirmation_code} code.'
+            )
+            message = queue_email(
+                user,
+                settings.REGISTRATION_EMAIL_SUBJECT,
+                email_text,
+                settings.REGISTRATION_EMAIL_FROM,
+                resend=not sent_code_valid,
+            )
+            if message.sent_at is not None:
+                # email with previous code was just sent and is not
+                # repeated, so previous code has to keep working
+                transaction.set_rollback(True)
+
+    @action(["post"], detail=False, throttle_scope='signup')
     def signup(self, request):
         """ Function to process API requests with auth/signup/ URI.
         """
@@ -94,31 +131,42 @@ class AuthViewSet(GenericViewSet):
         self.send_confirmation_code(user)
         return Response(request.data, status=status.HTTP_200_OK)
 
-    @action(["post"], detail=False)
+    @action(["post"], detail=False, throttle_scope='token')
     def token(self, request):
         """Function to process API requests with auth/token/
         """
         serializer = AuthTokenSerializer(data=request.data)
         if serializer.is_valid():
-            user = get_object_or_404(
-                User, username=serializer.validated_data.get('username'))
-            tokens = RefreshToken.for_user(user)
+            token = RoleAccessToken.for_user(
+                serializer.validated_data['user'])
             return Response(
-                data={'token': str(tokens.access_token)},
+                data={'token': str(token)},
                 status=status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(ConditionalGetMixin,
+                   CachedListMixin,
+                   CachedRetrieveMixin,
+                   BulkUpsertMixin,
+                   CompactListMixin,
+                   ModelViewSet):
     queryset = (Title.
                 objects.
-                prefetch_related('genre').
+                prefetch_related(
+                    Prefetch('genre', queryset=Genre.objects.order_by('id'))).
                 select_related('category').
-                annotate(rating=Avg('reviews__score')).
                 order_by('id')
                 )
     permission_classes = [ReadOnly | IsAdmin | IsAdminUser]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('id',)
+    cache_list_versions = ('titles', 'catalog')
+    cache_detail_versions = ('title:{pk}', 'catalog')
+    cache_ranking_versions = ('titles', 'rankings', 'catalog')
+    conditional_list_key = 'titles'
+    conditional_etag = False
 
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
@@ -129,12 +177,79 @@ class TitleViewSet(ModelViewSet):
         'create': TitleModifySerializer,
         'update': TitleModifySerializer,
         'partial_update': TitleModifySerializer,
-        'destroy': TitleModifySerializer
+        'destroy': TitleModifySerializer,
+        'suggest': TitleSuggestSerializer,
+        'scores': TitleScoresSerializer,
+        'top': TitleGetSerializer,
+        'trending': TitleGetSerializer,
+        'bulk': TitleBulkSerializer,
     }
+    bulk_serializer_class = TitleBulkSerializer
+    compact_serializer_class = TitleCompactSerializer
 
     def get_serializer_class(self):
         return self.action_serializers.get(self.action)
 
+    def get_list_validators(self):
+        # 'titles' stamp moves when the collection changes, review
+        # writes only move updated_at of their titles (ratings)
+        return get_stamp(self.conditional_list_key, Title.objects.all())
+
+    def bulk_upsert(self, items):
+        return upsert_titles(items)
+
+    @action(["get"], detail=False)
+    def suggest(self, request):
+        """ Function to process API requests with titles/suggest/ URI.
+            Served from in-memory prefix index without database queries.
+        """
+        query = TitleSuggestQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        suggestions = title_suggest_index.suggest(
+            query.validated_data['q'], query.validated_data['limit'])
+        serializer = self.get_serializer(suggestions, many=True)
+        return Response(serializer.data)
+
+    @action(["get"], detail=False)
+    def top(self, request):
+        """ Function to process API requests with titles/top/ URI.
+            Titles by weighted rating from reviews.rankings.
+        """
+        return self.cached_response(request, self.cache_ranking_versions,
+                                    self.ranked_list, 'weighted_rating',
+                                    TopTitleCompactSerializer())
+
+    @action(["get"], detail=False)
+    def trending(self, request):
+        """ Function to process API requests with titles/trending/ URI.
+            Titles by recent reviews from reviews.rankings.
+        """
+        return self.cached_response(request, self.cache_ranking_versions,
+                                    self.ranked_list, 'trending',
+                                    TrendingTitleCompactSerializer())
+
+    def ranked_list(self, request, field, serializer):
+        self.keyset_ordering = (f'-ranking__{field}', 'id')
+        self.queryset = (self.queryset
+                         .filter(ranking__isnull=False)
+                         .order_by(*self.keyset_ordering))
+        return self.compact_list(request, serializer)
+
+    @action(["get"], detail=True)
+    def scores(self, request, pk=None):
+        """ Function to process API requests with titles/{id}/scores/ URI.
+            Served from stored score histogram of the title.
+        """
+        return self.cached_response(request, self.cache_detail_versions,
+                                    self.get_scores)
+
+    def get_scores(self, request):
+        histogram = get_object_or_404(
+            Title.objects.values_list(*SCORE_COUNT_FIELDS),
+            pk=self.kwargs['pk'])
+        serializer = self.get_serializer(score_summary(histogram))
+        return Response(serializer.data)
+
 
 class ListCreateDestroyViewSet(GenericViewSet,
                                ListModelMixin,
@@ -147,45 +262,97 @@ class ListCreateDestroyViewSet(GenericViewSet,
     pass
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin,
+                   BulkUpsertMixin,
+                   ListCreateDestroyViewSet):
     serializer_class = GenreSerializer
+    bulk_serializer_class = SlugBulkSerializer
+    cache_list_versions = ('genres',)
     permission_classes = [ReadOnly | IsAdmin | IsAdminUser]
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
     queryset = Genre.objects.all().order_by('id')
 
+    def bulk_upsert(self, items):
+        return upsert_by_slug(Genre, items)
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+
+class CategoryViewSet(CachedListMixin,
+                      BulkUpsertMixin,
+                      ListCreateDestroyViewSet):
     serializer_class = CategorySerializer
+    bulk_serializer_class = SlugBulkSerializer
+    cache_list_versions = ('categories',)
     permission_classes = [ReadOnly | IsAdmin | IsAdminUser]
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
     queryset = Category.objects.all().order_by('id')
 
+    def bulk_upsert(self, items):
+        return upsert_by_slug(Category, items)
+
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, CompactListMixin, ModelViewSet):
     serializer_class = ReviewSerializer
+    compact_serializer_class = ReviewCompactSerializer
     permission_classes = [IsUser & IsAuthor | IsModerator | IsAdmin | ReadOnly]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    conditional_list_key = 'reviews:{title_id}'
 
     def get_queryset(self):
         title_id = self.kwargs.get('title_id')
-        return Review.objects.filter(title_id=title_id).order_by('pub_date')
+        return (Review.objects
+                .filter(title_id=title_id)
+                .select_related('author')
+                .order_by(*self.keyset_ordering))
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
-        serializer.save(author=self.request.user, title_id=title_id)
+        serializer.save(author=author_instance(self.request.user),
+                        title_id=returning_key(
+                            Title.objects.filter(id=title_id)))
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, CompactListMixin, ModelViewSet):
     serializer_class = CommentSerializer
+    compact_serializer_class = CommentCompactSerializer
     permission_classes = [IsUser & IsAuthor | IsModerator | IsAdmin | ReadOnly]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    conditional_list_key = 'comments:{review_id}'
 
     def get_queryset(self):
         review_id = self.kwargs.get('review_id')
-        return Comment.objects.filter(review_id=review_id).order_by('pub_date')
+        return (Comment.objects
+                .filter(review_id=review_id)
+                .select_related('author')
+                .order_by(*self.keyset_ordering))
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        serializer.save(author=self.request.user, review_id=review_id)
+        serializer.save(author=author_instance(self.request.user),
+                        review_id=returning_key(Review.objects.filter(
+                            id=self.kwargs.get('review_id'),
+                            title_id=self.kwargs.get('title_id'))))
+
+
+class ExportView(APIView):
+    permission_classes = [IsAdmin | IsAdminUser]
+
+    def get(self, request, resource, extension):
+        """ Function to process API requests with export/<resource>.<format>
+            URI. Rows are streamed from server-side cursor, csv files can
+            be loaded back with models_loader command.
+        """
+        if resource not in EXPORT_RESOURCES:
+            raise Http404
+        content_type, _ = EXPORT_FORMATS[extension]
+        response = StreamingHttpResponse(
+            export_chunks(EXPORT_RESOURCES[resource], extension,
+                          settings.EXPORT_CHUNK_SIZE),
+            content_type=f'{content_type}; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{resource}.{extension}"')
+        return response
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -31,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryCountMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,6 +78,51 @@ DATABASES = {
     }
 }
 
+# Read replicas, see api/replicas.py. DB_REPLICA_HOSTS is a comma separated
+# list of host[:port] using name and credentials of default database.
+# Safe method requests read models of DATABASE_REPLICA_APPS from a replica,
+# a client reads from primary for REPLICA_STICKY_SECONDS after its write.
+# Sticky flags of clients must be seen by all workers, they are kept in
+# the shared rate limits cache.
+
+for number, address in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(','))):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_APPS = ['reviews']
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+REPLICA_STICKY_CACHE_ALIAS = 'throttle'
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    },
+    # API responses version counters, must not be culled with responses
+    # and must be shared by workers and management commands (memcached)
+    'versions': {
+        'BACKEND': os.getenv('VERSION_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('VERSION_CACHE_LOCATION', default='yamdb-versions'),
+        'OPTIONS': {'MAX_ENTRIES': 10000000},
+    },
+    # rate limits buckets and replica sticky flags, must be shared by all
+    # workers (memcached), process memory is enough for a single worker
+    'throttle': {
+        'BACKEND': os.getenv('THROTTLE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default='yamdb-throttle'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,18 +173,107 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # orjson is used when installed, output matches stdlib json,
+    # see api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # number of proxies (nginx) whose X-Forwarded-For is trusted to find
+    # client address, 0 uses the connection address
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
+    # token bucket rates of auth endpoints, see api/throttling.py
+    'DEFAULT_THROTTLE_RATES': {
+        'signup.ip': os.getenv('SIGNUP_IP_RATE', default='20/hour'),
+        'signup.username': '5/hour',
+        'signup.email': '5/hour',
+        'token.ip': os.getenv('TOKEN_IP_RATE', default='60/hour'),
+        'token.username': '10/hour',
+    },
 }
 
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Read-only API responses cache, see api/caching.py.
+# LocMemCache is per process, use file based or shared cache backend
+# when running several gunicorn workers. Version counters of cached
+# responses are kept in a separate cache, so culling of responses
+# doesn't reset them.
+
+API_CACHE_ALIAS = 'default'
+API_VERSION_CACHE_ALIAS = 'versions'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', default=0))
+
+# Objects accepted by one bulk/ request, see api/bulk.py.
+
+BULK_MAX_ITEMS = 10000
+
+# Rows fetched at once by export/ endpoint and export_data command,
+# see reviews/export.py.
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Server-Timing header with number and duration of SQL queries,
+# see api/middleware.py.
+
+QUERY_TIMING_HEADERS = os.getenv('QUERY_TIMING_HEADERS', default='0') == '1'
+
+# Titles autocomplete index, see reviews/suggest.py.
+# Index is loaded by every worker at startup and checks for changes
+# made by other workers once in SUGGEST_SYNC_INTERVAL seconds.
+
+SUGGEST_PRELOAD = os.getenv('SUGGEST_PRELOAD', default='1') == '1'
+SUGGEST_SYNC_INTERVAL = int(os.getenv('SUGGEST_SYNC_INTERVAL', default=30))
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+# Leaderboards of titles/top/ and titles/trending/, see reviews/rankings.py.
+# Weighted rating counts RANKING_PRIOR_REVIEWS more reviews with the mean
+# score of all reviews for every title, trending weight of a review halves
+# every TRENDING_HALF_LIFE_HOURS.
+
+RANKING_PRIOR_REVIEWS = 10
+TRENDING_HALF_LIFE_HOURS = 72
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'api.authentication.RoleTokenUser',
 }
 
+# Users with changed role or removed after their access token was issued,
+# see users/revocations.py. Changes made by other workers are read from
+# database once in REVOKED_USERS_SYNC_INTERVAL seconds.
+
+REVOKED_USERS_MAX_SIZE = 10000
+REVOKED_USERS_SYNC_INTERVAL = int(
+    os.getenv('REVOKED_USERS_SYNC_INTERVAL', default=10))
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 REGISTRATION_EMAIL_SUBJECT = 'YAMDB registration.'
 REGISTRATION_EMAIL_FROM = 'team15@yamdb.fake'
+
+# One-time confirmation codes, see users/confirmation.py
+
+CONFIRMATION_CODE_LENGTH = 6
+CONFIRMATION_CODE_TTL = timedelta(hours=1)
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
+# Emails outbox, see users/outbox.py
+
+OUTBOX_DEDUPE_WINDOW = timedelta(minutes=10)
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_MAX_ATTEMPTS = 8
+# message being sent is skipped by other workers, retried after it
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=5)
@@ -5,7 +5,7 @@ from .models import Category, Comment, Genre, Review, Title
 
 class TitleAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'name', 'description',
-                    'category', 'get_genres')
+                    'category', 'get_genres', 'rating')
     empty_value_display = '-пусто-'
 
     def get_genres(self, title: Title):
@@ -0,0 +1,202 @@
+from typing import Dict, List, Optional, Sequence, Type, Union
+
+from django.db import connection, models, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Category, Genre, Title
+
+BATCH_SIZE = 1000
+TITLE_FIELDS = ('name', 'year', 'description')
+
+# Sent after rows were created or updated by bulk queries, which send no
+# model signals, with `pks` of all saved rows.
+bulk_saved = Signal()
+
+Result = Dict[str, Union[str, int, dict]]
+
+
+def created(pk: int) -> Result:
+    return {'status': 'created', 'id': pk}
+
+
+def updated(pk: int) -> Result:
+    return {'status': 'updated', 'id': pk}
+
+
+def failed(**errors: List[str]) -> Result:
+    return {'status': 'error', 'errors': errors}
+
+
+def update_rows(model: Type[models.Model], objs: List[models.Model],
+                fields: Sequence[str]):
+    """Write given fields of many objects.
+
+    On PostgreSQL rows are updated from a VALUES list joined by primary
+    key, bulk_update() builds CASE expressions per field, which gets
+    slow for thousands of rows.
+    """
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_update(objs, fields, batch_size=BATCH_SIZE)
+        return
+    quote = connection.ops.quote_name
+    meta = model._meta
+    columns = [meta.pk] + [meta.get_field(name) for name in fields]
+    names = ', '.join(quote(column.column) for column in columns)
+    assignments = ', '.join(
+        f'{quote(column.column)} = v.{quote(column.column)}'
+        for column in columns[1:])
+    row = '({})'.format(', '.join(
+        f'%s::{column.cast_db_type(connection)}' for column in columns))
+    pk = quote(meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), BATCH_SIZE):
+            batch = objs[start:start + BATCH_SIZE]
+            cursor.execute(
+                f'UPDATE {quote(meta.db_table)} SET {assignments} '
+                f'FROM (VALUES {", ".join([row] * len(batch))}) '
+                f'AS v ({names}) '
+                f'WHERE {quote(meta.db_table)}.{pk} = v.{pk}',
+                [column.get_db_prep_save(getattr(obj, column.attname),
+                                         connection)
+                 for obj in batch for column in columns])
+
+
+def create_rows(model: Type[models.Model], objs: List[models.Model]):
+    """bulk_create() which sets primary keys of created objects.
+
+    SQLite can't return rows from bulk INSERT, but it has a single
+    writer, so rows inserted in the transaction get consecutive ids
+    ending with the largest one.
+    """
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    if not objs or connection.features.can_return_rows_from_bulk_insert:
+        return
+    last = model.objects.aggregate(last=models.Max('pk'))['last']
+    for pk, obj in enumerate(objs, last - len(objs) + 1):
+        obj.pk = pk
+
+
+def upsert_by_slug(model: Type[models.Model],
+                   items: List[dict]) -> List[Result]:
+    """Create or rename genres or categories found by slug.
+
+    Items are validated dicts with name and slug, results are returned
+    in the same order. Repeated slug is saved once, with the last name.
+    """
+    names = {item['slug']: item['name'] for item in items}
+    with transaction.atomic():
+        existing = model.objects.select_for_update().in_bulk(
+            list(names), field_name='slug')
+        new = [model(slug=slug, name=name) for slug, name in names.items()
+               if slug not in existing]
+        create_rows(model, new)
+        changed = [obj for slug, obj in existing.items()
+                   if obj.name != names[slug]]
+        for obj in changed:
+            obj.name = names[obj.slug]
+        update_rows(model, changed, ['name'])
+        saved = new + changed
+        if saved:
+            bulk_saved.send(sender=model, pks=[obj.pk for obj in saved])
+    new_slugs = {obj.slug: obj.pk for obj in new}
+    return [created(new_slugs[item['slug']]) if item['slug'] in new_slugs
+            else updated(existing[item['slug']].pk)
+            for item in items]
+
+
+def missing_objects(item: dict, genres: dict, categories: dict,
+                    titles: dict) -> Optional[Result]:
+    """Error result of title item referring to missing objects."""
+    missing_genres = sorted(set(item.get('genre', ())) - set(genres))
+    if missing_genres:
+        return failed(genre=[f'Genre {slug} does not exist'
+                             for slug in missing_genres])
+    if 'category' in item and item['category'] not in categories:
+        return failed(
+            category=[f'Category {item["category"]} does not exist'])
+    if 'id' in item and item['id'] not in titles:
+        return failed(id=[f'Title {item["id"]} does not exist'])
+    return None
+
+
+def fill_title(title: Title, item: dict, categories: dict):
+    for field in TITLE_FIELDS:
+        if field in item:
+            setattr(title, field, item[field])
+    if 'category' in item:
+        title.category = categories[item['category']]
+
+
+def set_title_genres(title_genres: Dict[int, List[int]], replaced):
+    """Write genre relations of many titles with batched inserts,
+    previous relations are removed for titles in `replaced`.
+    """
+    through = Title.genre.through
+    through.objects.filter(title_id__in=[
+        pk for pk in title_genres if pk in replaced]).delete()
+    through.objects.bulk_create(
+        [through(title_id=title_id, genre_id=genre_id)
+         for title_id, genre_ids in title_genres.items()
+         for genre_id in set(genre_ids)],
+        batch_size=BATCH_SIZE)
+
+
+def upsert_titles(items: List[dict]) -> List[Result]:
+    """Create titles, or update them when item has id.
+
+    Items are validated dicts of title fields with genre and category
+    given by slugs. Slugs and ids of all items are resolved with one
+    query per model, rows are written in batches. Updates change only
+    fields present in item, genre list replaces title genres.
+    Results are returned in the same order, items referring to missing
+    objects are reported and skipped.
+    """
+    genre_slugs = {slug for item in items for slug in item.get('genre', ())}
+    category_slugs = {item['category'] for item in items
+                      if 'category' in item}
+    title_ids = {item['id'] for item in items if 'id' in item}
+    now = timezone.now()
+    with transaction.atomic():
+        genres = Genre.objects.in_bulk(genre_slugs, field_name='slug')
+        categories = Category.objects.in_bulk(category_slugs,
+                                              field_name='slug')
+        titles = (Title.objects.select_for_update()
+                  .defer('search_vector').in_bulk(title_ids))
+
+        results = [None] * len(items)
+        new, changed, relinked = [], {}, {}
+        for position, item in enumerate(items):
+            results[position] = missing_objects(item, genres, categories,
+                                                titles)
+            if results[position] is not None:
+                continue
+
+            title = titles[item['id']] if 'id' in item else Title()
+            fill_title(title, item, categories)
+            title.updated_at = now
+            if title.pk is None:
+                new.append((position, title))
+            else:
+                changed[title.pk] = title
+            if 'genre' in item:
+                relinked[position] = [genres[slug].pk
+                                      for slug in item['genre']]
+
+        create_rows(Title, [title for _, title in new])
+        update_rows(Title, list(changed.values()),
+                    TITLE_FIELDS + ('category', 'updated_at'))
+        for position, title in new:
+            results[position] = created(title.pk)
+        for position, item in enumerate(items):
+            if results[position] is None:
+                results[position] = updated(item['id'])
+
+        set_title_genres({results[position]['id']: genre_ids
+                          for position, genre_ids in relinked.items()},
+                         replaced=changed)
+
+        saved = [title.pk for _, title in new] + list(changed)
+        if saved:
+            bulk_saved.send(sender=Title, pks=saved)
+    return results
@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Optional
+
+from django.db import connection
+from django.db.models import (Count, DateTimeField, F, Max, OuterRef, Q,
+                              Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import Comment, Review, Title
+
+# Review counters of titles are rating_count (every review has a score)
+# and last_review_at, kept by ratings.apply_score_change() updates.
+
+
+def later_date(field: str, pub_date: datetime):
+    """Field value moved forward to pub_date, NULL is replaced."""
+    value = Value(pub_date, output_field=DateTimeField())
+    return Coalesce(Greatest(F(field), value), value)
+
+
+def later_review_date(pub_date: datetime):
+    """last_review_at after a review is published."""
+    return later_date('last_review_at', pub_date)
+
+
+def latest_review_date(title_id: int):
+    """last_review_at after a review of the title is removed."""
+    return Subquery(Review.objects
+                    .filter(title_id=title_id)
+                    .order_by('-pub_date')
+                    .values('pub_date')[:1])
+
+
+def apply_comment_change(review_id: int, count_delta: int,
+                         pub_date: Optional[datetime] = None
+                         ) -> Optional[int]:
+    """Shift comment counters of review in a single UPDATE statement.
+
+    last_comment_at moves forward to pub_date of a new comment, and is
+    recalculated when pub_date is not given (comment was removed).
+    Returns title id of the review, None if review does not exist.
+    On PostgreSQL it is read with UPDATE ... RETURNING.
+    """
+    if connection.vendor != 'postgresql':
+        Review.objects.filter(pk=review_id).update(
+            comment_count=F('comment_count') + count_delta,
+            last_comment_at=(later_date('last_comment_at', pub_date)
+                             if pub_date is not None
+                             else actual_review_counters()[
+                                 'last_comment_at']),
+            updated_at=Now())
+        return (Review.objects.filter(pk=review_id)
+                .values_list('title_id', flat=True).first())
+    quote = connection.ops.quote_name
+    comments = quote(Comment._meta.db_table)
+    if pub_date is None:
+        last_comment_at = (f'(SELECT MAX(pub_date) FROM {comments} '
+                           f'WHERE review_id = %s)')
+        params = [count_delta, review_id, review_id]
+    else:
+        last_comment_at = 'GREATEST(last_comment_at, %s)'
+        params = [count_delta, pub_date, review_id]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(Review._meta.db_table)} '
+            f'SET comment_count = comment_count + %s, '
+            f'last_comment_at = {last_comment_at}, '
+            f'updated_at = STATEMENT_TIMESTAMP() '
+            f'WHERE id = %s RETURNING title_id',
+            params)
+        row = cursor.fetchone()
+    return row and row[0]
+
+
+def actual_title_counters():
+    return {'last_review_at': Subquery(
+        Review.objects
+        .filter(title=OuterRef('pk'))
+        .order_by('-pub_date')
+        .values('pub_date')[:1])}
+
+
+def actual_review_counters():
+    comments = (Comment.objects
+                .filter(review=OuterRef('pk'))
+                .order_by()
+                .values('review'))
+    return {
+        'comment_count': Coalesce(
+            Subquery(comments.annotate(value=Count('pk')).values('value')),
+            0),
+        'last_comment_at': Subquery(
+            comments.annotate(value=Max('pub_date')).values('value')),
+    }
+
+
+def rebuild_title_counters(queryset=None):
+    """Recalculate last review dates, returns number of updated titles."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(**actual_title_counters())
+
+
+def rebuild_review_counters(queryset=None):
+    """Recalculate comment counters, returns number of updated reviews."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.update(**actual_review_counters())
+
+
+def differs(field: str, actual: str) -> Q:
+    """Stored value is not equal to actual one, NULLs included and
+    two NULLs taken as equal. Comparison is made for non-NULL values
+    only, negated `=` is true for NULL columns.
+    """
+    return ((Q(**{f'{field}__isnull': False}, **{f'{actual}__isnull': False})
+             & ~Q(**{field: F(actual)}))
+            | Q(**{f'{field}__isnull': True}, **{f'{actual}__isnull': False})
+            | Q(**{f'{field}__isnull': False}, **{f'{actual}__isnull': True}))
+
+
+def find_title_counter_drift(queryset=None):
+    """Titles whose last review date doesn't match their reviews."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return (queryset
+            .annotate(actual_last_review_at=actual_title_counters()[
+                'last_review_at'])
+            .filter(differs('last_review_at', 'actual_last_review_at'))
+            .order_by('id'))
+
+
+def find_review_counter_drift(queryset=None):
+    """Reviews whose comment counters don't match their comments."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    expressions = actual_review_counters()
+    return (queryset
+            .annotate(actual_comment_count=expressions['comment_count'],
+                      actual_last_comment_at=expressions['last_comment_at'])
+            .filter(differs('comment_count', 'actual_comment_count')
+                    | differs('last_comment_at', 'actual_last_comment_at'))
+            .order_by('id'))
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.base import ModelBase
+
+from .models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+
+class ExportResource(NamedTuple):
+    """Model rows exported with columns of models_loader csv file."""
+    model: ModelBase
+    fields: Tuple[str, ...]
+
+    def rows(self, chunk_size: int) -> Iterator[tuple]:
+        """Rows in primary key order, read with server-side cursor."""
+        return (self.model.objects
+                .order_by('pk')
+                .values_list(*self.fields)
+                .iterator(chunk_size=chunk_size))
+
+    def related_columns(self, rows: List[tuple]) -> Dict[str, Dict]:
+        """NDJSON columns added to rows: name -> {id: value}. Genres of
+        titles are read with one query per chunk, rows come in id order.
+        """
+        if self.model is not Title or not rows:
+            return {}
+        genres = {row[0]: [] for row in rows}
+        links = (Title.genre.through.objects
+                 .filter(title__gte=rows[0][0], title__lte=rows[-1][0])
+                 .order_by('title', 'genre')
+                 .values_list('title', 'genre'))
+        for title_id, genre_id in links:
+            if title_id in genres:
+                genres[title_id].append(genre_id)
+        return {'genres': genres}
+
+
+# Names match csv files of models_loader, in creation order.
+# Password hashes are not exported, loaded users get unusable passwords.
+EXPORT_RESOURCES = {
+    'users': ExportResource(User, ('id', 'username', 'email', 'role', 'bio',
+                                   'first_name', 'last_name')),
+    'category': ExportResource(Category, ('id', 'name', 'slug')),
+    'genre': ExportResource(Genre, ('id', 'name', 'slug')),
+    'titles': ExportResource(Title, ('id', 'name', 'year', 'description',
+                                     'category', 'rating_sum',
+                                     'rating_count', 'rating')),
+    'genre_title': ExportResource(Title.genre.through,
+                                  ('id', 'title', 'genre')),
+    'review': ExportResource(Review, ('id', 'title', 'text', 'author',
+                                      'score', 'pub_date')),
+    'comments': ExportResource(Comment, ('id', 'review', 'text', 'author',
+                                         'pub_date')),
+}
+
+
+def chunked(lines: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """Join lines into chunks, so output is written in large blocks."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def csv_lines(resource: ExportResource, chunk_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in chain([resource.fields], resource.rows(chunk_size)):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """Keeps microseconds of dates, which DjangoJSONEncoder drops,
+    so models_loader loads them back unchanged.
+    """
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def ndjson_lines(resource: ExportResource,
+                 chunk_size: int) -> Iterator[str]:
+    rows = resource.rows(chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        related = resource.related_columns(chunk)
+        for row in chunk:
+            item = dict(zip(resource.fields, row))
+            for name, values in related.items():
+                item[name] = values[row[0]]
+            yield json.dumps(item, cls=ExportJSONEncoder,
+                             ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', csv_lines),
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+}
+
+
+def export_chunks(resource: ExportResource, output_format: str,
+                  chunk_size: int) -> Iterator[str]:
+    """Exported text in chunks of chunk_size rows, memory use does not
+    depend on number of rows.
+    """
+    _, lines = EXPORT_FORMATS[output_format]
+    return chunked(lines(resource, chunk_size), chunk_size)
@@ -0,0 +1,125 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Set
+
+from django.apps import apps
+from django.db import connections
+
+from ._private import LoadStats, ModelLoader, split_file
+
+
+def load_part(loader: ModelLoader,
+              model_label: str,
+              file_location: str,
+              start: int,
+              end: int) -> int:
+    """Worker task, runs in a separate process with its own
+    database connection.
+    """
+    return loader.load_file(apps.get_model(model_label),
+                            file_location, start, end)
+
+
+def finish_loader(loader: ModelLoader) -> int:
+    loader.after_load()
+    return 0
+
+
+def build_dependencies(loaders: Dict[str, ModelLoader],
+                       order: List[str]) -> Dict[str, Set[str]]:
+    """Loader names each loader waits for. A loader depends on loaders
+    of models referenced by its foreign keys, which have to go earlier
+    in creation order.
+    """
+    owners = {loaders[name].model_class: name for name in order}
+    dependencies = {}
+    for position, name in enumerate(order):
+        dependencies[name] = {owners[model]
+                              for model in loaders[name].get_dependencies()
+                              if model in owners}
+        later = dependencies[name] - set(order[:position])
+        if later:
+            raise ValueError(
+                f'{name} depends on {", ".join(sorted(later))}, '
+                'which are loaded later')
+    return dependencies
+
+
+class LoaderRun:
+    """Progress of one loader: stages are loaded one after another,
+    every stage is split into byte ranges loaded concurrently.
+    """
+    def __init__(self, loader: ModelLoader) -> None:
+        self.loader = loader
+        self.stages = list(loader.get_stages())
+        self.started = None
+        self.elapsed = 0
+        self.rows_count = 0
+        self.pending = 0
+
+
+class ParallelLoader:
+    def __init__(self,
+                 loaders: Dict[str, ModelLoader],
+                 order: List[str],
+                 jobs: int) -> None:
+        self.dependencies = build_dependencies(loaders, order)
+        self.runs = {name: LoaderRun(loaders[name]) for name in order}
+        self.jobs = jobs
+        self.finished: Set[str] = set()
+        self.futures = {}
+
+    def submit_next_stage(self, pool: ProcessPoolExecutor, name: str):
+        run = self.runs[name]
+        if not run.stages:
+            self.futures[pool.submit(finish_loader, run.loader)] = name
+            return
+        model_class, file_location = run.stages.pop(0)
+        for start, end in split_file(file_location, self.jobs):
+            future = pool.submit(load_part, run.loader,
+                                 model_class._meta.label,
+                                 file_location, start, end)
+            self.futures[future] = name
+            run.pending += 1
+        if not run.pending:
+            self.submit_next_stage(pool, name)
+
+    def start_ready(self, pool: ProcessPoolExecutor):
+        for name, run in self.runs.items():
+            if run.started is None and self.dependencies[name] <= (
+                    self.finished):
+                run.started = time.monotonic()
+                self.submit_next_stage(pool, name)
+
+    def complete(self, pool: ProcessPoolExecutor, name: str, rows_count):
+        run = self.runs[name]
+        if run.pending:
+            run.rows_count += rows_count
+            run.pending -= 1
+            if not run.pending:
+                self.submit_next_stage(pool, name)
+            return
+        run.elapsed = time.monotonic() - run.started
+        self.finished.add(name)
+        self.start_ready(pool)
+
+    def run(self) -> List[LoadStats]:
+        # forked workers must not share parent database connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(self.jobs, mp_context=context) as pool:
+            self.start_ready(pool)
+            while self.futures:
+                done, _ = wait(self.futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = self.futures.pop(future)
+                    try:
+                        rows_count = future.result()
+                    except Exception:
+                        for pending in self.futures:
+                            pending.cancel()
+                        raise
+                    self.complete(pool, name, rows_count)
+        return [(run.loader, run.rows_count, run.elapsed)
+                for run in self.runs.values()]
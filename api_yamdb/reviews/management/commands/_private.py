@@ -1,11 +1,395 @@
 import csv
-from typing import Dict, List
+import io
+import json
+import os
+import pathlib
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import SET_NULL, Field
 from django.db.models.base import ModelBase
-from reviews.models import Category, Title
+from reviews.counters import rebuild_review_counters, rebuild_title_counters
+from reviews.models import Comment, Review, Title
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import rebuild_ratings
+from reviews.search import update_search_vectors
+from reviews.stamps import bump_stamps, touch_all_stamps
+from reviews.suggest import REMOVED_STAMP
+
+DEFAULT_BATCH_SIZE = 1000
+# formats of export_data command, csv files have a header row
+DATA_FORMATS = ('csv', 'ndjson')
+MIN_PART_SIZE = 8 * 1024 * 1024
+SPLIT_CHUNK_SIZE = 1024 * 1024
+
+
+def get_csv_fields(model_class: ModelBase,
+                   columns: List[str]) -> List[Field]:
+    """Model fields for csv columns, both 'title' and 'title_id'
+    column names are accepted for foreign keys.
+    """
+    return [model_class._meta.get_field(column) for column in columns]
+
+
+def clean_value(field: Field, value: str):
+    if value == '' and field.null and not field.empty_strings_allowed:
+        return None
+    return value
+
+
+def is_ndjson(file_location: str) -> bool:
+    return pathlib.Path(file_location).suffix == '.ndjson'
+
+
+def get_header(file_location: str) -> Tuple[List[str], int]:
+    """Csv column names and offset of the first data row."""
+    with open(file_location, 'rb') as data_file:
+        header = data_file.readline()
+    return next(csv.reader([header.decode('utf8')])), len(header)
+
+
+class FileRange(io.RawIOBase):
+    """Read-only stream over [start, end) bytes of a file."""
+    def __init__(self, file_location: str, start: int, end: int) -> None:
+        super().__init__()
+        self.file = open(file_location, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        data = self.file.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def open_range(file_location: str,
+               start: Optional[int] = None,
+               end: Optional[int] = None) -> io.BufferedReader:
+    """Binary stream over data rows of csv or ndjson file, the whole
+    file without header by default.
+    """
+    if start is None:
+        start = 0 if is_ndjson(file_location) else get_header(
+            file_location)[1]
+    if end is None:
+        end = os.path.getsize(file_location)
+    return io.BufferedReader(FileRange(file_location, start, end))
+
+
+def split_lines(file_location: str,
+                parts: int,
+                min_part_size: int = MIN_PART_SIZE) -> List[Tuple[int, int]]:
+    """Split ndjson rows into at most `parts` byte ranges, every
+    newline ends a row as json strings have them escaped.
+    """
+    size = os.path.getsize(file_location)
+    parts = max(1, min(parts, size // min_part_size))
+    borders = [0]
+    with open(file_location, 'rb') as data_file:
+        for part in range(1, parts):
+            data_file.seek(max(size * part // parts, borders[-1]))
+            data_file.readline()
+            borders.append(data_file.tell())
+    borders = sorted(set(border for border in borders if border < size))
+    return list(zip(borders, borders[1:] + [size]))
+
+
+def split_file(file_location: str,
+               parts: int,
+               min_part_size: int = MIN_PART_SIZE) -> List[Tuple[int, int]]:
+    """Split csv data rows into at most `parts` byte ranges.
+
+    Range borders are placed after newlines outside quoted values:
+    newline ends a row only if number of quotes before it is even.
+    """
+    if is_ndjson(file_location):
+        return split_lines(file_location, parts, min_part_size)
+    _, start = get_header(file_location)
+    size = os.path.getsize(file_location)
+    parts = max(1, min(parts, (size - start) // min_part_size))
+    targets = [start + (size - start) * part // parts
+               for part in range(1, parts)]
+    borders = [start]
+    with open(file_location, 'rb') as data_file:
+        data_file.seek(start)
+        chunk_start = start
+        quotes = 0
+        while targets:
+            chunk = data_file.read(SPLIT_CHUNK_SIZE)
+            if not chunk:
+                break
+            newline = chunk.find(b'\n', max(targets[0] - chunk_start, 0))
+            while newline != -1:
+                search_from = newline + 1
+                if (quotes + chunk.count(b'"', 0, newline)) % 2 == 0:
+                    borders.append(chunk_start + search_from)
+                    targets = [target for target in targets
+                               if target >= borders[-1]]
+                    if not targets:
+                        break
+                    search_from = max(search_from, targets[0] - chunk_start)
+                newline = chunk.find(b'\n', search_from)
+            quotes += chunk.count(b'"')
+            chunk_start += len(chunk)
+    borders = sorted(set(border for border in borders if border < size))
+    return list(zip(borders, borders[1:] + [size]))
+
+
+def read_batches(file_location: str,
+                 batch_size: int,
+                 start: Optional[int] = None,
+                 end: Optional[int] = None) -> Iterator[List[List[str]]]:
+    """Yield chunks of at most batch_size csv rows."""
+    with io.TextIOWrapper(open_range(file_location, start, end),
+                          encoding='utf8', newline='') as data_file:
+        csvreader = csv.reader(data_file, delimiter=',')
+        while True:
+            batch = list(islice(csvreader, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+@contextmanager
+def loaded_dates(fields: Iterable[Field]):
+    """Keep dates of auto_now and auto_now_add fields read from file,
+    bulk_create would set them to the current time.
+    """
+    changed = [(field, field.auto_now, field.auto_now_add)
+               for field in fields
+               if getattr(field, 'auto_now', False)
+               or getattr(field, 'auto_now_add', False)]
+    for field, _, _ in changed:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def bulk_load(model_class: ModelBase,
+              file_location: str,
+              batch_size: int,
+              start: Optional[int] = None,
+              end: Optional[int] = None) -> int:
+    """Insert csv rows with bulk_create, committing every batch.
+    Foreign keys are assigned to '<name>_id' attributes directly,
+    without fetching related objects.
+    """
+    columns, _ = get_header(file_location)
+    fields = get_csv_fields(model_class, columns)
+    rows_count = 0
+    for batch in read_batches(file_location, batch_size, start, end):
+        objects_list = [
+            model_class(**{field.attname: clean_value(field, value)
+                           for field, value in zip(fields, row)})
+            for row in batch
+        ]
+        with transaction.atomic(), loaded_dates(fields):
+            model_class.objects.bulk_create(objects_list,
+                                            ignore_conflicts=True)
+        rows_count += len(batch)
+    return rows_count
+
+
+def ndjson_load(model_class: ModelBase,
+                file_location: str,
+                batch_size: int,
+                start: Optional[int] = None,
+                end: Optional[int] = None) -> int:
+    """Insert ndjson rows with bulk_create, committing every batch.
+    Keys which are not model fields (genres of titles) are skipped,
+    they are loaded from their own files.
+    """
+    rows_count = 0
+    with open_range(file_location, start, end) as data_file:
+        while True:
+            lines = [line for line in islice(data_file, batch_size)
+                     if line.strip()]
+            if not lines:
+                return rows_count
+            objects_list = []
+            fields = set()
+            for line in lines:
+                values = {}
+                for key, value in json.loads(line).items():
+                    try:
+                        field = model_class._meta.get_field(key)
+                    except FieldDoesNotExist:
+                        continue
+                    fields.add(field)
+                    values[field.attname] = value
+                objects_list.append(model_class(**values))
+            with transaction.atomic(), loaded_dates(fields):
+                model_class.objects.bulk_create(objects_list,
+                                                ignore_conflicts=True)
+            rows_count += len(objects_list)
+
+
+def get_missing_columns(
+        model_class: ModelBase,
+        csv_fields: List[Field]) -> List[Tuple[str, str, List]]:
+    """Columns absent in csv with SQL placeholder and params for them."""
+    missing = []
+    for field in model_class._meta.concrete_fields:
+        if field in csv_fields or field.primary_key:
+            continue
+        if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False):
+            missing.append((field.column, 'NOW()', []))
+            continue
+        value = field.get_db_prep_save(field.get_default(), connection)
+        missing.append((field.column, '%s', [value]))
+    return missing
+
+
+def copy_load(model_class: ModelBase,
+              file_location: str,
+              start: Optional[int] = None,
+              end: Optional[int] = None) -> int:
+    """Postgres fast path: COPY csv into temporary table and move rows
+    to the model table with single INSERT ... SELECT.
+    Returns number of inserted rows, conflicting rows are skipped.
+    """
+    quote = connection.ops.quote_name
+    table = model_class._meta.db_table
+    temp_table = quote(f'{table}_load')
+    columns, _ = get_header(file_location)
+    fields = get_csv_fields(model_class, columns)
+    with open_range(file_location, start, end) as data_file:
+
+        select_list = [
+            quote(column) if field.empty_strings_allowed
+            else f'CAST({quote(column)} AS {field.cast_db_type(connection)})'
+            for column, field in zip(columns, fields)
+        ]
+        # empty values are NULL in csv format, but '' for text fields
+        text_columns = [quote(column)
+                        for column, field in zip(columns, fields)
+                        if field.empty_strings_allowed]
+        copy_options = 'FORMAT csv'
+        if text_columns:
+            copy_options += f', FORCE_NOT_NULL ({", ".join(text_columns)})'
+        insert_columns = [quote(field.column) for field in fields]
+        params = []
+        for column, placeholder, column_params in get_missing_columns(
+                model_class, fields):
+            insert_columns.append(quote(column))
+            select_list.append(placeholder)
+            params.extend(column_params)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {temp_table} '
+                f'({", ".join(f"{quote(c)} text" for c in columns)}) '
+                'ON COMMIT DROP')
+            cursor.copy_expert(
+                f'COPY {temp_table} FROM STDIN WITH ({copy_options})',
+                data_file)
+            cursor.execute(
+                f'INSERT INTO {quote(table)} ({", ".join(insert_columns)}) '
+                f'SELECT {", ".join(select_list)} FROM {temp_table} '
+                'ON CONFLICT DO NOTHING',
+                params)
+            return cursor.rowcount
+
+
+def reset_sequences(model_class: ModelBase):
+    """Move pk sequence after the loaded explicit ids."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model_class])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def collect_purge(
+        models: List[ModelBase]) -> Tuple[List[ModelBase], List[Field]]:
+    """Models to purge with all models referencing them by cascading
+    foreign keys, and SET_NULL foreign keys of the remaining models.
+    """
+    purged = []
+    queue = list(models)
+    set_null_fields = []
+    while queue:
+        model_class = queue.pop(0)
+        if model_class in purged:
+            continue
+        purged.append(model_class)
+        for relation in model_class._meta.get_fields(include_hidden=True):
+            if not relation.auto_created or relation.concrete:
+                continue
+            if not (relation.one_to_many or relation.one_to_one):
+                continue
+            if relation.on_delete is SET_NULL:
+                set_null_fields.append(relation.remote_field)
+            else:
+                queue.append(relation.related_model)
+    return purged, [field for field in set_null_fields
+                    if field.model not in purged]
+
+
+def purge_models(models: List[ModelBase]) -> List[ModelBase]:
+    """Remove all rows of models without loading them into Python,
+    model signals are not sent. Returns purged models.
+
+    Tables are truncated (TRUNCATE ... RESTART IDENTITY CASCADE on
+    Postgres, DELETE and sqlite_sequence cleanup on SQLite). If other
+    tables keep SET_NULL references, they are nulled and rows are
+    deleted with plain DELETE, as referenced tables can't be truncated.
+    """
+    purged, set_null_fields = collect_purge(models)
+    tables = [model_class._meta.db_table for model_class in purged]
+    with transaction.atomic():
+        for field in set_null_fields:
+            field.model._base_manager.exclude(
+                **{field.attname: None}).update(**{field.attname: None})
+        if not set_null_fields:
+            connection.ops.execute_sql_flush(connection.ops.sql_flush(
+                no_style(), tables, reset_sequences=True, allow_cascade=True))
+        else:
+            with connection.cursor() as cursor:
+                for table in reversed(tables):
+                    cursor.execute(
+                        f'DELETE FROM {connection.ops.quote_name(table)}')
+            for model_class in purged:
+                reset_sequences(model_class)
+        if Review not in purged and Comment in purged:
+            rebuild_review_counters()
+        if Title not in purged:
+            if Review in purged:
+                rebuild_ratings()
+                rebuild_title_counters()
+                rebuild_rankings()
+            update_search_vectors()
+        else:
+            bump_stamps(REMOVED_STAMP)
+        touch_all_stamps()
+    return purged
 
 
 class ModelLoader:
+    batch_size = DEFAULT_BATCH_SIZE
+    use_copy = True
+    # files of other formats are read with the same names
+    data_format = 'csv'
+
     def __init__(self,
                  model_class: ModelBase,
                  file_location: str,
@@ -14,26 +398,67 @@ class ModelLoader:
         self.file_location = file_location
         self.help = help
 
-    def load(self):
-        with open(self.file_location, 'r', 1, 'utf8') as data_file:
-            csvreader = csv.DictReader(data_file, delimiter=',')
-            objects_list = []
-            for row in csvreader:
-                objects_list.append(self.model_class(**row))
+    def data_file(self, file_location: str) -> pathlib.Path:
+        return pathlib.Path(file_location).with_suffix(
+            f'.{self.data_format}')
+
+    def get_stages(self) -> List[Tuple[ModelBase, str]]:
+        """Models and data files to load, one after another."""
+        return [(self.model_class, self.data_file(self.file_location))]
+
+    def get_dependencies(self) -> Set[ModelBase]:
+        """Models referenced by foreign keys of the loaded tables."""
+        stage_models = {model for model, _ in self.get_stages()}
+        return {field.related_model
+                for model in stage_models
+                for field in model._meta.concrete_fields
+                if field.is_relation
+                and field.related_model not in stage_models}
+
+    def load_file(self,
+                  model_class: ModelBase,
+                  file_location: str,
+                  start: Optional[int] = None,
+                  end: Optional[int] = None) -> int:
+        """Load rows from [start, end) bytes range of the file,
+        the whole file by default.
+        """
+        if is_ndjson(file_location):
+            return ndjson_load(model_class, file_location, self.batch_size,
+                               start, end)
+        if self.use_copy and connection.vendor == 'postgresql':
+            return copy_load(model_class, file_location, start, end)
+        return bulk_load(model_class, file_location, self.batch_size,
+                         start, end)
+
+    def after_load(self):
+        for model_class, _ in self.get_stages():
+            reset_sequences(model_class)
+        touch_all_stamps()
 
-            self.model_class.objects.bulk_create(
-                objects_list, ignore_conflicts=True)
+    def load(self) -> int:
+        """Load data files, returns number of loaded rows."""
+        try:
+            return sum(self.load_file(model_class, file_location)
+                       for model_class, file_location in self.get_stages())
+        finally:
+            self.after_load()
 
     def remove(self):
+        """Delete objects one by one, sending model signals."""
         self.model_class.objects.all().delete()
 
+    def purge(self) -> List[ModelBase]:
+        return purge_models([model for model, _ in self.get_stages()])
+
     def show(self):
-        for object in self.model_class.objects.all():
+        for object in self.model_class.objects.order_by('pk').iterator(
+                chunk_size=self.batch_size):
             print(f'{object.pk}:{object}')
 
-    def reload(self):
+    def reload(self) -> int:
         self.remove()
-        self.load()
+        return self.load()
 
     def __str__(self):
         return str(self.model_class.__name__)
@@ -49,24 +474,14 @@ class TitleLoader(ModelLoader):
         self.genre_titles_file = genre_titles_file
         self.help = help
 
-    def load(self):
-        titles_list = []
-        with open(self.titles_file, 'r', 1, 'utf8') as data_file:
-            csvreader = csv.DictReader(data_file, delimiter=',')
-            for row in csvreader:
-                if 'category' in row:
-                    row['category'] = Category.objects.get(pk=row['category'])
-                titles_list.append(Title(**row))
-
-        Title.objects.bulk_create(titles_list,
-                                  ignore_conflicts=True)
+    def get_stages(self) -> List[Tuple[ModelBase, str]]:
+        return [(Title, self.data_file(self.titles_file)),
+                (Title.genre.through,
+                 self.data_file(self.genre_titles_file))]
 
-        with open(self.genre_titles_file, 'r', 1, 'utf8') as genres_file:
-            csvreader = csv.DictReader(genres_file, delimiter=',')
-            for row in csvreader:
-                title_id = row['title_id']
-                genre_id = row['genre_id']
-                Title.objects.get(id=title_id).genre.add(genre_id)
+    def after_load(self):
+        super().after_load()
+        update_search_vectors()
 
 
 class ModelWithFKLoader(ModelLoader):
@@ -75,30 +490,65 @@ class ModelWithFKLoader(ModelLoader):
                  file_location: str,
                  foreign_keys_map: Dict[str, ModelBase],
                  help: str) -> None:
-        self.foreign_keys_map: Dict(str, ModelBase) = foreign_keys_map
+        self.foreign_keys_map: Dict[str, ModelBase] = foreign_keys_map
         super().__init__(model_class, file_location, help)
 
-    def load(self):
-        objects_list = []
-        with open(self.file_location, 'r', 1, 'utf8') as data_file:
-            csvreader = csv.DictReader(data_file, delimiter=',')
-            for row in csvreader:
-                for column, model_name in self.foreign_keys_map.items():
-                    if column in row:
-                        row[column] = model_name.objects.get(
-                            pk=int(row[column]))
+    def get_dependencies(self) -> Set[ModelBase]:
+        return super().get_dependencies() | set(
+            self.foreign_keys_map.values())
 
-                objects_list.append(self.model_class(**row))
 
-        self.model_class.objects.bulk_create(objects_list,
-                                             ignore_conflicts=True)
+class ReviewLoader(ModelWithFKLoader):
+    """Reviews are inserted in bulk, which skips model signals,
+    so stored title ratings, counters and rankings are recalculated
+    after every load.
+    """
+    def __init__(self,
+                 file_location: str,
+                 foreign_keys_map: Dict[str, ModelBase],
+                 help: str) -> None:
+        super().__init__(Review, file_location, foreign_keys_map, help)
 
+    def after_load(self):
+        super().after_load()
+        rebuild_ratings()
+        rebuild_title_counters()
+        rebuild_review_counters()
+        rebuild_rankings()
 
-def load_models(models: List[ModelLoader]):
-    for model in models:
-        model.load()
+
+class CommentLoader(ModelWithFKLoader):
+    """Comment counters of reviews are recalculated after every load."""
+    def __init__(self,
+                 file_location: str,
+                 foreign_keys_map: Dict[str, ModelBase],
+                 help: str) -> None:
+        super().__init__(Comment, file_location, foreign_keys_map, help)
+
+    def after_load(self):
+        super().after_load()
+        rebuild_review_counters()
+
+
+LoadStats = Tuple[ModelLoader, int, float]
+
+
+def timed_load(model: ModelLoader) -> LoadStats:
+    started = time.monotonic()
+    rows_count = model.load()
+    return model, rows_count, time.monotonic() - started
+
+
+def load_models(models: List[ModelLoader]) -> List[LoadStats]:
+    return [timed_load(model) for model in models]
 
 
 def delete_models(models: List[ModelLoader]):
     for model in models:
         model.remove()
+
+
+def purge_loaders(models: List[ModelLoader]) -> List[ModelBase]:
+    return purge_models([model_class
+                         for model in models
+                         for model_class, _ in model.get_stages()])
@@ -0,0 +1,48 @@
+import pathlib
+import time
+
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from reviews.export import EXPORT_FORMATS, EXPORT_RESOURCES, export_chunks
+
+
+class Command(BaseCommand):
+    help = ('Export catalog, reviews and comments into files '
+            'models_loader can load back')
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('resources',
+                            nargs='*',
+                            help='Exported tables, all by default: '
+                                 f'{", ".join(EXPORT_RESOURCES)}')
+        parser.add_argument('--format',
+                            choices=list(EXPORT_FORMATS),
+                            default='csv',
+                            help='Output format')
+        parser.add_argument('--output',
+                            default='.',
+                            help='Directory for exported files')
+        parser.add_argument('--chunk-size',
+                            type=int,
+                            default=settings.EXPORT_CHUNK_SIZE,
+                            help='Rows fetched from database at once')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size must be positive')
+        unknown = set(options['resources']) - set(EXPORT_RESOURCES)
+        if unknown:
+            raise CommandError(f'Unknown tables: {", ".join(sorted(unknown))}')
+        output = pathlib.Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        for name in options['resources'] or EXPORT_RESOURCES:
+            started = time.monotonic()
+            path = output / f'{name}.{options["format"]}'
+            with open(path, 'w', encoding='utf8', newline='') as data_file:
+                for chunk in export_chunks(EXPORT_RESOURCES[name],
+                                           options['format'],
+                                           options['chunk_size']):
+                    data_file.write(chunk)
+            self.stdout.write(f'{name}: {path} in '
+                              f'{time.monotonic() - started:.2f}s')
@@ -1,13 +1,17 @@
 import pathlib
-from typing import Dict
+import time
+from typing import Dict, List
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import (BaseCommand, CommandError,
                                          CommandParser)
-from reviews.models import Category, Comment, Genre, Review, Title
+from django.db import transaction
+from reviews.models import Category, Genre, Review, Title
 
-from ._private import (ModelLoader, ModelWithFKLoader, TitleLoader,
-                       delete_models, load_models)
+from ._parallel import ParallelLoader
+from ._private import (DATA_FORMATS, DEFAULT_BATCH_SIZE, CommentLoader,
+                       LoadStats, ModelLoader, ReviewLoader, TitleLoader,
+                       delete_models, load_models, purge_loaders)
 
 User = get_user_model()
 
@@ -35,15 +39,13 @@ class Command(BaseCommand):
                              base_data_file_location / "genre_title.csv",
                              "Load Titles"),
 
-        "review": ModelWithFKLoader(Review,
-                                    base_data_file_location / "review.csv",
-                                    {"title": Title, 'author': User},
-                                    "Load Reviews"),
+        "review": ReviewLoader(base_data_file_location / "review.csv",
+                               {"title": Title, 'author': User},
+                               "Load Reviews"),
 
-        "comment": ModelWithFKLoader(Comment,
-                                     base_data_file_location / "comments.csv",
-                                     {"review": Review, 'author': User},
-                                     "Load Comments"),
+        "comment": CommentLoader(base_data_file_location / "comments.csv",
+                                 {"review": Review, 'author': User},
+                                 "Load Comments"),
 
 
     }
@@ -76,28 +78,98 @@ class Command(BaseCommand):
                             action='store_true',
                             help='Reload all model instances')
 
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Rows per bulk insert and commit')
+        parser.add_argument('--jobs',
+                            type=int,
+                            default=1,
+                            help=('Number of worker processes, independent '
+                                  'models and parts of big files are '
+                                  'loaded concurrently'))
+        parser.add_argument('--with-signals',
+                            action='store_true',
+                            help=('Delete objects one by one sending model '
+                                  'signals instead of truncating tables'))
+        parser.add_argument('--format',
+                            choices=DATA_FORMATS,
+                            default='csv',
+                            help='Format of data files, see export_data')
+        parser.add_argument('--no-copy',
+                            action='store_true',
+                            help='Do not use Postgres COPY fast path')
+
         for command, loader in self.loaders_dict.items():
             parser.add_argument(f'--{command}',
                                 action='store_true',
                                 help=loader)
 
-    def process_all_models(self, options):
-        creation_loaders = [self.loaders_dict[model_name]
-                            for model_name in self.creation_order]
-        removing_loaders = list(creation_loaders)
-        removing_loaders.reverse()
+    def configure_loaders(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive')
+        if options['jobs'] < 1:
+            raise CommandError('Number of jobs must be positive')
+        ModelLoader.batch_size = options['batch_size']
+        ModelLoader.use_copy = not options['no_copy']
+        ModelLoader.data_format = options['format']
+
+    def run_loaders(self, names: List[str], options):
+        started = time.monotonic()
+        if options['jobs'] == 1:
+            stats = load_models([self.loaders_dict[name] for name in names])
+        else:
+            try:
+                stats = ParallelLoader(self.loaders_dict,
+                                       names,
+                                       options['jobs']).run()
+            except ValueError as error:
+                raise CommandError(error)
+        self.write_report(stats, time.monotonic() - started)
+
+    def remove_data(self, names: List[str], options):
+        loaders = [self.loaders_dict[name] for name in names]
+        if options['with_signals']:
+            delete_models(list(reversed(loaders)))
+            return
+        purged = purge_loaders(loaders)
+        self.stdout.write('Purged tables: ' + ', '.join(
+            model_class._meta.db_table for model_class in purged))
+
+    def reload_data(self, names: List[str], options):
+        if options['jobs'] > 1:
+            # workers use their own connections, so old data is removed
+            # in a separate transaction
+            self.remove_data(names, options)
+            self.run_loaders(names, options)
+            return
+        with transaction.atomic():
+            self.remove_data(names, options)
+            self.run_loaders(names, options)
+
+    def write_report(self, stats: List[LoadStats], total_time: float):
+        total_rows = 0
+        for loader, rows_count, elapsed in stats:
+            total_rows += rows_count
+            self.stdout.write(
+                f'{loader}: {rows_count} rows in {elapsed:.2f}s '
+                f'({rows_count / max(elapsed, 1e-6):.0f} rows/s)')
+        if len(stats) > 1:
+            self.stdout.write(
+                f'Total: {total_rows} rows in {total_time:.2f}s '
+                f'({total_rows / max(total_time, 1e-6):.0f} rows/s)')
 
+    def process_all_models(self, options):
         if options['load']:
-            load_models(creation_loaders)
+            self.run_loaders(self.creation_order, options)
             return
 
         if options['delete']:
-            delete_models(removing_loaders)
+            self.remove_data(self.creation_order, options)
             return
 
         if options['reload']:
-            delete_models(removing_loaders)
-            load_models(creation_loaders)
+            self.reload_data(self.creation_order, options)
             return
 
         raise CommandError(
@@ -108,6 +180,7 @@ class Command(BaseCommand):
         for command in self.loaders_dict.keys():
             if options[command]:
                 model_loader = self.loaders_dict[command]
+                loader_name = command
                 break
         if not model_loader:
             raise CommandError(
@@ -115,7 +188,7 @@ class Command(BaseCommand):
                  f'of {self.loaders_dict.keys()} values'))
 
         if options['load']:
-            model_loader.load()
+            self.run_loaders([loader_name], options)
             return
 
         if options['show']:
@@ -123,11 +196,11 @@ class Command(BaseCommand):
             return
 
         if options['delete']:
-            model_loader.remove()
+            self.remove_data([loader_name], options)
             return
 
         if options['reload']:
-            model_loader.reload()
+            self.reload_data([loader_name], options)
             return
 
         raise CommandError(
@@ -135,6 +208,7 @@ class Command(BaseCommand):
             " [--load, --show, --delete, --reload]")
 
     def handle(self, *args, **options):
+        self.configure_loaders(options)
 
         if options['all']:
             self.process_all_models(options)
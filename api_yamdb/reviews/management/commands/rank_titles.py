@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from reviews.rankings import numpy, rebuild_rankings, refresh_rankings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or refresh leaderboards of top rated and trending titles'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--rebuild',
+                            action='store_true',
+                            help='Rank all reviewed titles')
+        parser.add_argument('--refresh',
+                            action='store_true',
+                            help='Rank titles reviewed since their last '
+                                 'ranking')
+
+    def handle(self, *args, **options):
+        engine = 'python' if numpy is None else 'numpy'
+        started = time.monotonic()
+        if options['rebuild']:
+            ranked = rebuild_rankings()
+            self.stdout.write(f'{ranked} titles ranked in '
+                              f'{time.monotonic() - started:.2f}s '
+                              f'({engine})')
+            return
+
+        if options['refresh']:
+            refreshed = refresh_rankings()
+            self.stdout.write(f'{refreshed} titles refreshed in '
+                              f'{time.monotonic() - started:.2f}s '
+                              f'({engine})')
+            return
+
+        raise CommandError(
+            "Action is not set. Use one of [--rebuild, --refresh]")
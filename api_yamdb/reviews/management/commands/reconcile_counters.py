@@ -0,0 +1,67 @@
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from django.db import transaction
+from reviews.counters import (find_review_counter_drift,
+                              find_title_counter_drift,
+                              rebuild_review_counters, rebuild_title_counters)
+from reviews.ratings import find_rating_drift, rebuild_ratings
+from reviews.stamps import touch_all_stamps
+
+
+class Command(BaseCommand):
+    help = ('Check or rebuild stored review and comment counters of '
+            'titles and reviews, ratings included')
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--check',
+                            action='store_true',
+                            help='Report titles and reviews with drifted '
+                                 'counters')
+        parser.add_argument('--rebuild',
+                            action='store_true',
+                            help='Recalculate counters from reviews and '
+                                 'comments')
+
+    def check_drift(self):
+        drifted = 0
+        for title in find_rating_drift():
+            self.stdout.write(
+                f'title {title.pk}: review count {title.rating_count} '
+                f'!= {title.actual_count}')
+            drifted += 1
+        for title in find_title_counter_drift():
+            self.stdout.write(
+                f'title {title.pk}: last review {title.last_review_at} '
+                f'!= {title.actual_last_review_at}')
+            drifted += 1
+        for review in find_review_counter_drift():
+            self.stdout.write(
+                f'review {review.pk}: comment count {review.comment_count} '
+                f'!= {review.actual_comment_count} or last comment '
+                f'{review.last_comment_at} != '
+                f'{review.actual_last_comment_at}')
+            drifted += 1
+        return drifted
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                titles = rebuild_ratings()
+                rebuild_title_counters()
+                reviews = rebuild_review_counters()
+                touch_all_stamps()
+            self.stdout.write(f'Counters rebuilt for {titles} titles and '
+                              f'{reviews} reviews')
+            return
+
+        if options['check']:
+            drifted = self.check_drift()
+            if drifted:
+                raise CommandError(
+                    f'{drifted} counters have drifted, '
+                    'use --rebuild to fix them')
+            self.stdout.write('No counter drift found')
+            return
+
+        raise CommandError(
+            "Action is not set. Use one of [--check, --rebuild]")
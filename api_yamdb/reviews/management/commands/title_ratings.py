@@ -0,0 +1,44 @@
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from django.db import transaction
+from reviews.ratings import find_rating_drift, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Check or rebuild stored title ratings'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--check',
+                            action='store_true',
+                            help='Report titles with drifted rating')
+        parser.add_argument('--rebuild',
+                            action='store_true',
+                            help='Recalculate ratings from reviews')
+
+    def check_drift(self):
+        drifted = find_rating_drift()
+        for title in drifted:
+            self.stdout.write(
+                f'{title.pk}:{title} '
+                f'sum {title.rating_sum} != {title.actual_sum} or '
+                f'count {title.rating_count} != {title.actual_count}')
+        return len(drifted)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                updated = rebuild_ratings()
+            self.stdout.write(f'Ratings rebuilt for {updated} titles')
+            return
+
+        if options['check']:
+            drifted = self.check_drift()
+            if drifted:
+                raise CommandError(
+                    f'{drifted} titles have drifted rating, '
+                    'use --rebuild to fix them')
+            self.stdout.write('No rating drift found')
+            return
+
+        raise CommandError(
+            "Action is not set. Use one of [--check, --rebuild]")
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:31
+
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_INDEXES = (
+    ('reviews_title_search_vector_idx',
+     'reviews_title USING gin (search_vector)'),
+    ('reviews_title_name_trgm_idx',
+     'reviews_title USING gin (name gin_trgm_ops)'),
+    ('reviews_genre_name_trgm_idx',
+     'reviews_genre USING gin (UPPER(name) gin_trgm_ops)'),
+    ('reviews_category_name_trgm_idx',
+     'reviews_category USING gin (UPPER(name) gin_trgm_ops)'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    Category = apps.get_model('reviews', 'Category')
+    genres = (Title.genre.through.objects
+              .filter(title=OuterRef('pk'))
+              .order_by()
+              .values('title')
+              .annotate(names=StringAgg('genre__name', ' '))
+              .values('names'))
+    category = Category.objects.filter(
+        pk=OuterRef('category_id')).values('name')
+    Title.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='simple')
+        + SearchVector(Subquery(genres), Subquery(category),
+                       weight='B', config='simple')
+        + SearchVector('description', weight='C', config='simple')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_conditional_get_stamps'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Full-text search vector'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
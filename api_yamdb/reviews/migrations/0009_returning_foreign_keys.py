@@ -0,0 +1,28 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:27
+
+from django.db import migrations
+import django.db.models.deletion
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_filter_indexes'),
+    ]
+
+    # field class changes only how inserts are made, schema stays the same
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='comment',
+                name='review',
+                field=reviews.models.ReturningForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='сomments', to='reviews.review'),
+            ),
+            migrations.AlterField(
+                model_name='review',
+                name='title',
+                field=reviews.models.ReturningForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='reviews.title'),
+            ),
+        ]),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:31
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    Title.objects.update(last_review_at=Subquery(
+        Review.objects
+        .filter(title=OuterRef('pk'))
+        .order_by('-pub_date')
+        .values('pub_date')[:1]))
+    comments = (Comment.objects
+                .filter(review=OuterRef('pk'))
+                .order_by()
+                .values('review'))
+    Review.objects.update(
+        comment_count=Coalesce(
+            Subquery(comments.annotate(value=Count('pk')).values('value')),
+            0),
+        last_comment_at=Subquery(
+            comments.annotate(value=Max('pub_date')).values('value')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_returning_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Number of comments'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Last comment date'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='last_review_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Last review date'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
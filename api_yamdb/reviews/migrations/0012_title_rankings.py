@@ -0,0 +1,31 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_score_histograms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.title', verbose_name='Title')),
+                ('weighted_rating', models.FloatField(verbose_name='Rating weighted by number of reviews')),
+                ('trending', models.FloatField(verbose_name='Log2 of decayed review weights')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Refresh date')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-weighted_rating', 'title'], name='ranking_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-trending', 'title'], name='ranking_trending_idx'),
+        ),
+    ]
@@ -1,11 +1,43 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
+from django.utils import timezone
 
 from .validators import validate_creation_year
 
 User = get_user_model()
 
+SCORES = range(1, 11)
+
+
+# Columns of stored score histogram, numbers of reviews per score
+SCORE_COUNT_FIELDS = [f'score_{score}_count' for score in SCORES]
+
+
+def score_count_field(score: int):
+    return models.PositiveIntegerField(
+        verbose_name=f"Number of reviews with score {score}",
+        default=0,
+        editable=False)
+
+
+class ReturningForeignKey(models.ForeignKey):
+    """Foreign key read back with INSERT ... RETURNING, so it may be
+    saved as a subquery and receivers of post_save get the value.
+    """
+    db_returning = True
+
+
+def returning_key(queryset: models.QuerySet):
+    """ReturningForeignKey value of the parent selected by queryset.
+    Backends without INSERT ... RETURNING (SQLite) can't read back
+    a subquery, the parent id is read before the INSERT there.
+    """
+    if connection.features.can_return_columns_from_insert:
+        return models.Subquery(queryset.values('pk'))
+    return queryset.values_list('pk', flat=True).first()
+
 
 class Category(models.Model):
     name = models.CharField(verbose_name="Category name",
@@ -53,12 +85,60 @@ class Title(models.Model):
                                    blank=True,
                                    )
 
+    rating_sum = models.PositiveIntegerField(verbose_name="Sum of scores",
+                                             default=0,
+                                             editable=False)
+
+    rating_count = models.PositiveIntegerField(
+        verbose_name="Number of scores",
+        default=0,
+        editable=False)
+
+    rating = models.FloatField(verbose_name="Average score",
+                               null=True,
+                               editable=False)
+
+    score_1_count = score_count_field(1)
+    score_2_count = score_count_field(2)
+    score_3_count = score_count_field(3)
+    score_4_count = score_count_field(4)
+    score_5_count = score_count_field(5)
+    score_6_count = score_count_field(6)
+    score_7_count = score_count_field(7)
+    score_8_count = score_count_field(8)
+    score_9_count = score_count_field(9)
+    score_10_count = score_count_field(10)
+
+    updated_at = models.DateTimeField(verbose_name="Last update date",
+                                      auto_now=True)
+
+    last_review_at = models.DateTimeField(verbose_name="Last review date",
+                                          null=True,
+                                          editable=False)
+
+    search_vector = SearchVectorField(verbose_name="Full-text search vector",
+                                      null=True,
+                                      editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['category', 'year', 'id'],
+                         name='title_category_year_idx'),
+            models.Index(fields=['updated_at'], name='title_updated_at_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        return [getattr(self, name) for name in SCORE_COUNT_FIELDS]
+
 
 class Review(models.Model):
-    title = models.ForeignKey(
+    title = ReturningForeignKey(
         Title,
         on_delete=models.CASCADE,
         related_name='reviews'
@@ -76,22 +156,41 @@ class Review(models.Model):
     score = models.PositiveSmallIntegerField(
         verbose_name="Score of the title",
         blank=False,
-        validators=[MinValueValidator(1), MaxValueValidator(10)]
+        validators=[MinValueValidator(SCORES[0]),
+                    MaxValueValidator(SCORES[-1])]
     )
     pub_date = models.DateTimeField(
         verbose_name="Publication date",
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name="Last update date",
+        auto_now=True
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Number of comments",
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        verbose_name="Last comment date",
+        null=True,
+        editable=False
+    )
 
     class Meta:
         unique_together = ['title', 'author']
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
 
 class Comment(models.Model):
-    review = models.ForeignKey(
+    review = ReturningForeignKey(
         Review,
         on_delete=models.CASCADE,
         related_name='сomments',
@@ -110,6 +209,57 @@ class Comment(models.Model):
         verbose_name="Publication date",
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name="Last update date",
+        auto_now=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class ChangeStamp(models.Model):
+    """Version of a collection, e.g. all titles or reviews of one title.
+    Bumped on every change of the collection items.
+    """
+    key = models.CharField(verbose_name="Collection key",
+                           max_length=64,
+                           unique=True)
+    version = models.PositiveBigIntegerField(verbose_name="Version",
+                                             default=1)
+    modified = models.DateTimeField(verbose_name="Last change date",
+                                    default=timezone.now)
+
+    def __str__(self):
+        return f'{self.key}:{self.version}'
+
+
+class TitleRanking(models.Model):
+    """Leaderboard values of a reviewed title, see reviews/rankings.py."""
+    title = models.OneToOneField(Title,
+                                 verbose_name="Title",
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='ranking')
+    weighted_rating = models.FloatField(
+        verbose_name="Rating weighted by number of reviews")
+    trending = models.FloatField(
+        verbose_name="Log2 of decayed review weights")
+    refreshed_at = models.DateTimeField(verbose_name="Refresh date")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-weighted_rating', 'title'],
+                         name='ranking_weighted_rating_idx'),
+            models.Index(fields=['-trending', 'title'],
+                         name='ranking_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}:{self.weighted_rating}:{self.trending}'
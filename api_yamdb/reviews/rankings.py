@@ -0,0 +1,182 @@
+import math
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .bulk import bulk_saved
+from .models import SCORES, Review, Title, TitleRanking
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CHUNK_SIZE = 10000
+BATCH_SIZE = 1000
+# Review writes mark titles stale with updated_at = Now(), the start of
+# their transaction (a whole second on SQLite), which may be earlier
+# than the start of a refresh that doesn't see the review yet. Rankings
+# are saved as refreshed this much earlier, so such titles are ranked
+# again by the next refresh.
+REFRESH_MARGIN = timedelta(seconds=5)
+
+# (title id, weighted rating, trending)
+Ranking = Tuple[int, float, float]
+
+# Trending value of a title is log2 of the sum of its review weights.
+# A review weighs score / 10 when published and its weight halves every
+# TRENDING_HALF_LIFE_HOURS. Exponents are counted from Unix epoch, so
+# stored values don't decay and titles refreshed at different times
+# stay comparable, trending_score() gives the weight sum at given time.
+
+
+def half_life() -> float:
+    return settings.TRENDING_HALF_LIFE_HOURS * 3600
+
+
+def trending_score(trending: float, moment: datetime) -> float:
+    """Sum of review weights of a title at the moment."""
+    return 2 ** (trending - moment.timestamp() / half_life())
+
+
+def prior_mean() -> float:
+    """Mean score of all reviews, weighted ratings are pulled to it."""
+    totals = Title.objects.aggregate(sum=Sum('rating_sum'),
+                                     count=Sum('rating_count'))
+    if not totals['count']:
+        return 0.0
+    return totals['sum'] / totals['count']
+
+
+class ReviewColumns(NamedTuple):
+    """Reviews as typed arrays, one item per review."""
+    title_ids: array
+    scores: array
+    # publication time in half-lives since epoch
+    exponents: array
+
+
+def load_reviews(title_ids: Optional[Iterable[int]] = None
+                 ) -> ReviewColumns:
+    """Reviews of given titles (all when None) read in chunks."""
+    reviews = Review.objects.order_by()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+    columns = ReviewColumns(array('q'), array('d'), array('d'))
+    period = half_life()
+    for title_id, score, pub_date in (reviews
+                                      .values_list('title_id', 'score',
+                                                   'pub_date')
+                                      .iterator(chunk_size=CHUNK_SIZE)):
+        columns.title_ids.append(title_id)
+        columns.scores.append(score)
+        columns.exponents.append(pub_date.timestamp() / period)
+    return columns
+
+
+def rank_with_numpy(columns: ReviewColumns, prior: float,
+                    prior_count: int) -> Iterator[Ranking]:
+    title_ids = numpy.frombuffer(columns.title_ids, dtype=numpy.int64)
+    scores = numpy.frombuffer(columns.scores, dtype=numpy.float64)
+    exponents = numpy.frombuffer(columns.exponents, dtype=numpy.float64)
+    ids, index = numpy.unique(title_ids, return_inverse=True)
+    counts = numpy.bincount(index, minlength=len(ids))
+    sums = numpy.bincount(index, weights=scores, minlength=len(ids))
+    weighted = (sums + prior * prior_count) / (counts + prior_count)
+    # weights are summed relative to the latest review of every title,
+    # so old reviews underflow to zero instead of recent ones overflow
+    peaks = numpy.full(len(ids), -numpy.inf)
+    numpy.maximum.at(peaks, index, exponents)
+    weights = scores / SCORES[-1] * numpy.exp2(exponents - peaks[index])
+    trending = peaks + numpy.log2(
+        numpy.bincount(index, weights=weights, minlength=len(ids)))
+    return zip(ids.tolist(), weighted.tolist(), trending.tolist())
+
+
+def rank_with_python(columns: ReviewColumns, prior: float,
+                     prior_count: int) -> Iterator[Ranking]:
+    reviews = defaultdict(list)
+    for title_id, score, exponent in zip(*columns):
+        reviews[title_id].append((score, exponent))
+    for title_id in sorted(reviews):
+        items = reviews[title_id]
+        peak = max(exponent for _, exponent in items)
+        weights = sum(score / SCORES[-1] * 2 ** (exponent - peak)
+                      for score, exponent in items)
+        yield (title_id,
+               (sum(score for score, _ in items) + prior * prior_count)
+               / (len(items) + prior_count),
+               peak + math.log2(weights))
+
+
+def rank_reviews(columns: ReviewColumns, prior: float) -> Iterator[Ranking]:
+    """Bayesian weighted rating and trending value of reviewed titles.
+
+    Weighted rating is the mean score of a title with
+    RANKING_PRIOR_REVIEWS reviews of prior score added, so titles with
+    a few reviews don't top the leaderboard. Computed with NumPy when
+    it is installed.
+    """
+    rank = rank_with_python if numpy is None else rank_with_numpy
+    return rank(columns, prior, settings.RANKING_PRIOR_REVIEWS)
+
+
+def save_rankings(rankings: Iterable[Ranking], refreshed_at: datetime,
+                  title_ids: Optional[List[int]] = None) -> int:
+    """Replace rankings of given titles (all when None).
+
+    Returns number of saved rankings.
+    """
+    rows = [TitleRanking(title_id=title_id, weighted_rating=weighted,
+                         trending=trending, refreshed_at=refreshed_at)
+            for title_id, weighted, trending in rankings]
+    with transaction.atomic():
+        stale = TitleRanking.objects.all()
+        if title_ids is not None:
+            stale = stale.filter(title_id__in=title_ids)
+        stale.delete()
+        TitleRanking.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        bulk_saved.send(sender=TitleRanking, pks=[row.pk for row in rows])
+    return len(rows)
+
+
+def refresh_started_at() -> datetime:
+    """Refresh time saved with rankings computed from now on."""
+    return timezone.now() - REFRESH_MARGIN
+
+
+def rebuild_rankings() -> int:
+    """Rank all reviewed titles, returns number of ranked titles."""
+    started = refresh_started_at()
+    return save_rankings(rank_reviews(load_reviews(), prior_mean()),
+                         started)
+
+
+def stale_title_ids() -> List[int]:
+    """Titles reviewed or changed after their ranking was saved."""
+    return list(Title.objects
+                .filter(Q(ranking__isnull=True, rating_count__gt=0)
+                        | Q(ranking__refreshed_at__lt=F('updated_at')))
+                .values_list('pk', flat=True))
+
+
+def refresh_rankings() -> int:
+    """Rank titles with new or removed reviews since the last refresh,
+    returns number of refreshed titles.
+
+    Prior mean is recalculated, but rankings of other titles keep the
+    old one until the next rebuild.
+    """
+    started = refresh_started_at()
+    title_ids = stale_title_ids()
+    if not title_ids:
+        return 0
+    save_rankings(rank_reviews(load_reviews(title_ids), prior_mean()),
+                  started, title_ids)
+    return len(title_ids)
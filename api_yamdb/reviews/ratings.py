@@ -0,0 +1,112 @@
+from typing import Dict, List
+
+from django.db.models import (Avg, Count, F, FloatField, OuterRef, Q, Subquery,
+                              Sum, Value)
+from django.db.models.functions import Cast, Coalesce, Now, NullIf
+
+from .models import SCORE_COUNT_FIELDS, SCORES, Review, Title
+
+
+def apply_score_change(title_id: int, score_counts: Dict[int, int],
+                       **changes):
+    """Shift stored title rating and score histogram by the numbers of
+    added (positive) or removed (negative) reviews per score, other
+    title fields may be updated by the same statement (changes).
+
+    Single UPDATE statement, so concurrent review writes never lose
+    increments. Right-hand side expressions see the old column values,
+    that is why the deltas are repeated in the average calculation.
+    """
+    score_delta = sum(score * count for score, count in score_counts.items())
+    count_delta = sum(score_counts.values())
+    new_sum = F('rating_sum') + Value(score_delta)
+    new_count = F('rating_count') + Value(count_delta)
+    histogram = {name: F(name) + Value(score_counts[score])
+                 for score, name in zip(SCORES, SCORE_COUNT_FIELDS)
+                 if score_counts.get(score)}
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=Cast(new_sum, FloatField()) / NullIf(new_count, Value(0)),
+        updated_at=Now(),
+        **histogram,
+        **changes,
+    )
+
+
+def _title_reviews():
+    return (Review.objects
+            .filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title'))
+
+
+def actual_rating_expressions():
+    """Correlated subqueries computing rating values from reviews table."""
+    reviews = _title_reviews()
+    return {
+        'rating_sum': Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')),
+            0),
+        'rating_count': Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value')),
+            0),
+        'rating': Subquery(
+            reviews.annotate(value=Avg('score')).values('value'),
+            output_field=FloatField()),
+        **{name: Coalesce(
+            Subquery(reviews.annotate(value=Count(
+                'pk', filter=Q(score=score))).values('value')),
+            0) for score, name in zip(SCORES, SCORE_COUNT_FIELDS)},
+    }
+
+
+def rebuild_ratings(queryset=None):
+    """Recalculate stored rating for all titles in queryset.
+
+    Returns number of updated titles.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(**actual_rating_expressions())
+
+
+def find_rating_drift(queryset=None):
+    """Titles whose stored rating doesn't match their reviews."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    expressions = actual_rating_expressions()
+    return (queryset
+            .annotate(actual_sum=expressions['rating_sum'],
+                      actual_count=expressions['rating_count'],
+                      **{f'actual_{name}': expressions[name]
+                         for name in SCORE_COUNT_FIELDS})
+            .exclude(rating_sum=F('actual_sum'),
+                     rating_count=F('actual_count'),
+                     **{name: F(f'actual_{name}')
+                        for name in SCORE_COUNT_FIELDS})
+            .order_by('id'))
+
+
+def score_summary(histogram: List[int]) -> dict:
+    """Count, mean, median and distribution of scores in histogram."""
+    count = sum(histogram)
+    mean = median = None
+    if count:
+        mean = sum(score * number
+                   for score, number in zip(SCORES, histogram)) / count
+        middle = []
+        seen = 0
+        for score, number in zip(SCORES, histogram):
+            seen += number
+            # 0-based positions of the middle elements in sorted scores
+            middle.extend(score for position in {(count - 1) // 2,
+                                                 count // 2}
+                          if seen - number <= position < seen)
+        median = sum(middle) / len(middle)
+    return {
+        'count': count,
+        'mean': mean,
+        'median': median,
+        'distribution': dict(zip(SCORES, histogram)),
+    }
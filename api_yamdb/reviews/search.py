@@ -0,0 +1,177 @@
+import difflib
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connection
+from django.db.models import (Case, F, OuterRef, Q, QuerySet, Subquery, Value,
+                              When)
+
+from .models import Category, Title
+from .stamps import get_stamp
+
+SEARCH_CONFIG = 'simple'
+MAX_RESULTS = 1000
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def uses_postgres() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def title_search_vector():
+    """tsvector of title: name (A), genres and category (B),
+    description (C). Built from subqueries, so it can be used in
+    UPDATE statements.
+    """
+    genres = (Title.genre.through.objects
+              .filter(title=OuterRef('pk'))
+              .order_by()
+              .values('title')
+              .annotate(names=StringAgg('genre__name', ' '))
+              .values('names'))
+    category = Category.objects.filter(
+        pk=OuterRef('category_id')).values('name')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Subquery(genres), Subquery(category),
+                       weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset: QuerySet = None) -> int:
+    """Recalculate stored tsvector of titles, no-op outside Postgres."""
+    if not uses_postgres():
+        return 0
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(search_vector=title_search_vector())
+
+
+def prefix_query(text: str) -> SearchQuery:
+    """Every word of the text as a prefix: 'star wa' -> star:* & wa:*"""
+    terms = ' & '.join(f'{token}:*' for token in tokenize(text))
+    return SearchQuery(terms, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_titles_postgres(queryset: QuerySet, text: str) -> QuerySet:
+    query = prefix_query(text)
+    return (queryset
+            .annotate(search_rank=SearchRank(F('search_vector'), query)
+                      + TrigramSimilarity('name', text))
+            .filter(Q(search_vector=query) | Q(name__trigram_similar=text))
+            .order_by('-search_rank', 'id'))
+
+
+class TitleSearchIndex:
+    """In-process inverted index of titles for databases without
+    full-text search. Rebuilt when 'titles' change stamp moves, which
+    title, genre and category writes bump; review writes leave it.
+    Field weights follow tsvector weights used on Postgres.
+    """
+    weights = {'name': 1.0, 'genre': 0.4, 'category': 0.4,
+               'description': 0.2}
+
+    def __init__(self) -> None:
+        self.version = None
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.tokens: List[str] = []
+
+    def add(self, postings, title_id: int, field: str, text: str):
+        for token in tokenize(text):
+            scores = postings[token]
+            scores[title_id] = max(scores[title_id], self.weights[field])
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+        titles = Title.objects.values_list(
+            'id', 'name', 'description', 'category__name')
+        for title_id, name, description, category in titles.iterator():
+            self.add(postings, title_id, 'name', name)
+            self.add(postings, title_id, 'category', category)
+            self.add(postings, title_id, 'description', description)
+        genres = Title.genre.through.objects.values_list(
+            'title_id', 'genre__name')
+        for title_id, genre in genres.iterator():
+            self.add(postings, title_id, 'genre', genre)
+        self.postings = {token: dict(scores)
+                         for token, scores in postings.items()}
+        self.tokens = sorted(self.postings)
+
+    def refresh(self):
+        version, _ = get_stamp('titles')
+        if version != self.version:
+            self.build()
+            self.version = version
+
+    def expand(self, term: str) -> List[str]:
+        """Index tokens starting with term, or close to it for typos."""
+        position = bisect_left(self.tokens, term)
+        matches = []
+        while (position < len(self.tokens)
+               and self.tokens[position].startswith(term)):
+            matches.append(self.tokens[position])
+            position += 1
+        return matches or difflib.get_close_matches(
+            term, self.tokens, n=3, cutoff=0.75)
+
+    def term_scores(self, term: str) -> Dict[int, float]:
+        scores = defaultdict(float)
+        for token in self.expand(term):
+            for title_id, weight in self.postings[token].items():
+                scores[title_id] = max(scores[title_id], weight)
+        return scores
+
+    def search(self, text: str,
+               limit: int = MAX_RESULTS) -> List[Tuple[int, float]]:
+        """Ids of titles matching every word of text, best first."""
+        self.refresh()
+        ranked = None
+        for term in tokenize(text):
+            scores = self.term_scores(term)
+            if ranked is None:
+                ranked = scores
+            else:
+                ranked = {title_id: rank + scores[title_id]
+                          for title_id, rank in ranked.items()
+                          if title_id in scores}
+        if not ranked:
+            return []
+        return sorted(ranked.items(),
+                      key=lambda item: (-item[1], item[0]))[:limit]
+
+
+title_search_index = TitleSearchIndex()
+
+
+def search_titles_in_memory(queryset: QuerySet, text: str) -> QuerySet:
+    found = title_search_index.search(text)
+    if not found:
+        return queryset.none()
+    ordering = Case(*[When(pk=title_id, then=Value(position))
+                      for position, (title_id, _) in enumerate(found)],
+                    default=Value(len(found)))
+    return (queryset
+            .filter(pk__in=[title_id for title_id, _ in found])
+            .order_by(ordering, 'id'))
+
+
+def search_titles(queryset: QuerySet, text: str) -> QuerySet:
+    """Titles matching text by name, description, genre or category,
+    ordered by relevance. Words match as prefixes, small typos in
+    names are tolerated.
+    """
+    if not tokenize(text):
+        return queryset.none()
+    if uses_postgres():
+        return search_titles_postgres(queryset, text)
+    return search_titles_in_memory(queryset, text)
@@ -0,0 +1,223 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .bulk import bulk_saved
+from .counters import (apply_comment_change, later_review_date,
+                       latest_review_date)
+from .models import Category, Comment, Genre, Review, Title
+from .ratings import apply_score_change
+from .search import update_search_vectors
+from .stamps import bump_stamps
+from .suggest import REMOVED_STAMP, title_suggest_index
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance: Review, raw, **kwargs):
+    instance._previous_rating = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_rating = (Review.objects
+                                 .filter(pk=instance.pk)
+                                 .values_list('title_id', 'score')
+                                 .first())
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance: Review, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is None:
+        apply_score_change(instance.title_id, {instance.score: 1},
+                           last_review_at=later_review_date(
+                               instance.pub_date))
+        return
+
+    previous_title_id, previous_score = previous
+    if previous_title_id != instance.title_id:
+        apply_score_change(previous_title_id, {previous_score: -1},
+                           last_review_at=latest_review_date(
+                               previous_title_id))
+        apply_score_change(instance.title_id, {instance.score: 1},
+                           last_review_at=later_review_date(
+                               instance.pub_date))
+    elif previous_score != instance.score:
+        apply_score_change(instance.title_id,
+                           {previous_score: -1, instance.score: 1})
+
+
+@receiver(post_delete, sender=Review)
+def update_title_rating_on_delete(sender, instance: Review, **kwargs):
+    apply_score_change(instance.title_id, {instance.score: -1},
+                       last_review_at=latest_review_date(instance.title_id))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_review_stamps(sender, instance: Review, **kwargs):
+    # titles list validators follow updated_at of titles, which rating
+    # updates move, so the shared 'titles' stamp is left alone
+    bump_stamps(f'reviews:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+def update_review_counters_on_save(sender, instance: Comment, created, raw,
+                                   **kwargs):
+    if raw or not created:
+        bump_stamps(f'comments:{instance.review_id}')
+        return
+    title_id = apply_comment_change(instance.review_id, 1, instance.pub_date)
+    bump_stamps(f'comments:{instance.review_id}', f'reviews:{title_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def update_review_counters_on_delete(sender, instance: Comment, **kwargs):
+    title_id = apply_comment_change(instance.review_id, -1)
+    keys = [f'comments:{instance.review_id}']
+    if title_id is not None:
+        keys.append(f'reviews:{title_id}')
+    bump_stamps(*keys)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance: User, raw, update_fields,
+                               **kwargs):
+    instance._previous_username = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._previous_username = (User.objects
+                                   .filter(pk=instance.pk)
+                                   .values_list('username', flat=True)
+                                   .first())
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_author_lists(sender, instance: User, raw, **kwargs):
+    # review and comment lists show author username
+    previous = getattr(instance, '_previous_username', None)
+    if raw or previous is None or previous == instance.username:
+        return
+    reviews = Review.objects.filter(author=instance)
+    comments = Comment.objects.filter(author=instance)
+    keys = [f'reviews:{title_id}' for title_id in
+            reviews.order_by().values_list('title_id', flat=True).distinct()]
+    keys += [f'comments:{review_id}' for review_id in
+             comments.order_by().values_list('review_id', flat=True)
+             .distinct()]
+    reviews.update(updated_at=Now())
+    comments.update(updated_at=Now())
+    bump_stamps(*keys)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def bump_title_stamps(sender, instance: Title, **kwargs):
+    bump_stamps('titles')
+
+
+@receiver(post_save, sender=Title)
+def update_title_search_vector(sender, instance: Title, raw, **kwargs):
+    if raw:
+        return
+    update_search_vectors(Title.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Title)
+def update_title_suggestions(sender, instance: Title, raw, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: title_suggest_index.update_titles(
+        Title.objects.filter(pk=instance.pk)))
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_suggestions(sender, instance: Title, **kwargs):
+    bump_stamps(REMOVED_STAMP)
+    title_id = instance.pk
+    transaction.on_commit(lambda: title_suggest_index.remove(title_id))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genres_change(sender, instance, action, pk_set,
+                                  **kwargs):
+    if isinstance(instance, Title):
+        if not action.startswith('post_'):
+            return
+        titles = Title.objects.filter(pk=instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        titles = Title.objects.filter(pk__in=pk_set)
+    elif action == 'pre_clear':
+        titles = Title.objects.filter(genre=instance)
+    else:
+        return
+    titles.update(updated_at=Now())
+    if action != 'pre_clear':
+        update_search_vectors(titles)
+    bump_stamps('titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance: Genre, **kwargs):
+    Title.objects.filter(genre=instance).update(updated_at=Now())
+    bump_stamps('titles')
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance: Category, **kwargs):
+    Title.objects.filter(category=instance).update(updated_at=Now())
+    bump_stamps('titles')
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Category)
+def remember_related_titles(sender, instance, **kwargs):
+    # relations are gone after delete, collect titles while they exist
+    field = 'genre' if sender is Genre else 'category'
+    instance._title_ids = list(Title.objects
+                               .filter(**{field: instance})
+                               .values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def update_related_search_vectors(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    title_ids = getattr(instance, '_title_ids', None)
+    if title_ids is not None:
+        titles = Title.objects.filter(pk__in=title_ids)
+    elif sender is Genre:
+        titles = Title.objects.filter(genre=instance)
+    else:
+        titles = Title.objects.filter(category=instance)
+    update_search_vectors(titles)
+
+
+@receiver(bulk_saved, sender=Title)
+def update_bulk_saved_titles(sender, pks, **kwargs):
+    update_search_vectors(Title.objects.filter(pk__in=pks))
+    bump_stamps('titles')
+    transaction.on_commit(lambda: title_suggest_index.update_titles(
+        Title.objects.filter(pk__in=pks)))
+
+
+@receiver(bulk_saved, sender=Genre)
+@receiver(bulk_saved, sender=Category)
+def touch_bulk_saved_titles(sender, pks, **kwargs):
+    field = 'genre__in' if sender is Genre else 'category__in'
+    titles = Title.objects.filter(**{field: pks})
+    titles.update(updated_at=Now())
+    update_search_vectors(titles)
+    bump_stamps('titles')
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet, Subquery
+from django.db.models.functions import Now
+from django.dispatch import Signal
+
+from .models import ChangeStamp
+
+# Sent by touch_all_stamps(), any collection may have been changed.
+stamps_touched = Signal()
+
+
+def bump_stamps(*keys: str):
+    """Increase version of every given collection.
+
+    Existing stamps are bumped with one UPDATE, missing ones created.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    stamps = ChangeStamp.objects.filter(key__in=keys)
+    if stamps.update(version=F('version') + 1, modified=Now()) == len(keys):
+        return
+    keys.difference_update(stamps.values_list('key', flat=True))
+    for key in sorted(keys):
+        try:
+            with transaction.atomic():
+                ChangeStamp.objects.create(key=key)
+        except IntegrityError:
+            ChangeStamp.objects.filter(key=key).update(
+                version=F('version') + 1, modified=Now())
+
+
+def touch_all_stamps():
+    """Bump every collection after bulk changes made without signals."""
+    ChangeStamp.objects.update(version=F('version') + 1, modified=Now())
+    stamps_touched.send(sender=ChangeStamp)
+
+
+def get_stamp(key: str, updated: Optional[QuerySet] = None
+              ) -> Tuple[int, Optional[datetime]]:
+    """Collection version and its last change date.
+
+    Collections without stamp row were not changed since stamps
+    were introduced, they get version 0 and unknown change date.
+    Rows of updated queryset (with updated_at field) changed later
+    than the stamp move the change date, read in the same query.
+    """
+    stamps = ChangeStamp.objects.filter(key=key)
+    if updated is not None:
+        row = (updated
+               .order_by('-updated_at')
+               .annotate(version=Subquery(stamps.values('version')),
+                         modified=Subquery(stamps.values('modified')))
+               .values_list('version', 'modified', 'updated_at')
+               .first())
+        if row is not None:
+            version, modified, latest = row
+            return version or 0, max(filter(None, (modified, latest)))
+    stamp = stamps.values_list('version', 'modified').first()
+    return stamp or (0, None)
@@ -0,0 +1,214 @@
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import ChangeStamp, Title
+
+logger = logging.getLogger(__name__)
+
+SCAN_LIMIT = 5000
+SYNC_MARGIN = timedelta(seconds=5)
+REMOVED_STAMP = 'titles:removed'
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lower case words without accents and punctuation."""
+    text = unicodedata.normalize('NFKD', text or '').lower()
+    chars = (char if char.isalnum() else ' '
+             for char in text if not unicodedata.combining(char))
+    return ' '.join(''.join(chars).split())
+
+
+def suggest_keys(name: str, genres: Iterable[str],
+                 category: Optional[str]) -> Tuple[str, ...]:
+    """Strings a title is found by: name starting at any word,
+    names of its genres and category.
+    """
+    words = normalize(name).split()
+    keys = {' '.join(words[position:]) for position in range(len(words))}
+    keys.update(normalize(genre) for genre in genres)
+    keys.add(normalize(category))
+    keys.discard('')
+    return tuple(sorted(keys))
+
+
+class Suggestion(NamedTuple):
+    id: int
+    name: str
+    year: int
+    rating: Optional[float]
+    keys: Tuple[str, ...]
+
+    @property
+    def rank(self) -> Tuple[float, int]:
+        rating = -1 if self.rating is None else self.rating
+        return rating, -self.id
+
+
+class TitleSuggestIndex:
+    """Prefix index of titles kept in process memory.
+
+    Keys are stored in a sorted array, so lookup is a bisect plus
+    a scan of the matching range. Short prefixes matching huge ranges
+    walk titles in rating order instead. Titles saved or deleted in
+    this process are applied at once by signals, changes made by
+    other processes are picked up from updated_at of titles (removals
+    from change stamps) at most every SUGGEST_SYNC_INTERVAL seconds,
+    so lookups don't query the database.
+    Rating order of the walk is refreshed on the same schedule.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.titles: Dict[int, Suggestion] = {}
+        self.keys: List[str] = []
+        self.ids = array('q')
+        self.ranked: List[int] = []
+        self.ranked_dirty = False
+        self.stamps: Dict[str, int] = {}
+        self.synced_at: Optional[datetime] = None
+        self.checked = 0.0
+
+    def read_stamps(self) -> Dict[str, int]:
+        return dict(ChangeStamp.objects
+                    .filter(key=REMOVED_STAMP)
+                    .values_list('key', 'version'))
+
+    def fetch(self, titles) -> List[Suggestion]:
+        rows = list(titles.values_list(
+            'id', 'name', 'year', 'rating', 'category__name'))
+        genres = defaultdict(list)
+        links = Title.genre.through.objects.filter(
+            title_id__in=titles.values('id')).values_list(
+            'title_id', 'genre__name')
+        for title_id, genre in links.iterator():
+            genres[title_id].append(genre)
+        return [Suggestion(title_id, name, year, rating,
+                           suggest_keys(name, genres[title_id], category))
+                for title_id, name, year, rating, category in rows]
+
+    def load(self):
+        """Read all titles, called at worker startup."""
+        with self.lock:
+            stamps = self.read_stamps()
+            synced_at = timezone.now()
+            suggestions = self.fetch(Title.objects.all())
+            pairs = sorted((key, suggestion.id)
+                           for suggestion in suggestions
+                           for key in suggestion.keys)
+            self.titles = {suggestion.id: suggestion
+                           for suggestion in suggestions}
+            self.keys = [key for key, _ in pairs]
+            self.ids = array('q', (title_id for _, title_id in pairs))
+            self.rank_titles()
+            self.stamps = stamps
+            self.synced_at = synced_at
+            self.checked = time.monotonic()
+            self.loaded = True
+
+    def warm_up(self):
+        try:
+            self.load()
+        except DatabaseError:
+            logger.exception('Title suggestions are not preloaded')
+
+    def rank_titles(self):
+        self.ranked = sorted(self.titles,
+                             key=lambda title_id: self.titles[title_id].rank,
+                             reverse=True)
+        self.ranked_dirty = False
+
+    def remove(self, title_id: int):
+        with self.lock:
+            suggestion = self.titles.pop(title_id, None)
+            if suggestion is None:
+                return
+            for key in suggestion.keys:
+                position = bisect_left(self.keys, key)
+                while self.ids[position] != title_id:
+                    position += 1
+                del self.keys[position]
+                del self.ids[position]
+            self.ranked_dirty = True
+
+    def put(self, suggestion: Suggestion):
+        with self.lock:
+            self.remove(suggestion.id)
+            self.titles[suggestion.id] = suggestion
+            for key in suggestion.keys:
+                position = bisect_right(self.keys, key)
+                self.keys.insert(position, key)
+                self.ids.insert(position, suggestion.id)
+            self.ranked_dirty = True
+
+    def update_titles(self, titles):
+        """Re-read given titles queryset, used by model signals."""
+        if not self.loaded:
+            return
+        with self.lock:
+            for suggestion in self.fetch(titles):
+                self.put(suggestion)
+
+    def sync(self):
+        """Apply changes made by other processes."""
+        interval = settings.SUGGEST_SYNC_INTERVAL
+        if time.monotonic() - self.checked < interval:
+            return
+        with self.lock:
+            self.checked = time.monotonic()
+            stamps = self.read_stamps()
+            if stamps.get(REMOVED_STAMP) != self.stamps.get(REMOVED_STAMP):
+                self.load()
+                return
+            # ratings move updated_at of titles but not the stamps
+            synced_at = timezone.now()
+            self.update_titles(Title.objects.filter(
+                updated_at__gte=self.synced_at - SYNC_MARGIN))
+            self.stamps = stamps
+            self.synced_at = synced_at
+            if self.ranked_dirty:
+                self.rank_titles()
+
+    def suggest(self, text: str, limit: int) -> List[Suggestion]:
+        """Best rated titles with a key starting with text."""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        if not self.loaded:
+            self.load()
+        else:
+            self.sync()
+        # put() and remove() shift keys and ids in place
+        with self.lock:
+            start = bisect_left(self.keys, prefix)
+            # first string greater than every string starting with prefix
+            end = bisect_left(self.keys,
+                              prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+            if end - start <= SCAN_LIMIT:
+                found = {self.titles[title_id]
+                         for title_id in self.ids[start:end]}
+                return heapq.nlargest(limit, found,
+                                      key=lambda suggestion: suggestion.rank)
+            found = []
+            for title_id in self.ranked:
+                suggestion = self.titles.get(title_id)
+                if suggestion is not None and any(
+                        key.startswith(prefix) for key in suggestion.keys):
+                    found.append(suggestion)
+                    if len(found) == limit:
+                        break
+            return found
+
+
+title_suggest_index = TitleSuggestIndex()
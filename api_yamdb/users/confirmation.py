@@ -0,0 +1,70 @@
+import secrets
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import ConfirmationCode, User
+
+HASH_SALT = 'users.confirmation.ConfirmationCode'
+
+
+def hash_code(user_id: int, code: str) -> str:
+    """Keyed hash of the code, short numeric codes stored as plain hashes
+    would be recovered by trying all of them.
+    """
+    return salted_hmac(HASH_SALT, f'{user_id}:{code}',
+                       algorithm='sha256').hexdigest()
+
+
+def issue_code(user: User) -> str:
+    """Generate a new code for user, previous code stops working."""
+    code = str(secrets.randbelow(10 ** settings.CONFIRMATION_CODE_LENGTH))
+    code = code.zfill(settings.CONFIRMATION_CODE_LENGTH)
+    ConfirmationCode.objects.update_or_create(
+        user=user,
+        defaults={
+            'code_hash': hash_code(user.pk, code),
+            'expires_at': timezone.now() + settings.CONFIRMATION_CODE_TTL,
+            'attempts': 0,
+        })
+    return code
+
+
+def has_valid_code(user: User) -> bool:
+    """Whether the code sent to user can still be exchanged for a token,
+    the code row is locked until the end of transaction.
+    """
+    return (ConfirmationCode.objects
+            .select_for_update()
+            .filter(user=user,
+                    expires_at__gt=timezone.now(),
+                    attempts__lt=settings.CONFIRMATION_CODE_MAX_ATTEMPTS)
+            .exists())
+
+
+def check_code(user: User, code: str) -> bool:
+    """Check code of user loaded with select_related('confirmation_code').
+
+    Matching code is used up, failed attempts are counted and the code
+    is rejected after CONFIRMATION_CODE_MAX_ATTEMPTS of them.
+    """
+    try:
+        confirmation = user.confirmation_code
+    except ConfirmationCode.DoesNotExist:
+        return False
+    if (confirmation.attempts >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS
+            or confirmation.expires_at <= timezone.now()):
+        return False
+    if constant_time_compare(confirmation.code_hash,
+                             hash_code(user.pk, code)):
+        # only one of concurrent requests with the same code deletes it
+        deleted, _ = ConfirmationCode.objects.filter(
+            pk=confirmation.pk, code_hash=confirmation.code_hash).delete()
+        return bool(deleted)
+    ConfirmationCode.objects.filter(
+        pk=confirmation.pk,
+        attempts__lt=settings.CONFIRMATION_CODE_MAX_ATTEMPTS,
+    ).update(attempts=F('attempts') + 1)
+    return False
@@ -0,0 +1,109 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from users.confirmation import issue_code
+from users.models import User
+
+USERNAME_PREFIX = 'benchmark-token-'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def exchange_codes(credentials: List[Tuple[str, str]]):
+    """Worker task, exchanges codes one by one and returns latencies
+    with number of failed requests.
+    """
+    client = Client()
+    latencies = []
+    errors = 0
+    try:
+        for username, code in credentials:
+            started = time.perf_counter()
+            response = client.post(
+                TOKEN_URL,
+                {'username': username, 'confirmation_code': code},
+                content_type='application/json')
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+    finally:
+        connections.close_all()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = ('Measure auth/token/ latency under concurrent load, '
+            'rate limits are disabled during the run')
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--requests',
+                            type=int,
+                            default=1000,
+                            help='Codes exchanged, one user per code')
+        parser.add_argument('--concurrency',
+                            type=int,
+                            default=8,
+                            help='Clients sending requests at once')
+        parser.add_argument('--confirm',
+                            action='store_true',
+                            help='Confirm creating and deleting benchmark '
+                                 'users in the configured database')
+
+    def create_credentials(self, count: int) -> List[Tuple[str, str]]:
+        benchmark_users = User.objects.filter(
+            username__startswith=USERNAME_PREFIX)
+        User.objects.bulk_create(
+            User(username=f'{USERNAME_PREFIX}{number}',
+                 email=f'{USERNAME_PREFIX}{number}@yamdb.fake')
+            for number in range(count))
+        # bulk_create doesn't set primary keys on every database
+        return [(user.username, issue_code(user))
+                for user in benchmark_users.order_by('id')]
+
+    def run(self, credentials, concurrency):
+        chunks = [credentials[number::concurrency]
+                  for number in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(exchange_codes, chunks))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency for chunk_latencies, _ in results
+                           for latency in chunk_latencies)
+        errors = sum(chunk_errors for _, chunk_errors in results)
+        return latencies, errors, elapsed
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError(
+                f'benchmark_token creates and deletes users in database '
+                f'{connections["default"].settings_dict["NAME"]}, '
+                f'pass --confirm to run it')
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        credentials = self.create_credentials(options['requests'])
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+        try:
+            with override_settings(REST_FRAMEWORK=rates):
+                latencies, errors, elapsed = self.run(
+                    credentials, options['concurrency'])
+        finally:
+            User.objects.filter(
+                username__startswith=USERNAME_PREFIX).delete()
+        self.stdout.write(
+            f'{len(latencies)} requests, concurrency '
+            f'{options["concurrency"]}, {errors} failed, '
+            f'{len(latencies) / elapsed:.0f} requests/s')
+        self.stdout.write(', '.join(
+            f'{name} {percentile(latencies, fraction) * 1000:.1f} ms'
+            for name, fraction in (('p50', 0.5), ('p95', 0.95),
+                                   ('p99', 0.99), ('max', 1))))
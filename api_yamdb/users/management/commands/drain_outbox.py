@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from users.outbox import drain_outbox
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from outbox'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument('--batch-size',
+                            type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Messages sent over one connection')
+        parser.add_argument('--loop',
+                            action='store_true',
+                            help='Keep draining outbox as worker process')
+        parser.add_argument('--interval',
+                            type=float,
+                            default=1.0,
+                            help='Seconds to wait when outbox is empty')
+
+    def drain(self, batch_size: int) -> int:
+        """Send batches until no due messages are left."""
+        total = 0
+        while True:
+            sent, failed = drain_outbox(batch_size)
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            total += sent + failed
+            if sent + failed < batch_size:
+                return total
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.drain(options['batch_size'])
+            return
+        while True:
+            if not self.drain(options['batch_size']):
+                time.sleep(options['interval'])
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:32
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS users_user_username_trgm_idx '
+        'ON users_user USING gin (UPPER(username) gin_trgm_ops)')
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS users_user_username_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20230412_1926'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
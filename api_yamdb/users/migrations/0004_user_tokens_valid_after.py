@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_username_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='tokens_valid_after',
+            field=models.DateTimeField(db_index=True, editable=False, null=True, verbose_name='Access tokens issued earlier are re-checked'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_tokens_valid_after'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Recipient email')),
+                ('subject', models.CharField(max_length=255, verbose_name='Subject')),
+                ('body', models.TextField(verbose_name='Body')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Sender')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Queued at')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next attempt at')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Failed attempts')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last delivery error')),
+                ('sent_at', models.DateTimeField(null=True, verbose_name='Sent at')),
+                ('failed_at', models.DateTimeField(null=True, verbose_name='Given up at')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to=settings.AUTH_USER_MODEL, verbose_name='Recipient user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(condition=models.Q(('failed_at__isnull', True), ('sent_at__isnull', True)), fields=['next_attempt_at'], name='outbox_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['user', 'subject', 'created_at'], name='outbox_user_subject_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.2.18 on 2026-10-18 21:05
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+# expressions match SQL of iexact lookups, so they use these indexes
+UNIQUE_INDEXES = {
+    'users_user_username_upper_uniq': 'UPPER(username::text)',
+    'users_user_email_upper_uniq': 'UPPER(email::text)',
+}
+
+
+def find_case_duplicates(User):
+    """Usernames and emails shared by several users in different case."""
+    conflicts = []
+    for field in ('username', 'email'):
+        duplicates = (User.objects
+                      .values(upper=Upper(field))
+                      .annotate(count=Count('id'))
+                      .filter(count__gt=1)
+                      .values_list('upper', flat=True))
+        for value in duplicates:
+            values = (User.objects
+                      .filter(**{f'{field}__iexact': value})
+                      .order_by('id')
+                      .values_list(field, flat=True))
+            conflicts.append(f'{field}: {", ".join(values)}')
+    return conflicts
+
+
+def create_unique_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    conflicts = find_case_duplicates(apps.get_model('users', 'User'))
+    if conflicts:
+        raise RuntimeError(
+            'Users differing in case only block case-insensitive unique '
+            'indexes, rename or remove them and migrate again:\n'
+            + '\n'.join(conflicts))
+    for name, expression in UNIQUE_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {name} '
+            f'ON users_user ({expression})')
+
+
+def drop_unique_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in UNIQUE_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_unique_indexes, drop_unique_indexes),
+    ]
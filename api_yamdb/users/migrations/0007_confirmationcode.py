@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfirmationCode',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='confirmation_code', serialize=False, to='users.user', verbose_name='User')),
+                ('code_hash', models.CharField(max_length=64, verbose_name='Code hash')),
+                ('expires_at', models.DateTimeField(verbose_name='Expires at')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Failed attempts')),
+            ],
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -29,6 +30,12 @@ class User(AbstractUser):
         default=USER_ROLE_NAME,
         choices=AVAILABLE_USER_ROLES,
     )
+    tokens_valid_after = models.DateTimeField(
+        'Access tokens issued earlier are re-checked',
+        null=True,
+        editable=False,
+        db_index=True
+    )
 
     @property
     def is_admin(self):
@@ -41,3 +48,55 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == self.USER_ROLE_NAME
+
+
+class ConfirmationCode(models.Model):
+    """ Hashed one-time code exchanged for access token,
+    see users/confirmation.py.
+    """
+    user = models.OneToOneField(
+        User,
+        verbose_name='User',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='confirmation_code'
+    )
+    code_hash = models.CharField('Code hash', max_length=64)
+    expires_at = models.DateTimeField('Expires at')
+    attempts = models.PositiveSmallIntegerField('Failed attempts', default=0)
+
+
+class OutboxMessage(models.Model):
+    """ Email queued for delivery by drain_outbox command.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Recipient user',
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='outbox_messages'
+    )
+    recipient = models.EmailField('Recipient email')
+    subject = models.CharField('Subject', max_length=255)
+    body = models.TextField('Body')
+    from_email = models.CharField('Sender', max_length=255)
+    created_at = models.DateTimeField('Queued at', auto_now_add=True)
+    next_attempt_at = models.DateTimeField('Next attempt at',
+                                           default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Failed attempts', default=0)
+    last_error = models.TextField('Last delivery error', blank=True)
+    sent_at = models.DateTimeField('Sent at', null=True)
+    failed_at = models.DateTimeField('Given up at', null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'],
+                         name='outbox_pending_idx',
+                         condition=models.Q(sent_at__isnull=True,
+                                            failed_at__isnull=True)),
+            models.Index(fields=['user', 'subject', 'created_at'],
+                         name='outbox_user_subject_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {self.recipient}'
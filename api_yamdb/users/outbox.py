@@ -0,0 +1,143 @@
+from datetime import timedelta
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage, User
+
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def queue_email(user: User, subject: str, body: str,
+                from_email: str, resend: bool = False) -> OutboxMessage:
+    """Put email for user into outbox.
+
+    Repeated emails with the same subject within
+    OUTBOX_DEDUPE_WINDOW are merged: pending message gets the new body,
+    recently sent one is not sent again unless resend is set.
+    """
+    window_start = timezone.now() - settings.OUTBOX_DEDUPE_WINDOW
+    with transaction.atomic():
+        # user row lock serializes concurrent requests of the same user
+        User.objects.select_for_update().filter(pk=user.pk).first()
+        recent = (OutboxMessage.objects
+                  .select_for_update()
+                  .filter(user=user,
+                          subject=subject,
+                          created_at__gte=window_start,
+                          failed_at__isnull=True)
+                  .order_by('-created_at')
+                  .first())
+        if recent is None or (recent.sent_at is not None and resend):
+            return OutboxMessage.objects.create(
+                user=user, recipient=user.email, subject=subject,
+                body=body, from_email=from_email)
+        if recent.sent_at is None:
+            # a claimed message being sent now is sent once more
+            # with the new body, see save_results()
+            recent.recipient = user.email
+            recent.body = body
+            recent.next_attempt_at = timezone.now()
+            recent.save(update_fields=['recipient', 'body',
+                                       'next_attempt_at'])
+        return recent
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base delay doubled on every failed attempt."""
+    return min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+               MAX_BACKOFF)
+
+
+def record_failure(message: OutboxMessage, error: Exception, now):
+    message.attempts += 1
+    message.last_error = repr(error)
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.failed_at = now
+    else:
+        message.next_attempt_at = now + retry_delay(message.attempts)
+
+
+def deliver(messages: List[OutboxMessage]):
+    """Send messages over a single mail backend connection, record
+    delivery results on message objects.
+    """
+    now = timezone.now()
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for message in messages:
+            email = EmailMessage(message.subject, message.body,
+                                 message.from_email, [message.recipient],
+                                 connection=connection)
+            try:
+                email.send()
+            except Exception as error:
+                record_failure(message, error, now)
+            else:
+                message.sent_at = now
+    except Exception as error:
+        # connection failed, whole batch is retried later
+        for message in messages:
+            record_failure(message, error, now)
+    finally:
+        connection.close()
+
+
+def claim_messages(batch_size: int) -> List[OutboxMessage]:
+    """Take due messages for delivery.
+
+    Rows are locked with SKIP LOCKED and their next attempt is moved
+    OUTBOX_CLAIM_TIMEOUT ahead before commit, so other workers skip
+    them while they are sent, and a worker which died retries later.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(OutboxMessage.objects
+                        .select_for_update(skip_locked=True)
+                        .filter(sent_at__isnull=True,
+                                failed_at__isnull=True,
+                                next_attempt_at__lte=now)
+                        .order_by('next_attempt_at')[:batch_size])
+        OutboxMessage.objects.filter(
+            pk__in=[message.pk for message in messages]).update(
+            next_attempt_at=now + settings.OUTBOX_CLAIM_TIMEOUT)
+    return messages
+
+
+def save_results(messages: List[OutboxMessage]):
+    """Record delivery results. Message merged with a newer email by
+    queue_email() while it was sent stays pending.
+    """
+    with transaction.atomic():
+        for message in messages:
+            if message.sent_at is None:
+                fields = {'attempts': message.attempts,
+                          'last_error': message.last_error,
+                          'next_attempt_at': message.next_attempt_at,
+                          'failed_at': message.failed_at}
+            else:
+                fields = {'sent_at': message.sent_at}
+            OutboxMessage.objects.filter(
+                pk=message.pk, recipient=message.recipient,
+                body=message.body).update(**fields)
+
+
+def drain_outbox(batch_size: int) -> Tuple[int, int]:
+    """Deliver one batch of due messages.
+
+    Messages are claimed in a short transaction and sent after its
+    commit, so row locks are not held during SMTP round trips and
+    several workers can drain the outbox at once. Returns numbers of
+    sent and failed messages.
+    """
+    messages = claim_messages(batch_size)
+    if not messages:
+        return 0, 0
+    deliver(messages)
+    save_results(messages)
+    sent = sum(message.sent_at is not None for message in messages)
+    return sent, len(messages) - sent
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Set
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import User
+
+SYNC_MARGIN = timedelta(seconds=5)
+
+
+class RevokedUsers:
+    """ Per-process LRU of users whose access token claims are stale:
+        user id -> time of role change or removal. Tokens issued
+        before that time have to be checked against the database.
+
+        Changes made in this process are added by User signals,
+        changes made by other processes are read from
+        User.tokens_valid_after at most every
+        REVOKED_USERS_SYNC_INTERVAL seconds. Users removed by other
+        processes are found among users who sent requests since the
+        last sync. Entries pushed out of the LRU raise the floor,
+        tokens issued before it are all checked.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.revoked = OrderedDict()
+        self.floor = 0.0
+        self.seen: Set[int] = set()
+        self.synced_at = None
+        self.checked = 0.0
+
+    def revoke(self, user_id: int, revoked_at: float = None):
+        if revoked_at is None:
+            revoked_at = time.time()
+        with self.lock:
+            revoked_at = max(revoked_at, self.revoked.get(user_id, 0.0))
+            self.revoked[user_id] = revoked_at
+            self.revoked.move_to_end(user_id)
+            while len(self.revoked) > settings.REVOKED_USERS_MAX_SIZE:
+                _, evicted_at = self.revoked.popitem(last=False)
+                self.floor = max(self.floor, evicted_at)
+
+    def is_revoked(self, user_id: int, issued_at: float) -> bool:
+        self.sync()
+        self.seen.add(user_id)
+        if issued_at < self.floor:
+            return True
+        revoked_at = self.revoked.get(user_id)
+        return revoked_at is not None and issued_at < revoked_at
+
+    def sync(self):
+        if (time.monotonic() - self.checked
+                < settings.REVOKED_USERS_SYNC_INTERVAL):
+            return
+        self.checked = time.monotonic()
+        now = timezone.now()
+        if self.synced_at is None:
+            since = now - settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+        else:
+            since = self.synced_at - SYNC_MARGIN
+        seen, self.seen = self.seen, set()
+        found = set()
+        users = (User.objects
+                 .filter(Q(tokens_valid_after__gte=since) | Q(pk__in=seen))
+                 .values_list('pk', 'tokens_valid_after'))
+        for user_id, valid_after in users:
+            found.add(user_id)
+            if valid_after is not None and valid_after >= since:
+                self.revoke(user_id, valid_after.timestamp())
+        for user_id in seen - found:
+            self.revoke(user_id, now.timestamp())
+        self.synced_at = now
+
+
+revoked_users = RevokedUsers()
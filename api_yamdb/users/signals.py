@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import User
+from .revocations import revoked_users
+
+# claims embedded into access tokens, see api/authentication.py
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                      'is_active')
+
+
+@receiver(pre_save, sender=User)
+def detect_token_claims_change(sender, instance: User, raw, update_fields,
+                               **kwargs):
+    instance._claims_changed = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            TOKEN_CLAIM_FIELDS):
+        return
+    previous = (User.objects
+                .filter(pk=instance.pk)
+                .values_list(*TOKEN_CLAIM_FIELDS)
+                .first())
+    current = tuple(getattr(instance, field) for field in TOKEN_CLAIM_FIELDS)
+    if previous is not None and previous != current:
+        instance.tokens_valid_after = timezone.now()
+        instance._claims_changed = True
+
+
+@receiver(post_save, sender=User)
+def revoke_token_claims(sender, instance: User, update_fields, **kwargs):
+    if not getattr(instance, '_claims_changed', False):
+        return
+    if update_fields is not None:
+        # field is not in update_fields, so it wasn't saved
+        User.objects.filter(pk=instance.pk).update(
+            tokens_valid_after=instance.tokens_valid_after)
+    user_id = instance.pk
+    revoked_at = instance.tokens_valid_after.timestamp()
+    transaction.on_commit(lambda: revoked_users.revoke(user_id, revoked_at))
+
+
+@receiver(post_delete, sender=User)
+def revoke_removed_user(sender, instance: User, **kwargs):
+    user_id, revoked_at = instance.pk, timezone.now().timestamp()
+    transaction.on_commit(lambda: revoked_users.revoke(user_id, revoked_at))
@@ -1,9 +1,90 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def postgres_db(django_db_blocker, request):
+    """Test database for suites which need a running PostgreSQL server,
+    they are skipped when the server is not reachable.
+    """
+    from django.db import DatabaseError, connection
+
+    with django_db_blocker.unblock():
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            pytest.skip('PostgreSQL server is not available')
+    request.getfixturevalue('django_db_setup')
+
+
+@pytest.fixture(autouse=True)
+def throttle_cache(settings):
+    """Rate limits buckets are kept in memory and dropped after every
+    test, so repeated runs do not share them.
+    """
+    from django.core.cache import caches
+
+    settings.CACHES = {
+        **settings.CACHES,
+        settings.THROTTLE_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle-tests',
+        },
+    }
+    yield caches[settings.THROTTLE_CACHE_ALIAS]
+    caches[settings.THROTTLE_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def api_client():
+    """Builds API clients authorized by access tokens of given users,
+    anonymous ones without a user.
+    """
+    from api.authentication import RoleAccessToken
+    from rest_framework.test import APIClient
+
+    def make_client(user=None):
+        client = APIClient()
+        if user is not None:
+            token = RoleAccessToken.for_user(user)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    return make_client
+
+
+@pytest.fixture
+def create_catalog(postgres_db):
+    """Builds users and titles without genres and categories, users
+    are named user0, user1 and so on.
+    """
+    def create(users_count=2, titles_count=1):
+        from reviews.models import Title
+        from users.models import User
+
+        users = [User.objects.create(username=f'user{number}',
+                                     email=f'user{number}@yamdb.fake')
+                 for number in range(users_count)]
+        titles = [Title.objects.create(name=f'Title {number}', year=2000)
+                  for number in range(titles_count)]
+        return {'users': users, 'title': titles[0].pk,
+                'titles': [title.pk for title in titles]}
+
+    return create
+
+
+@pytest.fixture
+def catalog(create_catalog, transactional_db):
+    """Two users and a title, committed so counters and versions
+    bumped on commit are updated.
+    """
+    return create_catalog()
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def admin_client(postgres_db, transactional_db, api_client):
+    from users.models import User
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    admin = User.objects.create(username='admin', email='admin@yamdb.fake',
+                                role=User.ADMIN_ROLE_NAME)
+    return api_client(admin)
+
+
+@pytest.fixture
+def catalog(admin_client):
+    admin_client.post('/api/v1/genres/bulk/', [
+        {'name': f'Genre {number}', 'slug': f'genre-{number}'}
+        for number in range(3)], format='json')
+    admin_client.post('/api/v1/categories/bulk/', [
+        {'name': 'Movie', 'slug': 'movie'},
+        {'name': 'Book', 'slug': 'book'}], format='json')
+    return admin_client
+
+
+def title_items(count, **fields):
+    return [{'name': f'Bulk title {number}', 'year': 2000,
+             'category': 'movie', 'genre': ['genre-0', 'genre-1'],
+             **fields}
+            for number in range(count)]
+
+
+def post_ndjson(client, url, items):
+    return client.post(url, '\n'.join(json.dumps(item) for item in items),
+                       content_type='application/x-ndjson')
+
+
+class TestBulkEndpoints:
+
+    def test_slug_upsert(self, catalog):
+        response = catalog.post('/api/v1/genres/bulk/', [
+            {'name': 'Renamed', 'slug': 'genre-0'},
+            {'name': 'New', 'slug': 'genre-new'},
+            {'name': 'Broken', 'slug': 'not a slug'},
+        ], format='json')
+        assert response.status_code == 200
+        assert [result['status'] for result in response.json()] == [
+            'updated', 'created', 'error'], (
+            'Проверьте, что bulk/ возвращает результат для каждого объекта '
+            'в порядке запроса'
+        )
+        names = {genre['slug']: genre['name'] for genre in catalog.get(
+            '/api/v1/genres/').json()['results']}
+        assert names.get('genre-0') == 'Renamed'
+        assert 'genre-new' in names
+
+    def test_titles_ndjson(self, catalog):
+        from reviews.models import Title
+
+        response = post_ndjson(catalog, '/api/v1/titles/bulk/', [
+            *title_items(2),
+            {'name': 'Unknown genre', 'year': 2000, 'category': 'movie',
+             'genre': ['genre-404']},
+            {'name': 'Future', 'year': 3000, 'category': 'movie'},
+            {'id': 0, 'name': 'Missing'},
+        ])
+        assert response.status_code == 200
+        results = response.json()
+        assert [result['status'] for result in results] == [
+            'created', 'created', 'error', 'error', 'error']
+        assert 'genre' in results[2]['errors']
+        assert 'year' in results[3]['errors']
+        title = Title.objects.get(pk=results[0]['id'])
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'genre-0', 'genre-1'], (
+            'Проверьте, что bulk/ сохраняет жанры произведений'
+        )
+        assert title.category.slug == 'movie'
+
+    def test_titles_update(self, catalog):
+        created = catalog.post('/api/v1/titles/bulk/', title_items(1),
+                               format='json').json()[0]
+        url = f'/api/v1/titles/{created["id"]}/'
+        assert catalog.get(url).json()['name'] == 'Bulk title 0'
+        response = catalog.post('/api/v1/titles/bulk/', [
+            {'id': created['id'], 'name': 'Updated', 'genre': ['genre-2']},
+        ], format='json')
+        assert response.json() == [{'status': 'updated',
+                                    'id': created['id']}]
+        title = catalog.get(url).json()
+        assert title['name'] == 'Updated', (
+            'Проверьте, что после bulk/ кэш ответов сбрасывается'
+        )
+        assert [genre['slug'] for genre in title['genre']] == ['genre-2']
+        assert title['year'] == 2000 and title['category']['slug'] == 'movie'
+        found = catalog.get('/api/v1/titles/?search=updated').json()
+        assert [item['id'] for item in found['results']] == [created['id']], (
+            'Проверьте, что bulk/ обновляет поисковый индекс'
+        )
+
+    def test_queries_do_not_grow(self, catalog):
+        from api.middleware import record_queries
+        from django.db import connection
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('SQLite splits INSERT by its query parameters limit')
+        counts = []
+        for size in (5, 200):
+            with record_queries() as recorder:
+                response = catalog.post('/api/v1/titles/bulk/',
+                                        title_items(size), format='json')
+            assert response.status_code == 200
+            counts.append(recorder.count)
+        assert counts[0] == counts[1], (
+            'Проверьте, что число SQL-запросов bulk/ не зависит от числа '
+            f'объектов: {counts[0]} для 5 и {counts[1]} для 200'
+        )
+
+    def test_limits_and_permissions(self, catalog, settings):
+        settings.BULK_MAX_ITEMS = 2
+        response = catalog.post('/api/v1/titles/bulk/', title_items(3),
+                                format='json')
+        assert response.status_code == 400
+        response = catalog.post('/api/v1/titles/bulk/', {'name': 'x'},
+                                format='json')
+        assert response.status_code == 400
+        response = APIClient().post('/api/v1/titles/bulk/', title_items(1),
+                                    format='json')
+        assert response.status_code == 401, (
+            'Проверьте, что bulk/ доступен только администратору'
+        )
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TestVersionCounters:
+
+    def test_lost_counter(self):
+        from api.caching import get_versions, increment_versions
+
+        version_cache = caches[settings.API_VERSION_CACHE_ALIAS]
+        first, = get_versions(['tests'])
+        increment_versions(['tests'])
+        bumped, = get_versions(['tests'])
+        assert bumped == first + 1
+        version_cache.clear()
+        assert get_versions(['tests'])[0] > bumped, (
+            'Проверьте, что потерянный кэшем счетчик версий не возвращается '
+            'к прежним значениям'
+        )
+
+    def test_bump_after_commit(self, postgres_db, db,
+                               django_capture_on_commit_callbacks):
+        from api.caching import bump_versions, get_versions
+
+        version, = get_versions(['tests'])
+        with django_capture_on_commit_callbacks(execute=True):
+            bump_versions('tests')
+            assert get_versions(['tests']) == [version], (
+                'Проверьте, что версии увеличиваются после фиксации '
+                'транзакции'
+            )
+        assert get_versions(['tests']) == [version + 1]
+
+
+class TestBulkInvalidation:
+
+    def test_load_and_purge(self, postgres_db, transactional_db, tmp_path):
+        from reviews.management.commands._private import (ModelLoader,
+                                                          load_models,
+                                                          purge_models)
+        from reviews.models import Genre
+        from rest_framework.test import APIClient
+
+        caches[settings.API_CACHE_ALIAS].clear()
+        assert APIClient().get('/api/v1/genres/').json()['count'] == 0
+        genres_file = tmp_path / 'genre.csv'
+        genres_file.write_text('id,name,slug\n1,Drama,drama\n')
+        load_models([ModelLoader(Genre, str(genres_file), '')])
+        assert APIClient().get('/api/v1/genres/').json()['count'] == 1, (
+            'Проверьте, что загрузка данных сбрасывает кэш ответов'
+        )
+        purge_models([Genre])
+        assert APIClient().get('/api/v1/genres/').json()['count'] == 0, (
+            'Проверьте, что очистка таблиц сбрасывает кэш ответов'
+        )
@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(postgres_db, db):
+    from reviews.models import Category, Comment, Genre, Review, Title
+    from users.models import User
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    authors = [User.objects.create(username=f'автор{number}',
+                                   email=f'user{number}@yamdb.fake')
+               for number in range(3)]
+    genres = [Genre.objects.create(name=f'Жанр {number}',
+                                   slug=f'genre-{number}')
+              for number in range(3)]
+    category = Category.objects.create(name='Movie', slug='movie')
+    title = Title.objects.create(name='Title "quoted"', year=2000,
+                                 category=category,
+                                 description='Описание')
+    title.genre.set(genres[::-1])
+    Title.objects.create(name='No category', year=1990, description=None)
+    Title.objects.create(name='One genre', year=2010,
+                         category=category).genre.set(genres[1:2])
+    reviews = [Review.objects.create(title=title, author=author,
+                                     text=f'Отзыв {score}', score=score)
+               for score, author in zip((3, 7, 10), authors)]
+    for author in authors:
+        Comment.objects.create(review=reviews[0], author=author,
+                               text='Комментарий')
+    return {'title': title.pk, 'review': reviews[0].pk}
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class TestCompactSerializers:
+
+    def test_output_matches_serializers(self, catalog):
+        from api.compact import (CommentCompactSerializer,
+                                 ReviewCompactSerializer,
+                                 TitleCompactSerializer)
+        from api.serializers import (CommentSerializer, ReviewSerializer,
+                                     TitleGetSerializer)
+        from api.views import TitleViewSet
+        from reviews.models import Comment, Review
+
+        querysets = (
+            (TitleCompactSerializer, TitleGetSerializer,
+             TitleViewSet.queryset),
+            (ReviewCompactSerializer, ReviewSerializer,
+             Review.objects.select_related('author').order_by('id')),
+            (CommentCompactSerializer, CommentSerializer,
+             Comment.objects.select_related('author').order_by('id')),
+        )
+        for compact_class, serializer_class, queryset in querysets:
+            compact = compact_class()
+            expected = render(serializer_class(queryset.all(),
+                                               many=True).data)
+            assert render(compact.to_representation(
+                compact.get_rows(queryset.all()))) == expected, (
+                f'Проверьте, что {compact_class.__name__} формирует тот же '
+                f'ответ, что и {serializer_class.__name__}'
+            )
+
+    @pytest.mark.parametrize('query', ['', '?cursor=', '?page_size=1',
+                                       '?genre=genre-1&year=2010'])
+    def test_list_endpoints(self, catalog, query):
+        from api.serializers import (CommentSerializer, ReviewSerializer,
+                                     TitleGetSerializer)
+        from api.views import TitleViewSet
+        from reviews.models import Comment, Review
+
+        client = APIClient()
+        title_url = f'/api/v1/titles/{catalog["title"]}'
+        review_url = f'{title_url}/reviews/{catalog["review"]}'
+        endpoints = (
+            ('/api/v1/titles/', TitleGetSerializer,
+             lambda ids: TitleViewSet.queryset.filter(id__in=ids)),
+            (f'{title_url}/reviews/', ReviewSerializer,
+             lambda ids: Review.objects.filter(id__in=ids)
+             .order_by('pub_date', 'id')),
+            (f'{review_url}/comments/', CommentSerializer,
+             lambda ids: Comment.objects.filter(id__in=ids)
+             .order_by('pub_date', 'id')),
+        )
+        for url, serializer_class, queryset in endpoints:
+            response = client.get(url + query)
+            assert response.status_code == 200
+            results = response.json()['results']
+            expected = serializer_class(
+                queryset([item['id'] for item in results]), many=True).data
+            assert render(response.data['results']) == render(expected), (
+                f'Проверьте, что {url}{query} возвращает тот же ответ, что '
+                f'и {serializer_class.__name__}'
+            )
+
+
+def test_benchmark_command(postgres_db, db):
+    from reviews.models import Title
+
+    output = io.StringIO()
+    call_command('benchmark_serializers', page_size=[5], repeat=1,
+                 stdout=output)
+    assert output.getvalue().startswith('5 titles: serializer')
+    assert output.getvalue().strip().endswith('output identical'), (
+        'Проверьте, что компактный сериализатор выдает тот же JSON'
+    )
+    assert not Title.objects.exists(), (
+        'Проверьте, что benchmark_serializers откатывает созданные записи'
+    )
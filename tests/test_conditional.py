@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(postgres_db, db):
+    from reviews.models import Comment, Review, Title
+    from users.models import User
+
+    author = User.objects.create(username='author', email='author@yamdb.fake')
+    title = Title.objects.create(name='Title', year=2000)
+    review = Review.objects.create(title=title, author=author,
+                                   text='review', score=5)
+    Comment.objects.create(review=review, author=author, text='comment')
+    return {'author': author, 'title': title, 'review': review}
+
+
+class TestChangeStamps:
+
+    def test_review_writes(self, catalog):
+        from reviews.models import Review, Title
+        from reviews.stamps import get_stamp
+        from users.models import User
+
+        titles_version, _ = get_stamp('titles')
+        reviews_key = f'reviews:{catalog["title"].pk}'
+        reviews_version, _ = get_stamp(reviews_key)
+        user = User.objects.create(username='user', email='user@yamdb.fake')
+        Review.objects.create(title=catalog['title'], author=user,
+                              text='review', score=9)
+        assert get_stamp('titles')[0] == titles_version, (
+            'Проверьте, что запись отзыва не меняет общую метку titles'
+        )
+        assert get_stamp(reviews_key)[0] == reviews_version + 1
+
+        updated_at = timezone.now() + timedelta(days=1)
+        Title.objects.filter(pk=catalog['title'].pk).update(
+            updated_at=updated_at)
+        response = APIClient().get('/api/v1/titles/')
+        assert response['Last-Modified'] == http_date(
+            updated_at.timestamp()), (
+            'Проверьте, что Last-Modified списка произведений учитывает '
+            'изменения рейтингов'
+        )
+
+    def test_author_rename(self, catalog):
+        from reviews.stamps import get_stamp
+
+        keys = [f'reviews:{catalog["title"].pk}',
+                f'comments:{catalog["review"].pk}']
+        versions = [get_stamp(key)[0] for key in keys]
+        author = catalog['author']
+        author.bio = 'bio'
+        author.save()
+        assert [get_stamp(key)[0] for key in keys] == versions
+
+        author.username = 'renamed'
+        author.save()
+        assert [get_stamp(key)[0] for key in keys] == [
+            version + 1 for version in versions], (
+            'Проверьте, что смена имени автора обновляет метки списков его '
+            'отзывов и комментариев'
+        )
+
+    def test_search_index_rebuilds(self, catalog, monkeypatch):
+        from reviews.models import Review, Title
+        from reviews.search import TitleSearchIndex
+        from users.models import User
+
+        index = TitleSearchIndex()
+        builds = []
+        build = index.build
+        monkeypatch.setattr(index, 'build', lambda: builds.append(build()))
+        assert [title_id for title_id, _ in index.search('title')] == [
+            catalog['title'].pk]
+        user = User.objects.create(username='user', email='user@yamdb.fake')
+        Review.objects.create(title=catalog['title'], author=user,
+                              text='review', score=9)
+        index.search('title')
+        assert len(builds) == 1, (
+            'Проверьте, что запись отзыва не перестраивает поисковый индекс'
+        )
+        Title.objects.create(name='Other', year=2000)
+        assert index.search('other')
+        assert len(builds) == 2
@@ -0,0 +1,217 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.urls import resolve
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+# streamed csv or ndjson, not rendered by DRF renderers
+NOT_JSON_ROUTES = {'export'}
+
+
+@pytest.fixture
+def catalog(postgres_db, db):
+    from reviews.models import Category, Comment, Genre, Review, Title
+    from reviews.suggest import title_suggest_index
+    from users.models import User
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    admin = User.objects.create(username='admin', email='admin@yamdb.fake',
+                                role=User.ADMIN_ROLE_NAME, bio='Био\u2029')
+    author = User.objects.create(username='author', email='a@yamdb.fake')
+    genre = Genre.objects.create(name='Жанр', slug='genre')
+    category = Category.objects.create(name='Movie', slug='movie')
+    title = Title.objects.create(name='Title', year=2000, category=category)
+    title.genre.set([genre])
+    review = Review.objects.create(title=title, author=author, text='Отзыв',
+                                   score=7)
+    comment = Comment.objects.create(review=review, author=author,
+                                     text='Комментарий')
+    title_suggest_index.load()
+    return {'admin': admin, 'title': title.pk, 'review': review.pk,
+            'comment': comment.pk}
+
+
+def endpoint_requests(catalog):
+    title = f'/api/v1/titles/{catalog["title"]}'
+    review = f'{title}/reviews/{catalog["review"]}'
+    new_title = {'name': 'New', 'year': 2001, 'genre': ['genre'],
+                 'category': 'movie'}
+    return [
+        ('get', '/api/v1/', None),
+        ('get', '/api/v1/users/', None),
+        ('post', '/api/v1/users/', {'username': 'new',
+                                    'email': 'new@yamdb.fake'}),
+        ('get', '/api/v1/users/author/', None),
+        ('get', '/api/v1/users/me/', None),
+        ('post', '/api/v1/auth/signup/', {'username': 'signup',
+                                          'email': 'signup@yamdb.fake'}),
+        ('post', '/api/v1/auth/token/', {'username': 'signup',
+                                         'confirmation_code': 'wrong'}),
+        ('get', '/api/v1/titles/', None),
+        ('get', '/api/v1/titles/?cursor=', None),
+        ('post', '/api/v1/titles/', new_title),
+        ('get', f'{title}/', None),
+        ('get', f'{title}/scores/', None),
+        ('get', '/api/v1/titles/top/', None),
+        ('get', '/api/v1/titles/trending/', None),
+        ('get', '/api/v1/titles/suggest/?q=tit', None),
+        ('post', '/api/v1/titles/bulk/', [new_title, {'name': 'Broken'}]),
+        ('get', '/api/v1/genres/', None),
+        ('post', '/api/v1/genres/', {'name': 'Новый', 'slug': 'new'}),
+        ('delete', '/api/v1/genres/new/', None),
+        ('post', '/api/v1/genres/bulk/', [{'name': 'Bulk', 'slug': 'bulk'}]),
+        ('get', '/api/v1/categories/', None),
+        ('post', '/api/v1/categories/', {'name': 'Book', 'slug': 'book'}),
+        ('delete', '/api/v1/categories/book/', None),
+        ('post', '/api/v1/categories/bulk/', [{'name': 'A', 'slug': 'a'}]),
+        ('get', f'{title}/reviews/', None),
+        ('post', f'{title}/reviews/', {'text': 'Отзыв', 'score': 9}),
+        ('get', f'{review}/', None),
+        ('get', f'{review}/comments/', None),
+        ('post', f'{review}/comments/', {'text': 'Комментарий'}),
+        ('get', f'{review}/comments/{catalog["comment"]}/', None),
+    ]
+
+
+def parse_result(parser, content, parser_context=None):
+    try:
+        return parser.parse(io.BytesIO(content),
+                            parser_context=parser_context)
+    except ParseError as error:
+        return ParseError, str(error.detail)
+
+
+class TestFastJSON:
+
+    def test_every_endpoint(self, catalog):
+        from api.renderers import FastJSONRenderer
+        from api.urls import router_api_v1, urlpatterns
+
+        client = APIClient()
+        client.force_authenticate(catalog['admin'])
+        routes = set()
+        for method, url, data in endpoint_requests(catalog):
+            response = getattr(client, method)(url, data, format='json')
+            assert response.status_code < 500, url
+            routes.add(resolve(url.split('?')[0]).url_name)
+            if response.data is None:
+                continue
+            assert isinstance(response.accepted_renderer, FastJSONRenderer)
+            assert response.content == JSONRenderer().render(
+                response.data, response.accepted_media_type,
+                response.renderer_context), (
+                f'Проверьте, что ответ {method.upper()} {url} совпадает с '
+                'ответом JSONRenderer'
+            )
+        names = {pattern.name for pattern in router_api_v1.urls} | {
+            pattern.name for pattern in urlpatterns if hasattr(
+                pattern, 'name')}
+        assert names - NOT_JSON_ROUTES - {None} <= routes, (
+            'Проверьте, что тест покрывает все маршруты api/urls.py'
+        )
+
+    @pytest.mark.parametrize('accepted_media_type', [
+        'application/json', 'application/json; indent=2'])
+    def test_renderer_types(self, accepted_media_type):
+        from api.renderers import FastJSONRenderer
+
+        data = {
+            'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                          tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2020, 1, 2, 3, 4, 5),
+            'date': datetime.date(2020, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'decimal': decimal.Decimal('1.10'),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Title'),
+            'separators': 'line\u2028paragraph\u2029',
+            'unicode': 'Отзыв',
+            'float': 6.666666666666667,
+            'nested': [{1: None, 'list': (1, 2)}, True, b'bytes'],
+            'big': 2 ** 70,
+        }
+        assert FastJSONRenderer().render(data, accepted_media_type) == (
+            JSONRenderer().render(data, accepted_media_type)), (
+            'Проверьте, что FastJSONRenderer формирует тот же JSON, '
+            'что и JSONRenderer'
+        )
+
+    @pytest.mark.parametrize('value', [
+        1e16, -1.2345678901234568e17, 1e22, 1.5e-7, 1e-05, -0.00001234,
+        0.0001, 123456.5, 0.0, -0.0, 1e15])
+    def test_float_exponent(self, value):
+        from api.renderers import FastJSONRenderer
+
+        data = {'float': value, 'list': [value, 'text 1e5']}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data), (
+            'Проверьте, что FastJSONRenderer записывает числа с плавающей '
+            'точкой так же, как JSONRenderer'
+        )
+
+    @pytest.mark.parametrize('value', [
+        float('nan'), float('inf'), float('-inf')])
+    def test_non_finite_float(self, value):
+        from api.renderers import FastJSONRenderer
+
+        pytest.importorskip('orjson')
+        with pytest.raises(ValueError):
+            JSONRenderer().render([value])
+        assert FastJSONRenderer().render([value]) == b'[null]'
+
+    @pytest.mark.parametrize('content', [
+        '{"name": "Отзыв", "list": [1, 2.5, null, true], "a": 1, "a": 2}',
+        '[1e400, -0.0, 1.0000000000000002]',
+        '{"value": NaN}',
+        '{"broken": ',
+        '',
+    ])
+    def test_parser(self, content):
+        from api.parsers import FastJSONParser
+
+        for encoding in ('utf-8', 'utf-16'):
+            context = {'encoding': encoding}
+            assert parse_result(FastJSONParser(), content.encode(encoding),
+                                context) == parse_result(
+                JSONParser(), content.encode(encoding), context), (
+                'Проверьте, что FastJSONParser разбирает запрос так же, '
+                'как JSONParser'
+            )
+
+    def test_without_orjson(self, monkeypatch):
+        import api.parsers
+        import api.renderers
+
+        monkeypatch.setattr(api.renderers, 'orjson', None)
+        monkeypatch.setattr(api.parsers, 'orjson', None)
+        data = {'unicode': 'Отзыв\u2028', 'float': 1e16}
+        content = api.renderers.FastJSONRenderer().render(data)
+        assert content == JSONRenderer().render(data)
+        assert api.parsers.FastJSONParser().parse(
+            io.BytesIO(content)) == data
+        assert api.parsers.NDJSONParser().parse(
+            io.BytesIO(content + b'\n' + content)) == [data, data]
+
+
+def test_benchmark_command(postgres_db, db):
+    from reviews.models import Title
+
+    output = io.StringIO()
+    call_command('benchmark_json', page_size=[5], repeat=1, stdout=output)
+    assert '5 titles render' in output.getvalue()
+    assert 'differs' not in output.getvalue(), (
+        'Проверьте, что FastJSONRenderer выдает тот же JSON'
+    )
+    assert not Title.objects.exists(), (
+        'Проверьте, что benchmark_json откатывает созданные записи'
+    )
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+ITEMS_COUNT = 12
+
+
+@pytest.fixture
+def catalog(postgres_db, db):
+    from reviews.models import Comment, Review, Title
+    from users.models import User
+
+    users = [User.objects.create(username=f'user{number}',
+                                 email=f'user{number}@yamdb.fake')
+             for number in range(ITEMS_COUNT)]
+    title = Title.objects.create(name='Title', year=2000)
+    reviews = [Review.objects.create(title=title, author=user,
+                                     text='review', score=5)
+               for user in users]
+    comments = [Comment.objects.create(review=reviews[0], author=user,
+                                       text='comment')
+                for user in users]
+    # groups of three items published at the same time, groups in
+    # reverse order of ids
+    started = timezone.now()
+    for model, items in ((Review, reviews), (Comment, comments)):
+        for number, item in enumerate(items):
+            model.objects.filter(pk=item.pk).update(
+                pub_date=started - timedelta(minutes=number // 3))
+    return {'title': title.pk, 'review': reviews[0].pk}
+
+
+def list_urls(catalog):
+    reviews = f'/api/v1/titles/{catalog["title"]}/reviews/'
+    return {
+        'reviews': reviews,
+        'comments': f'{reviews}{catalog["review"]}/comments/',
+    }
+
+
+def expected_ids(resource):
+    from reviews.models import Comment, Review
+
+    model = Review if resource == 'reviews' else Comment
+    return list(model.objects.order_by('pub_date', 'id')
+                .values_list('id', flat=True))
+
+
+def walk(url, link):
+    """Ids of all pages following next or previous links."""
+    pages = []
+    while url:
+        response = APIClient().get(url)
+        assert response.status_code == 200
+        pages.append([item['id'] for item in response.json()['results']])
+        url = response.json()[link]
+    return pages
+
+
+@pytest.mark.parametrize('resource', ['reviews', 'comments'])
+class TestKeysetPagination:
+
+    def test_next_links(self, catalog, resource):
+        pages = walk(f'{list_urls(catalog)[resource]}?cursor=', 'next')
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert sum(pages, []) == expected_ids(resource), (
+            'Проверьте, что страницы cursor-пагинации не теряют и не '
+            'повторяют записи с одинаковым pub_date'
+        )
+
+    def test_previous_links(self, catalog, resource):
+        url = f'{list_urls(catalog)[resource]}?cursor='
+        last = APIClient().get(url).json()
+        while last['next']:
+            last_url = last['next']
+            last = APIClient().get(last_url).json()
+        pages = walk(last_url, 'previous')
+        assert sum(reversed(pages), []) == expected_ids(resource), (
+            'Проверьте ссылки previous cursor-пагинации'
+        )
+
+    def test_page_number_fallback(self, catalog, resource):
+        response = APIClient().get(list_urls(catalog)[resource]).json()
+        assert response['count'] == ITEMS_COUNT, (
+            'Проверьте, что без параметра cursor используется постраничная '
+            'пагинация'
+        )
+        assert response['next'].endswith('?page=2')
+        assert response['previous'] is None
+        pages = walk(list_urls(catalog)[resource], 'next')
+        assert sum(pages, []) == expected_ids(resource)
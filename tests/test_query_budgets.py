@@ -0,0 +1,130 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+ROWS_COUNT = 3
+
+# route name: (method, url template, client, queries budget),
+# creates include SAVEPOINT and RELEASE of their atomic block
+QUERY_BUDGETS = {
+    'titles-list': ('get', '/api/v1/titles/', None, 4),
+    'titles-list-cursor': ('get', '/api/v1/titles/?cursor=', None, 3),
+    'titles-filter': ('get', '/api/v1/titles/?genre=genre-0&year=2000',
+                      None, 4),
+    'titles-search': ('get', '/api/v1/titles/?search=title', None, 4),
+    'titles-suggest': ('get', '/api/v1/titles/suggest/?q=tit', None, 0),
+    'titles-detail': ('get', '/api/v1/titles/{title}/', None, 3),
+    'titles-scores': ('get', '/api/v1/titles/{title}/scores/', None, 1),
+    'titles-top': ('get', '/api/v1/titles/top/', None, 3),
+    'titles-trending': ('get', '/api/v1/titles/trending/?genre=genre-0',
+                        None, 3),
+    'genres-list': ('get', '/api/v1/genres/', None, 2),
+    'categories-list': ('get', '/api/v1/categories/', None, 2),
+    'reviews-list': ('get', '/api/v1/titles/{title}/reviews/', None, 3),
+    'reviews-list-cursor': ('get', '/api/v1/titles/{title}/reviews/?cursor=',
+                            None, 2),
+    'reviews-detail': ('get', '/api/v1/titles/{title}/reviews/{review}/',
+                       None, 2),
+    'comments-list': ('get',
+                      '/api/v1/titles/{title}/reviews/{review}/comments/',
+                      None, 3),
+    'comments-detail': ('get', '/api/v1/titles/{title}/reviews/{review}/'
+                               'comments/{comment}/', None, 2),
+    'users-list': ('get', '/api/v1/users/', 'admin', 2),
+    'users-me': ('get', '/api/v1/users/me/', 'user', 1),
+    'reviews-create': ('post', '/api/v1/titles/{title}/reviews/', 'admin',
+                       6),
+    'comments-create': ('post',
+                        '/api/v1/titles/{title}/reviews/{review}/comments/',
+                        'admin', 6),
+}
+
+# queries of SQLite fallbacks: the first search builds in-memory search
+# index, title id of commented review is read after counters UPDATE
+SQLITE_EXTRA_QUERIES = {'titles-search': 3, 'comments-create': 1}
+
+PAYLOADS = {
+    'reviews-create': {'text': 'review', 'score': 7},
+    'comments-create': {'text': 'comment'},
+}
+
+
+@pytest.fixture
+def catalog(postgres_db, db):
+    from reviews.models import Category, Comment, Genre, Review, Title
+    from reviews.suggest import title_suggest_index
+    from users.models import User
+    from users.revocations import revoked_users
+
+    admin = User.objects.create(username='admin', email='admin@yamdb.fake',
+                                role=User.ADMIN_ROLE_NAME)
+    users = [User.objects.create(username=f'user{number}',
+                                 email=f'user{number}@yamdb.fake')
+             for number in range(ROWS_COUNT)]
+    genres = [Genre.objects.create(name=f'Genre {number}',
+                                   slug=f'genre-{number}')
+              for number in range(ROWS_COUNT)]
+    categories = [Category.objects.create(name=f'Category {number}',
+                                          slug=f'category-{number}')
+                  for number in range(ROWS_COUNT)]
+    titles = []
+    for number in range(ROWS_COUNT):
+        title = Title.objects.create(name=f'Title {number}', year=2000,
+                                     category=categories[number])
+        title.genre.set(genres)
+        titles.append(title)
+    reviews = [Review.objects.create(title=titles[0], author=author,
+                                     text='review', score=5)
+               for author in users]
+    comments = [Comment.objects.create(review=reviews[0], author=author,
+                                       text='comment')
+                for author in users]
+    title_suggest_index.load()
+    revoked_users.sync()
+    caches[settings.API_CACHE_ALIAS].clear()
+    return {
+        'clients': {'admin': admin, 'user': users[0]},
+        'title': titles[0].pk,
+        'review': reviews[0].pk,
+        'comment': comments[0].pk,
+    }
+
+
+class TestQueryBudgets:
+
+    @pytest.mark.parametrize('route', QUERY_BUDGETS)
+    def test_query_budget(self, route, catalog, api_client):
+        from api.middleware import record_queries
+        from django.db import connection
+
+        method, url, user, budget = QUERY_BUDGETS[route]
+        if connection.vendor == 'sqlite':
+            budget += SQLITE_EXTRA_QUERIES.get(route, 0)
+        url = url.format(**catalog)
+        client = api_client(catalog['clients'].get(user))
+        with record_queries() as recorder:
+            response = getattr(client, method)(url, PAYLOADS.get(route))
+        assert response.status_code < 300, (
+            f'Запрос `{method.upper()} {url}` вернул статус '
+            f'{response.status_code}'
+        )
+        queries = '\n'.join(sql for sql, _ in recorder.queries)
+        assert recorder.count <= budget, (
+            f'`{method.upper()} {url}` выполняет {recorder.count} '
+            f'SQL-запросов, бюджет маршрута {route} - {budget}:\n{queries}'
+        )
+        if method == 'get':
+            assert not recorder.duplicates, (
+                f'`{url}` повторяет одинаковые SQL-запросы (N+1):\n'
+                + '\n'.join(f'{count} x {sql}' for sql, count
+                            in recorder.duplicates.items())
+            )
+
+    def test_server_timing_header(self, catalog, settings, api_client):
+        settings.QUERY_TIMING_HEADERS = True
+        response = api_client().get('/api/v1/titles/')
+        assert 'db;dur=' in response.get('Server-Timing', ''), (
+            'Проверьте, что при QUERY_TIMING_HEADERS ответ содержит '
+            'заголовок Server-Timing'
+        )
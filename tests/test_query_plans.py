@@ -0,0 +1,230 @@
+import json
+from itertools import combinations
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+TITLES_COUNT = 50000
+GENRES_COUNT = 20
+CATEGORIES_COUNT = 10
+USERS_COUNT = 5000
+REVIEWS_PER_TITLE = 4
+COMMENTS_PER_REVIEW = 2
+
+LARGE_TABLES = {
+    'reviews_title', 'reviews_title_genre', 'reviews_review',
+    'reviews_comment', 'users_user',
+}
+MAX_SORTED_ROWS = 1000
+# COUNT(*) of an unselective filter reads a big part of the table
+# anyway, full scan is cheaper than index lookups there
+UNSELECTIVE_FRACTION = 0.05
+
+TITLE_FILTERS = {
+    'name': 'title 777',
+    'year': '1977',
+    'category': 'category-3',
+    'genre': 'genre-7',
+}
+
+SCORE_COLUMNS = ', '.join(f'score_{score}_count' for score in range(1, 11))
+SCORE_ZEROS = ', '.join(['0'] * 10)
+
+SEED_SQL = (
+    f"""
+    INSERT INTO reviews_category (name, slug)
+    SELECT 'Category ' || i, 'category-' || i
+    FROM generate_series(1, {CATEGORIES_COUNT}) i
+    """,
+    f"""
+    INSERT INTO reviews_genre (name, slug)
+    SELECT 'Genre ' || i, 'genre-' || i
+    FROM generate_series(1, {GENRES_COUNT}) i
+    """,
+    f"""
+    INSERT INTO reviews_title (name, year, description, category_id,
+                               rating_sum, rating_count, {SCORE_COLUMNS},
+                               updated_at)
+    SELECT 'title ' || i, 1900 + i % 120, 'description ' || i,
+           (SELECT min(id) FROM reviews_category) + i % {CATEGORIES_COUNT},
+           0, 0, {SCORE_ZEROS}, now()
+    FROM generate_series(1, {TITLES_COUNT}) i
+    """,
+    f"""
+    INSERT INTO reviews_title_genre (title_id, genre_id)
+    SELECT title.id, genre.id
+    FROM reviews_title title
+    JOIN reviews_genre genre
+      ON (genre.id + title.id) % {GENRES_COUNT} IN (0, 1)
+    """,
+    f"""
+    INSERT INTO users_user (username, email, password, first_name,
+                            last_name, bio, role, is_superuser, is_staff,
+                            is_active, date_joined)
+    SELECT 'user' || i, 'user' || i || '@yamdb.fake', '', '', '', '',
+           'user', false, false, true, now()
+    FROM generate_series(1, {USERS_COUNT}) i
+    """,
+    # fresh statistics keep foreign key checks of the big inserts
+    # below on index scans
+    'ANALYZE',
+    f"""
+    INSERT INTO reviews_review (title_id, author_id, text, score, pub_date,
+                                updated_at, comment_count)
+    SELECT title.id, author.id, 'review', 1 + (title.id + n) % 10,
+           now() - n * interval '1 day', now(), 0
+    FROM reviews_title title
+    CROSS JOIN generate_series(1, {REVIEWS_PER_TITLE}) n
+    JOIN users_user author
+      ON author.id = (SELECT min(id) FROM users_user)
+                     + (title.id * {REVIEWS_PER_TITLE} + n) % {USERS_COUNT}
+    """,
+    'ANALYZE reviews_review',
+    f"""
+    INSERT INTO reviews_comment (review_id, author_id, text, pub_date,
+                                 updated_at)
+    SELECT review.id, review.author_id, 'comment',
+           review.pub_date + n * interval '1 hour', now()
+    FROM reviews_review review
+    CROSS JOIN generate_series(1, {COMMENTS_PER_REVIEW}) n
+    """,
+    'VACUUM ANALYZE',
+)
+
+pytestmark = pytest.mark.skipif(
+    settings.DATABASES['default']['ENGINE']
+    != 'django.db.backends.postgresql',
+    reason='query plans are checked on PostgreSQL only')
+
+
+@pytest.fixture(scope='module')
+def seeded_db(postgres_db, django_db_blocker):
+    with django_db_blocker.unblock():
+        with connection.cursor() as cursor:
+            for sql in SEED_SQL:
+                cursor.execute(sql)
+        yield
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'TRUNCATE reviews_comment, reviews_review, '
+                'reviews_title_genre, reviews_title, reviews_genre, '
+                'reviews_category, users_user CASCADE')
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def result_rows(plan):
+    """Rows the query reads, for aggregates rows they aggregate."""
+    if plan['Node Type'] == 'Aggregate':
+        return plan['Plans'][0]['Plan Rows']
+    return plan['Plan Rows']
+
+
+def plan_problems(plan):
+    for node in plan_nodes(plan):
+        if (node['Node Type'] == 'Seq Scan'
+                and node['Relation Name'] in LARGE_TABLES
+                and ('Filter' in node
+                     or result_rows(plan)
+                     < node['Plan Rows'] * UNSELECTIVE_FRACTION)):
+            yield f'Seq Scan on {node["Relation Name"]}'
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            sorted_rows = max(child['Plan Rows']
+                              for child in node.get('Plans', [node]))
+            if sorted_rows > MAX_SORTED_ROWS:
+                yield f'Sort of {sorted_rows} rows'
+
+
+def endpoint_queries(url, data=None):
+    caches[settings.API_CACHE_ALIAS].clear()
+    client = APIClient()
+    with CaptureQueriesContext(connection) as context:
+        if data is None:
+            response = client.get(url)
+        else:
+            response = client.post(url, data)
+    assert response.status_code == 200, (
+        f'Запрос `{url}` вернул статус {response.status_code}'
+    )
+    return [query['sql'] for query in context.captured_queries]
+
+
+def assert_plans(url, data=None):
+    for sql in endpoint_queries(url, data):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        plan = explain(sql)
+        problems = sorted(set(plan_problems(plan)))
+        assert not problems, (
+            f'План запроса для `{url}` содержит {", ".join(problems)}:\n'
+            f'{sql}\n{json.dumps(plan, indent=2)}'
+        )
+
+
+def title_filter_urls():
+    for size in range(1, len(TITLE_FILTERS) + 1):
+        for names in combinations(TITLE_FILTERS, size):
+            query = '&'.join(f'{name}={TITLE_FILTERS[name]}'
+                             for name in names)
+            yield f'/api/v1/titles/?{query}'
+            yield f'/api/v1/titles/?{query}&cursor='
+
+
+def first_id(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(id) FROM {table}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('seeded_db')
+class TestQueryPlans:
+
+    @pytest.mark.parametrize('url', list(title_filter_urls()))
+    def test_title_filters(self, url):
+        assert_plans(url)
+
+    @pytest.mark.parametrize('suffix', ['', '?cursor='])
+    def test_reviews_list(self, suffix):
+        title_id = first_id('reviews_title') + TITLES_COUNT // 2
+        assert_plans(f'/api/v1/titles/{title_id}/reviews/{suffix}')
+
+    @pytest.mark.parametrize('suffix', ['', '?cursor='])
+    def test_comments_list(self, suffix):
+        review = first_id('reviews_review') + TITLES_COUNT
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT title_id FROM reviews_review WHERE id = %s',
+                [review])
+            title_id = cursor.fetchone()[0]
+        assert_plans(
+            f'/api/v1/titles/{title_id}/reviews/{review}/comments/{suffix}')
+
+    def test_title_detail(self):
+        title_id = first_id('reviews_title') + TITLES_COUNT // 3
+        assert_plans(f'/api/v1/titles/{title_id}/')
+
+    @pytest.mark.parametrize('username, email', [
+        ('USER77', 'User77@yamdb.fake'),
+        ('new_user', 'new_user@yamdb.fake'),
+    ])
+    def test_signup(self, username, email):
+        assert_plans('/api/v1/auth/signup/',
+                     {'username': username, 'email': email})
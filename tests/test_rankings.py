@@ -0,0 +1,178 @@
+import io
+from array import array
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(create_catalog, transactional_db):
+    from reviews.models import Category, Genre, Title
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    catalog = create_catalog(users_count=12, titles_count=4)
+    genre = Genre.objects.create(name='Drama', slug='drama')
+    category = Category.objects.create(name='Movie', slug='movie')
+    for title in Title.objects.filter(pk__in=catalog['titles'][1:]):
+        title.category = category
+        title.save()
+    Title.objects.get(pk=catalog['title']).genre.set([genre])
+    return catalog
+
+
+def review(catalog, title, user, score, days_ago=0):
+    from reviews.models import Review
+
+    item = Review.objects.create(title_id=catalog['titles'][title],
+                                 author=catalog['users'][user],
+                                 text='review', score=score)
+    Review.objects.filter(pk=item.pk).update(
+        pub_date=timezone.now() - timedelta(days=days_ago))
+    return item
+
+
+def rank_titles(**options):
+    call_command('rank_titles', stdout=io.StringIO(), **options)
+
+
+def ranked_ids(url):
+    return [item['id'] for item in APIClient().get(url).json()['results']]
+
+
+class TestRankings:
+
+    def test_top(self, catalog):
+        review(catalog, 0, 0, 10)
+        for user in range(12):
+            review(catalog, 1, user, 9)
+        for user in range(2):
+            review(catalog, 2, user, 2)
+        rank_titles(rebuild=True)
+
+        titles = catalog['titles']
+        response = APIClient().get('/api/v1/titles/top/').json()
+        assert [item['id'] for item in response['results']] == [
+            titles[1], titles[0], titles[2]], (
+            'Проверьте, что titles/top/ учитывает число отзывов и не '
+            'содержит произведений без отзывов'
+        )
+        prior = (10 + 9 * 12 + 2 * 2) / 15
+        assert response['results'][1]['weighted_rating'] == pytest.approx(
+            (10 + prior * settings.RANKING_PRIOR_REVIEWS)
+            / (1 + settings.RANKING_PRIOR_REVIEWS))
+        assert response['results'][1]['review_count'] == 1
+
+        assert ranked_ids('/api/v1/titles/top/?genre=drama') == [titles[0]]
+        assert ranked_ids('/api/v1/titles/top/?category=movie') == [
+            titles[1], titles[2]]
+        assert ranked_ids('/api/v1/titles/top/?cursor=') == [
+            titles[1], titles[0], titles[2]]
+
+    def test_trending(self, catalog):
+        half_life = settings.TRENDING_HALF_LIFE_HOURS / 24
+        for user in range(4):
+            review(catalog, 0, user, 10, days_ago=half_life * 10)
+        review(catalog, 1, 0, 5, days_ago=half_life)
+        review(catalog, 2, 0, 10)
+        rank_titles(rebuild=True)
+
+        titles = catalog['titles']
+        results = APIClient().get('/api/v1/titles/trending/').json()[
+            'results']
+        assert [item['id'] for item in results] == [
+            titles[2], titles[1], titles[0]], (
+            'Проверьте, что titles/trending/ упорядочен по свежим отзывам'
+        )
+        assert [item['trending_score'] for item in results] == [
+            pytest.approx(1, rel=1e-3), pytest.approx(0.25, rel=1e-3),
+            pytest.approx(4 / 1024, rel=1e-3)]
+
+    def test_refresh(self, catalog):
+        from reviews.models import Title, TitleRanking
+        from reviews.rankings import REFRESH_MARGIN, stale_title_ids
+
+        first = review(catalog, 0, 0, 5)
+        Title.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        rank_titles(rebuild=True)
+        titles = catalog['titles']
+        assert ranked_ids('/api/v1/titles/top/') == [titles[0]]
+
+        review(catalog, 1, 0, 9)
+        rank_titles(refresh=True)
+        assert ranked_ids('/api/v1/titles/top/') == [titles[1], titles[0]], (
+            'Проверьте, что refresh ранжирует новые отзывы и сбрасывает '
+            'кэш ответов'
+        )
+        refreshed = dict(TitleRanking.objects.values_list('title_id',
+                                                          'refreshed_at'))
+        assert refreshed[titles[0]] < refreshed[titles[1]], (
+            'Проверьте, что refresh пересчитывает только измененные '
+            'произведения'
+        )
+        # review transaction started a second before the refresh
+        Title.objects.filter(pk=titles[1]).update(
+            updated_at=refreshed[titles[1]] + REFRESH_MARGIN
+            - timedelta(seconds=1))
+        assert stale_title_ids() == [titles[1]], (
+            'Проверьте, что refresh не пропускает отзывы транзакций, '
+            'начатых до него'
+        )
+
+        first.delete()
+        rank_titles(refresh=True)
+        assert ranked_ids('/api/v1/titles/trending/') == [titles[1]]
+        with pytest.raises(CommandError):
+            rank_titles()
+
+    def test_purge_and_load(self, catalog, tmp_path):
+        from django.db import connection
+        from reviews.management.commands._private import (ReviewLoader,
+                                                          load_models,
+                                                          purge_models)
+        from reviews.models import Review, Title, TitleRanking
+        from users.models import User
+
+        review(catalog, 0, 0, 5)
+        review(catalog, 1, 0, 7)
+        rank_titles(rebuild=True)
+        call_command('export_data', 'review', output=str(tmp_path),
+                     stdout=io.StringIO())
+        if connection.vendor == 'postgresql':
+            # TRUNCATE fails with deferred FK checks pending in transaction
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        purge_models([Review])
+        assert not TitleRanking.objects.exists(), (
+            'Проверьте, что очистка отзывов пересчитывает рейтинги'
+        )
+        load_models([ReviewLoader(tmp_path / 'review.csv',
+                                  {'title': Title, 'author': User}, '')])
+        assert set(TitleRanking.objects.values_list(
+            'title_id', flat=True)) == set(catalog['titles'][:2]), (
+            'Проверьте, что загрузка отзывов пересчитывает рейтинги'
+        )
+
+
+def test_numpy_engine():
+    numpy = pytest.importorskip('numpy')
+    from reviews.rankings import (ReviewColumns, rank_with_numpy,
+                                  rank_with_python)
+
+    generator = numpy.random.default_rng(7)
+    size = 10000
+    columns = ReviewColumns(
+        array('q', generator.integers(1, 50, size).tolist()),
+        array('d', generator.integers(1, 11, size).tolist()),
+        array('d', generator.uniform(-5000, 100, size).tolist()))
+    expected = list(rank_with_python(columns, 6.5, 10))
+    actual = list(rank_with_numpy(columns, 6.5, 10))
+    assert [item[0] for item in actual] == [item[0] for item in expected]
+    assert numpy.allclose([item[1:] for item in actual],
+                          [item[1:] for item in expected]), (
+        'Проверьте, что расчеты NumPy и Python совпадают'
+    )
@@ -0,0 +1,163 @@
+from contextlib import ExitStack
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replica(settings, postgres_db, transactional_db):
+    """Second alias of the test database, as a local replica would be."""
+    from django.db import connections
+
+    caches[settings.API_CACHE_ALIAS].clear()
+    connections.databases[REPLICA] = {
+        **connections['default'].settings_dict,
+        'TEST': {'MIRROR': 'default'},
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+@pytest.fixture
+def catalog(replica, create_catalog):
+    return create_catalog()
+
+
+def get_queries(client, url):
+    """Response and SQL statements executed on every alias."""
+    from api.middleware import QueryRecorder
+    from django.db import connections
+
+    recorders = {alias: QueryRecorder() for alias in ('default', REPLICA)}
+    with ExitStack() as stack:
+        for alias, recorder in recorders.items():
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        response = client.get(url)
+    return response, {alias: [sql for sql, _ in recorder.queries]
+                      for alias, recorder in recorders.items()}
+
+
+class TestReplicaRouting:
+
+    def test_router(self, settings):
+        from api.replicas import ReplicaRouter, route_reads
+        from reviews.models import Title
+        from users.models import User
+
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне запросов чтение идет с основной базы'
+        )
+        with route_reads(REPLICA):
+            assert router.db_for_read(Title) == REPLICA
+            assert router.db_for_read(User) == 'default'
+            assert router.db_for_write(Title) == 'default'
+            assert router.db_for_read(Title) == 'default', (
+                'Проверьте, что после записи запрос читает с основной базы'
+            )
+        assert not router.allow_migrate(REPLICA, 'reviews')
+        assert router.allow_migrate('default', 'reviews')
+
+    def test_read_your_writes(self, catalog, settings, api_client):
+        reviews_url = f'/api/v1/titles/{catalog["title"]}/reviews/'
+        writer = api_client(catalog['users'][0])
+
+        response, queries = get_queries(APIClient(), reviews_url)
+        assert response.status_code == 200
+        assert any('reviews_review' in sql for sql in queries[REPLICA]), (
+            'Проверьте, что анонимные GET-запросы читают с реплики'
+        )
+        assert not any('reviews_' in sql for sql in queries['default'])
+
+        review = writer.post(reviews_url, {'text': 'review', 'score': 5},
+                             format='json').json()
+        assert caches[settings.REPLICA_STICKY_CACHE_ALIAS].get(
+            f'api:sticky:{catalog["users"][0].pk}'), (
+            'Проверьте, что привязка к основной базе хранится в общем кэше '
+            'по id пользователя'
+        )
+        # another token of the same user
+        response, queries = get_queries(api_client(catalog['users'][0]),
+                                        reviews_url)
+        assert len(response.json()['results']) == 1
+        assert not queries[REPLICA], (
+            'Проверьте, что после записи пользователь читает с основной базы'
+        )
+        _, queries = get_queries(api_client(catalog['users'][1]),
+                                 reviews_url)
+        assert queries[REPLICA]
+
+        settings.REPLICA_STICKY_SECONDS = 0
+        writer.patch(f'{reviews_url}{review["id"]}/', {'score': 6},
+                     format='json')
+        _, queries = get_queries(writer, f'{reviews_url}?page=1')
+        assert queries[REPLICA], (
+            'Проверьте, что привязка к основной базе истекает через '
+            'REPLICA_STICKY_SECONDS'
+        )
+
+    def test_failed_writes(self, catalog, api_client):
+        reviews_url = f'/api/v1/titles/{catalog["title"]}/reviews/'
+        writer = api_client(catalog['users'][0])
+        response = writer.post(reviews_url, {'text': 'review', 'score': 11},
+                               format='json')
+        assert response.status_code == 400
+        _, queries = get_queries(writer, reviews_url)
+        assert queries[REPLICA], (
+            'Проверьте, что неудачный запрос не привязывает клиента к '
+            'основной базе'
+        )
+
+    def test_bumped_responses_from_primary(self, catalog, api_client):
+        title_url = f'/api/v1/titles/{catalog["title"]}/'
+        APIClient().get(title_url)
+        api_client(catalog['users'][0]).post(
+            f'{title_url}reviews/', {'text': 'review', 'score': 5},
+            format='json')
+        response, queries = get_queries(APIClient(), title_url)
+        assert response.json()['review_count'] == 1
+        assert any('reviews_title' in sql for sql in queries['default']), (
+            'Проверьте, что после изменения данных ответы для кэша '
+            'строятся по основной базе'
+        )
+
+    def test_sticky_reads_skip_cache(self, catalog, api_client):
+        title_url = f'/api/v1/titles/{catalog["title"]}/'
+        writer = api_client(catalog['users'][0])
+        assert APIClient().get(title_url).json()['review_count'] == 0
+        writer.post(f'{title_url}reviews/', {'text': 'review', 'score': 5},
+                    format='json')
+        response = APIClient().get(title_url)
+        # as if the cached response was built by a lagging replica
+        caches[settings.API_CACHE_ALIAS].set(
+            'api:response:' + response['ETag'][3:-1],
+            {**response.json(), 'review_count': 0})
+        assert APIClient().get(title_url).json()['review_count'] == 0
+        assert writer.get(title_url).json()['review_count'] == 1, (
+            'Проверьте, что недавно писавший клиент не получает ответы '
+            'из кэша'
+        )
+
+    def test_streamed_export(self, catalog, api_client):
+        from api.middleware import QueryRecorder
+        from django.db import connections
+        from users.models import User
+
+        admin = catalog['users'][0]
+        User.objects.filter(pk=admin.pk).update(role=User.ADMIN_ROLE_NAME)
+        admin.refresh_from_db()
+        recorder = QueryRecorder()
+        with connections[REPLICA].execute_wrapper(recorder):
+            response = api_client(admin).get('/api/v1/export/titles.csv')
+            body = b''.join(response.streaming_content).decode()
+        assert 'Title' in body
+        assert any('reviews_title' in sql for sql, _ in recorder.queries), (
+            'Проверьте, что потоковый экспорт читает с реплики'
+        )
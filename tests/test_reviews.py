@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(create_catalog, db):
+    from reviews.models import Review
+
+    catalog = create_catalog(titles_count=2)
+    catalog['review'] = Review.objects.create(
+        title_id=catalog['title'], author=catalog['users'][1],
+        text='review', score=5).pk
+    return catalog
+
+
+class TestReviewWrites:
+
+    def test_create(self, catalog, api_client):
+        from api.middleware import record_queries
+        from reviews.models import Title
+
+        title = catalog['titles'][0]
+        with record_queries() as recorder:
+            response = api_client(catalog['users'][0]).post(
+                f'/api/v1/titles/{title}/reviews/',
+                {'text': 'Отзыв', 'score': 9}, format='json')
+        assert response.status_code == 201
+        assert response.json()['author'] == 'user0'
+        assert not [sql for sql, _ in recorder.queries
+                    if '"users_user"."username"' in sql], (
+            'Проверьте, что автор отзыва не загружается из базы данных'
+        )
+        assert Title.objects.get(pk=title).rating == 7, (
+            'Проверьте, что рейтинг обновляется после создания отзыва'
+        )
+
+    def test_errors(self, catalog, api_client):
+        client = api_client(catalog['users'][1])
+        title, other_title = catalog['titles']
+        response = client.post(f'/api/v1/titles/{title}/reviews/',
+                               {'text': 'again', 'score': 1}, format='json')
+        assert response.status_code == 400
+        assert response.json() == {'non_field_errors': [
+            'You have already left a review for this title!']}
+        response = client.post('/api/v1/titles/0/reviews/',
+                               {'text': 'missing', 'score': 1}, format='json')
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв на несуществующее произведение '
+            'возвращает 404'
+        )
+        comments_urls = (
+            f'/api/v1/titles/{title}/reviews/0/comments/',
+            f'/api/v1/titles/{other_title}/reviews/{catalog["review"]}/'
+            'comments/',
+        )
+        for url in comments_urls:
+            response = client.post(url, {'text': 'comment'}, format='json')
+            assert response.status_code == 404, (
+                f'Проверьте, что POST {url} возвращает 404'
+            )
+        response = client.post(comments_urls[0], {}, format='json')
+        assert response.status_code == 400
+
+    def test_comment(self, catalog, api_client):
+        title = catalog['titles'][0]
+        url = f'/api/v1/titles/{title}/reviews/{catalog["review"]}/comments/'
+        response = api_client(catalog['users'][0]).post(
+            url, {'text': 'Комментарий'}, format='json')
+        assert response.status_code == 201
+        assert response.json()['author'] == 'user0'
+        assert [comment['id'] for comment in APIClient().get(
+            url).json()['results']] == [response.json()['id']]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_reviews(create_catalog, api_client):
+    """Concurrent duplicates are rejected by the unique constraint."""
+    from django.db import connection, connections
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('SQLite serializes writes of concurrent transactions')
+    catalog = create_catalog(titles_count=2)
+    url = f'/api/v1/titles/{catalog["titles"][0]}/reviews/'
+    barrier = threading.Barrier(4)
+    statuses = []
+
+    def post_review():
+        try:
+            barrier.wait()
+            statuses.append(api_client(catalog['users'][0]).post(
+                url, {'text': 'review', 'score': 5},
+                format='json').status_code)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=post_review) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(statuses) == [201, 400, 400, 400], (
+        'Проверьте, что одновременные повторные отзывы возвращают 400'
+    )
@@ -0,0 +1,85 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def catalog(create_catalog, transactional_db):
+    return create_catalog(users_count=4)
+
+
+def distribution(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+class TestScores:
+
+    def test_api_writes(self, catalog, api_client):
+        title_url = f'/api/v1/titles/{catalog["title"]}/'
+        assert APIClient().get(f'{title_url}scores/').json() == {
+            'count': 0, 'mean': None, 'median': None,
+            'distribution': distribution(),
+        }
+
+        reviews = [api_client(user).post(f'{title_url}reviews/',
+                                         {'text': 'review', 'score': score},
+                                         format='json').json()
+                   for user, score in zip(catalog['users'], (2, 9, 9, 4))]
+        assert APIClient().get(f'{title_url}scores/').json() == {
+            'count': 4, 'mean': 6.0, 'median': 6.5,
+            'distribution': distribution(s2=1, s4=1, s9=2),
+        }, 'Проверьте, что распределение оценок обновляется при отзывах'
+
+        client = api_client(catalog['users'][1])
+        client.patch(f'{title_url}reviews/{reviews[1]["id"]}/',
+                     {'score': 3}, format='json')
+        client = api_client(catalog['users'][3])
+        client.delete(f'{title_url}reviews/{reviews[3]["id"]}/')
+        assert APIClient().get(f'{title_url}scores/').json() == {
+            'count': 3, 'mean': 14 / 3, 'median': 3.0,
+            'distribution': distribution(s2=1, s3=1, s9=1),
+        }, ('Проверьте, что распределение оценок обновляется при '
+            'изменении и удалении отзывов')
+
+    def test_missing_title(self, catalog):
+        response = APIClient().get('/api/v1/titles/0/scores/')
+        assert response.status_code == 404
+        response = APIClient().get('/api/v1/titles/title/scores/')
+        assert response.status_code == 404
+
+    def test_title_move(self, catalog):
+        from reviews.models import Review, Title
+
+        other = Title.objects.create(name='Other', year=2000)
+        review = Review.objects.create(title_id=catalog['title'],
+                                       author=catalog['users'][0],
+                                       text='review', score=7)
+        review.title = other
+        review.save()
+        histograms = {title.pk: title.score_histogram
+                      for title in Title.objects.all()}
+        assert histograms[catalog['title']] == [0] * 10
+        assert histograms[other.pk] == [0] * 6 + [1] + [0] * 3
+
+    def test_rebuild(self, catalog):
+        from reviews.models import Review, Title
+        from reviews.ratings import find_rating_drift, rebuild_ratings
+
+        for user, score in zip(catalog['users'], (1, 10, 10)):
+            Review.objects.create(title_id=catalog['title'], author=user,
+                                  text='review', score=score)
+        expected = [1] + [0] * 8 + [2]
+        assert Title.objects.get().score_histogram == expected
+
+        Title.objects.update(score_1_count=0, score_10_count=0)
+        assert list(find_rating_drift()) == list(Title.objects.all()), (
+            'Проверьте, что расхождение гистограммы оценок обнаруживается'
+        )
+        with pytest.raises(CommandError):
+            call_command('reconcile_counters', check=True,
+                         stdout=io.StringIO())
+        rebuild_ratings()
+        assert Title.objects.get().score_histogram == expected
+        assert not find_rating_drift().exists()
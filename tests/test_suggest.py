@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+def test_concurrent_updates(settings):
+    from reviews.suggest import Suggestion, TitleSuggestIndex, suggest_keys
+
+    settings.SUGGEST_SYNC_INTERVAL = 3600
+    index = TitleSuggestIndex()
+    index.loaded = True
+    index.checked = time.monotonic()
+    suggestions = [Suggestion(number, f'Title {number}', 2000, number % 10,
+                              suggest_keys(f'Title {number}', ['Drama'], None))
+                   for number in range(200)]
+    for suggestion in suggestions:
+        index.put(suggestion)
+    stop = threading.Event()
+
+    def update():
+        while not stop.is_set():
+            for suggestion in suggestions[::7]:
+                index.remove(suggestion.id)
+                index.put(suggestion)
+
+    errors = []
+    writer = threading.Thread(target=update)
+    writer.start()
+    try:
+        for _ in range(300):
+            try:
+                index.suggest('ti', 5)
+                index.suggest('title 1', 5)
+            except (KeyError, IndexError) as error:
+                errors.append(error)
+    finally:
+        stop.set()
+        writer.join()
+    assert not errors, (
+        'Проверьте, что подсказки не читают индекс во время его изменения'
+    )
@@ -0,0 +1,113 @@
+import pytest
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.fixture
+def throttle_settings(postgres_db, db, settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'NUM_PROXIES': 1,
+        'DEFAULT_THROTTLE_RATES': {
+            'signup.ip': '10/hour',
+            'signup.username': '2/hour',
+            'signup.email': '2/hour',
+            'token.ip': '10/hour',
+            'token.username': '2/hour',
+        },
+    }
+    return settings
+
+
+def signup(client, username, email):
+    return client.post(SIGNUP_URL, {'username': username, 'email': email})
+
+
+@pytest.mark.usefixtures('throttle_settings')
+class TestAuthThrottling:
+
+    def test_username_limit(self):
+        from api.middleware import record_queries
+
+        client = APIClient()
+        for number in range(2):
+            signup(client, 'bot', f'bot{number}@example.com')
+        with record_queries() as recorder:
+            response = signup(client, 'BOT', 'bot2@example.com')
+        assert response.status_code == 429, (
+            'Проверьте, что после исчерпания лимита для username запрос к '
+            '`auth/signup/` возвращает статус 429'
+        )
+        assert int(response['Retry-After']) > 0, (
+            'Проверьте, что ответ со статусом 429 содержит заголовок '
+            'Retry-After'
+        )
+        assert recorder.count == 0, (
+            'Проверьте, что отклоненный запрос не выполняет SQL-запросов'
+        )
+        response = signup(client, 'other', 'other@example.com')
+        assert response.status_code == 200, (
+            'Проверьте, что лимит для username не влияет на другие username'
+        )
+
+    def test_email_limit(self):
+        client = APIClient()
+        for number in range(2):
+            signup(client, f'user{number}', 'Same@example.com')
+        response = signup(client, 'user2', 'same@example.com')
+        assert response.status_code == 429, (
+            'Проверьте, что после исчерпания лимита для email запрос к '
+            '`auth/signup/` возвращает статус 429'
+        )
+
+    def test_ip_limit(self):
+        client = APIClient()
+        for number in range(10):
+            client.post(TOKEN_URL, {'username': f'user{number}',
+                                    'confirmation_code': 'code'},
+                        HTTP_X_FORWARDED_FOR='10.0.0.1')
+        response = client.post(TOKEN_URL, {'username': 'user10',
+                                           'confirmation_code': 'code'},
+                               HTTP_X_FORWARDED_FOR='10.0.0.1')
+        assert response.status_code == 429, (
+            'Проверьте, что после исчерпания лимита для адреса клиента '
+            'запрос к `auth/token/` возвращает статус 429'
+        )
+        response = client.post(TOKEN_URL, {'username': 'user10',
+                                           'confirmation_code': 'code'},
+                               HTTP_X_FORWARDED_FOR='10.0.0.2')
+        assert response.status_code != 429, (
+            'Проверьте, что лимит для адреса клиента не влияет на другие '
+            'адреса'
+        )
+
+    def test_forwarded_for_without_proxies(self, settings):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK,
+                                   'NUM_PROXIES': 0}
+        client = APIClient()
+        for number in range(11):
+            response = client.post(TOKEN_URL, {'username': f'user{number}',
+                                               'confirmation_code': 'code'},
+                                   HTTP_X_FORWARDED_FOR=f'10.0.1.{number}')
+        assert response.status_code == 429, (
+            'Проверьте, что без NUM_PROXIES заголовок X-Forwarded-For не '
+            'обходит лимит для адреса клиента'
+        )
+
+    def test_bucket_refill(self, monkeypatch):
+        import api.throttling
+
+        client = APIClient()
+        for number in range(3):
+            response = signup(client, 'bot', f'bot{number}@example.com')
+        assert response.status_code == 429
+        now = api.throttling.time.time()
+        monkeypatch.setattr(api.throttling.time, 'time',
+                            lambda: now + int(response['Retry-After']))
+        response = signup(client, 'bot', 'bot3@example.com')
+        assert response.status_code != 429, (
+            'Проверьте, что запросы снова разрешены по истечении '
+            'Retry-After'
+        )
@@ -0,0 +1,334 @@
+import re
+
+import pytest
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+def signup(username, email):
+    return APIClient().post(SIGNUP_URL,
+                            {'username': username, 'email': email})
+
+
+@pytest.mark.usefixtures('postgres_db')
+@pytest.mark.django_db(transaction=True)
+class TestCaseInsensitiveUniqueness:
+
+    def test_signup(self):
+        assert signup('Alice', 'alice@example.com').status_code == 200
+        response = signup('ALICE', 'other@example.com')
+        assert response.status_code == 400 and 'username' in response.json(), (
+            'Проверьте, что username, отличающийся только регистром, '
+            'не может быть зарегистрирован повторно'
+        )
+        response = signup('bob', 'Alice@Example.com')
+        assert response.status_code == 400 and 'email' in response.json(), (
+            'Проверьте, что email, отличающийся только регистром, '
+            'не может быть зарегистрирован повторно'
+        )
+        response = signup('alice', 'ALICE@example.com')
+        assert response.status_code == 200, (
+            'Проверьте, что повторный запрос существующего пользователя '
+            'с другим регистром отправляет код подтверждения'
+        )
+
+    def test_profile_update(self, api_client):
+        from users.models import User
+
+        User.objects.create(username='carol', email='carol@example.com')
+        dave = User.objects.create(username='dave', email='dave@example.com')
+        client = api_client(dave)
+        response = client.patch('/api/v1/users/me/', {'username': 'Carol'})
+        assert response.status_code == 400 and 'username' in response.json(), (
+            'Проверьте, что нельзя сменить username на занятый в другом '
+            'регистре'
+        )
+        response = client.patch('/api/v1/users/me/', {'first_name': 'Dave'})
+        assert response.status_code == 200, (
+            'Проверьте, что профиль можно изменить без смены username'
+        )
+
+    def test_database_constraint(self):
+        from django.db import IntegrityError, connection
+        from users.models import User
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('case-insensitive indexes are created on PostgreSQL')
+        User.objects.create(username='erin', email='erin@example.com')
+        with pytest.raises(IntegrityError):
+            User.objects.create(username='ERIN', email='erin2@example.com')
+
+    def test_migration_reports_duplicates(self):
+        from importlib import import_module
+
+        from django.apps import apps
+        from django.db import connection
+        from users.models import User
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('case-insensitive indexes are created on PostgreSQL')
+        migration = import_module(
+            'users.migrations.0006_case_insensitive_unique')
+        with connection.schema_editor() as schema_editor:
+            migration.drop_unique_indexes(apps, schema_editor)
+        try:
+            User.objects.create(username='frank', email='frank@example.com')
+            User.objects.create(username='Frank', email='frank2@example.com')
+            with pytest.raises(RuntimeError, match='username: frank, Frank'):
+                with connection.schema_editor() as schema_editor:
+                    migration.create_unique_indexes(apps, schema_editor)
+        finally:
+            User.objects.filter(username__iexact='frank').delete()
+            with connection.schema_editor() as schema_editor:
+                migration.create_unique_indexes(apps, schema_editor)
+
+
+def exchange(username, code):
+    return APIClient().post('/api/v1/auth/token/',
+                            {'username': username,
+                             'confirmation_code': code})
+
+
+def sent_code(username):
+    from users.models import OutboxMessage
+
+    body = OutboxMessage.objects.filter(
+        user__username=username).latest('created_at').body
+    return re.search(r'\b\d{6}\b', body).group()
+
+
+@pytest.mark.usefixtures('postgres_db')
+@pytest.mark.django_db(transaction=True)
+class TestConfirmationCodes:
+
+    def test_signup_code(self):
+        assert signup('frank', 'frank@example.com').status_code == 200
+        code = sent_code('frank')
+        response = exchange('frank', code)
+        assert response.status_code == 200 and 'token' in response.json(), (
+            'Проверьте, что код из письма обменивается на токен'
+        )
+        assert exchange('frank', code).status_code == 400, (
+            'Проверьте, что код подтверждения можно использовать один раз'
+        )
+
+    def test_single_lookup(self):
+        from api.middleware import record_queries
+        from users.confirmation import issue_code
+        from users.models import User
+
+        user = User.objects.create(username='grace',
+                                   email='grace@example.com')
+        code = issue_code(user)
+        with record_queries() as recorder:
+            response = exchange('grace', code)
+        assert response.status_code == 200
+        selects = [sql for sql, _ in recorder.queries
+                   if sql.startswith('SELECT')]
+        assert len(selects) == 1, (
+            'Проверьте, что обмен кода на токен выполняет один SELECT:\n'
+            + '\n'.join(selects)
+        )
+
+    def test_attempts_limit(self, settings):
+        from users.confirmation import issue_code
+        from users.models import User
+
+        user = User.objects.create(username='heidi',
+                                   email='heidi@example.com')
+        code = issue_code(user)
+        wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            assert exchange('heidi', wrong).status_code == 400
+        assert exchange('heidi', code).status_code == 400, (
+            'Проверьте, что код перестает действовать после '
+            'CONFIRMATION_CODE_MAX_ATTEMPTS неверных попыток'
+        )
+
+    def test_expired_code(self, settings):
+        from datetime import timedelta
+
+        from users.confirmation import issue_code
+        from users.models import User
+
+        settings.CONFIRMATION_CODE_TTL = timedelta(seconds=-1)
+        user = User.objects.create(username='ivan', email='ivan@example.com')
+        assert exchange('ivan', issue_code(user)).status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+
+    def test_repeated_signup_keeps_sent_code(self):
+        from users.outbox import drain_outbox
+
+        assert signup('judy', 'judy@example.com').status_code == 200
+        code = sent_code('judy')
+        drain_outbox(10)
+        assert signup('judy', 'judy@example.com').status_code == 200
+        assert exchange('judy', code).status_code == 200, (
+            'Проверьте, что повторная регистрация сразу после отправки '
+            'письма не отменяет отправленный код'
+        )
+
+    def test_repeated_signup_replaces_blocked_code(self, settings):
+        from django.core import mail
+        from users.outbox import drain_outbox
+
+        assert signup('kate', 'kate@example.com').status_code == 200
+        code = sent_code('kate')
+        drain_outbox(10)
+        wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            assert exchange('kate', wrong).status_code == 400
+        assert signup('kate', 'kate@example.com').status_code == 200
+        drain_outbox(10)
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что после исчерпания попыток повторная регистрация '
+            'отправляет новое письмо'
+        )
+        assert exchange('kate', sent_code('kate')).status_code == 200, (
+            'Проверьте, что после исчерпания попыток повторная регистрация '
+            'выдает рабочий код'
+        )
+
+    def test_benchmark_command(self):
+        from io import StringIO
+
+        from django.core.management import CommandError, call_command
+        from users.models import User
+
+        with pytest.raises(CommandError):
+            call_command('benchmark_token', requests=4, stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark_token', requests=4, concurrency=2,
+                     confirm=True, stdout=out)
+        assert '0 failed' in out.getvalue() and 'p99' in out.getvalue(), (
+            'Проверьте, что benchmark_token обменивает все коды и '
+            'выводит перцентили задержки'
+        )
+        assert not User.objects.filter(
+            username__startswith='benchmark-token-').exists(), (
+            'Проверьте, что benchmark_token удаляет созданных пользователей'
+        )
+
+
+@pytest.mark.usefixtures('postgres_db')
+@pytest.mark.django_db(transaction=True)
+class TestOutbox:
+
+    def test_claimed_messages(self):
+        from django.core import mail
+        from users.models import OutboxMessage, User
+        from users.outbox import (claim_messages, deliver, drain_outbox,
+                                  queue_email, save_results)
+
+        user = User.objects.create(username='oscar', email='oscar@example.com')
+        queue_email(user, 'Code', 'first', 'team@yamdb.fake')
+        messages = claim_messages(10)
+        assert len(messages) == 1
+        assert not claim_messages(10), (
+            'Проверьте, что отправляемое письмо не забирают другие '
+            'обработчики'
+        )
+        queue_email(user, 'Code', 'second', 'team@yamdb.fake')
+        deliver(messages)
+        save_results(messages)
+        message = OutboxMessage.objects.get(user=user)
+        assert message.sent_at is None and message.body == 'second', (
+            'Проверьте, что письмо, измененное во время отправки, '
+            'отправляется повторно'
+        )
+        assert drain_outbox(10) == (1, 0)
+        assert [email.body for email in mail.outbox] == ['first', 'second']
+        assert OutboxMessage.objects.get(user=user).sent_at is not None
+
+
+@pytest.fixture
+def revoked_users():
+    """Empty revocation list, synced just now."""
+    import time
+    from collections import OrderedDict
+
+    from django.utils import timezone
+    from users.revocations import revoked_users
+
+    revoked_users.revoked = OrderedDict()
+    revoked_users.floor = 0.0
+    revoked_users.seen = set()
+    revoked_users.synced_at = timezone.now()
+    revoked_users.checked = time.monotonic()
+    return revoked_users
+
+
+@pytest.mark.usefixtures('postgres_db')
+@pytest.mark.django_db(transaction=True)
+class TestTokenRevocation:
+    USERS_URL = '/api/v1/users/'
+
+    @pytest.fixture
+    def admin(self, revoked_users, api_client):
+        from users.models import User
+
+        admin = User.objects.create(username='trent',
+                                    email='trent@example.com',
+                                    role=User.ADMIN_ROLE_NAME)
+        client = api_client(admin)
+        assert client.get(self.USERS_URL).status_code == 200
+        return admin, client
+
+    def test_demotion(self, admin):
+        admin, client = admin
+        admin.role = admin.USER_ROLE_NAME
+        admin.save()
+        assert client.get(self.USERS_URL).status_code == 403, (
+            'Проверьте, что токен перестает давать права администратора '
+            'после смены роли'
+        )
+
+    def test_deactivation(self, admin):
+        admin, client = admin
+        admin.is_active = False
+        admin.save(update_fields=['is_active'])
+        assert client.get(self.USERS_URL).status_code == 401, (
+            'Проверьте, что токен отключенного пользователя не принимается'
+        )
+
+    def test_deletion(self, admin):
+        admin, client = admin
+        admin.delete()
+        assert client.get(self.USERS_URL).status_code == 401, (
+            'Проверьте, что токен удаленного пользователя не принимается'
+        )
+
+    def test_eviction(self, admin, revoked_users, settings):
+        from users.models import User
+
+        settings.REVOKED_USERS_MAX_SIZE = 1
+        admin, client = admin
+        admin.role = admin.USER_ROLE_NAME
+        admin.save()
+        other = User.objects.create(username='peggy',
+                                    email='peggy@example.com')
+        other.role = other.MODERATOR_ROLE_NAME
+        other.save()
+        assert admin.pk not in revoked_users.revoked
+        assert client.get(self.USERS_URL).status_code == 403, (
+            'Проверьте, что после вытеснения из списка отозванных токены, '
+            'выданные раньше вытесненной записи, проверяются по базе'
+        )
+
+    def test_other_process_change(self, admin, settings):
+        from django.utils import timezone
+        from users.models import User
+
+        admin, client = admin
+        # update() skips signals, as a change made by another process
+        User.objects.filter(pk=admin.pk).update(
+            role=User.USER_ROLE_NAME, tokens_valid_after=timezone.now())
+        settings.REVOKED_USERS_SYNC_INTERVAL = 3600
+        assert client.get(self.USERS_URL).status_code == 200
+        settings.REVOKED_USERS_SYNC_INTERVAL = 0
+        assert client.get(self.USERS_URL).status_code == 403, (
+            'Проверьте, что изменения других процессов читаются из '
+            'tokens_valid_after раз в REVOKED_USERS_SYNC_INTERVAL секунд'
+        )